@@ -1,5 +1,4 @@
 from enum import Enum
-from collections import namedtuple
 
 class OrderSide(Enum):
     LONG = 'long'
@@ -11,4 +10,6 @@ class LevelHit(Enum):
     STOP = 'stop'
     NOHIT = 'nohit'
 
-bardata = namedtuple('bardata', ['open', 'high', 'low', 'close', 'timestamp', 'day_index'])
\ No newline at end of file
+
+# Start of the trading session in exchange time, bars at or after it belong to the next trading day
+SESSION_START = '18:00'
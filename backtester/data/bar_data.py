@@ -1,7 +1,9 @@
-import pandas as pd
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any
 from dataclasses import dataclass, asdict
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 @dataclass(frozen=True)
 class BarData:
@@ -12,18 +14,23 @@ class BarData:
     high: float
     low: float
     last: float
-    datetime: pd.Timestamp
+    datetime: 'pd.Timestamp'
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'BarData':
-        assert isinstance(data['datetime'], pd.Timestamp)
+        import pandas as pd
+
+        # datetime64 values and epoch nanoseconds are accepted as well as Timestamps
+        datetime = data['datetime']
+        if not isinstance(datetime, pd.Timestamp):
+            datetime = pd.Timestamp(datetime)
 
         return cls(
             open=float(data['open']),
             high=float(data['high']),
             low=float(data['low']),
             last=float(data.get('last')),
-            datetime=data['datetime']
+            datetime=datetime
         )
 
     def to_dict(self) -> Dict[str, Any]:
@@ -0,0 +1,222 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator, Optional, Sequence, Union
+from backtester.const import SESSION_START
+from backtester.data import sessions
+from backtester.data.bar_data import BarData
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'last')
+
+
+class BarView:
+    """
+    Read-only view on a single bar of a BarStore.
+
+    Exposes the same attributes as BarData without copying the bar out of the store,
+    so it can be passed anywhere a BarData is expected (e.g. Order.update_at_bar).
+    """
+    __slots__ = ('_store', 'index')
+
+    def __init__(self, store: 'BarStore', index: int):
+        self._store = store
+        self.index = index
+
+    @property
+    def open(self) -> float:
+        return float(self._store.open[self.index])
+
+    @property
+    def high(self) -> float:
+        return float(self._store.high[self.index])
+
+    @property
+    def low(self) -> float:
+        return float(self._store.low[self.index])
+
+    @property
+    def last(self) -> float:
+        return float(self._store.last[self.index])
+
+    @property
+    def datetime(self) -> 'pd.Timestamp':
+        import pandas as pd
+        return pd.Timestamp(int(self._store.timestamp[self.index]))
+
+    @property
+    def timestamp(self) -> int:
+        return int(self._store.timestamp[self.index])
+
+    @property
+    def day_index(self) -> int:
+        return int(self._store.day_index[self.index])
+
+    def to_bar_data(self) -> BarData:
+        return BarData(
+            open=self.open,
+            high=self.high,
+            low=self.low,
+            last=self.last,
+            datetime=self.datetime
+        )
+
+    def __repr__(self) -> str:
+        return (f"BarView(index={self.index}, open={self.open}, high={self.high}, "
+                f"low={self.low}, last={self.last}, datetime={self.datetime})")
+
+
+@dataclass(frozen=True)
+class BarStore:
+    """
+    Columnar storage for OHLC bar data.
+
+    Prices are contiguous float64 arrays and timestamps are int64 nanoseconds since epoch.
+    `day_index` holds the session id of each bar (see sessions.day_index), computed from the timestamps
+    when not given. Bars are handed out on demand as BarView objects, no per-row Python object is kept.
+    """
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    last: np.ndarray
+    timestamp: np.ndarray
+    day_index: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        for name in PRICE_COLUMNS:
+            object.__setattr__(self, name, np.ascontiguousarray(getattr(self, name), dtype=np.float64))
+        object.__setattr__(self, 'timestamp', np.ascontiguousarray(self.timestamp, dtype=np.int64))
+
+        if self.day_index is None:
+            object.__setattr__(self, 'day_index', sessions.day_index(self.timestamp, SESSION_START))
+        object.__setattr__(self, 'day_index', np.ascontiguousarray(self.day_index, dtype=np.int32))
+
+        n = len(self.timestamp)
+        for name in (*PRICE_COLUMNS, 'day_index'):
+            if len(getattr(self, name)) != n:
+                raise ValueError(f"Column '{name}' has {len(getattr(self, name))} rows, expected {n}")
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[BarView, 'BarStore']:
+        if isinstance(index, slice):
+            # Slicing numpy arrays returns views, the sliced store shares memory with this one
+            return BarStore(
+                open=self.open[index],
+                high=self.high[index],
+                low=self.low[index],
+                last=self.last[index],
+                timestamp=self.timestamp[index],
+                day_index=self.day_index[index]
+            )
+
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError(f"Bar index {index} out of range for store of {n} bars")
+
+        return BarView(self, index)
+
+    def __iter__(self) -> Iterator[BarView]:
+        for i in range(len(self)):
+            yield BarView(self, i)
+
+    @classmethod
+    def concat(cls, stores: Sequence['BarStore']) -> 'BarStore':
+        """
+        Concatenate stores in order, a single store is returned as is without copying
+        """
+        if len(stores) == 1:
+            return stores[0]
+
+        return cls(**{
+            name: np.concatenate([getattr(store, name) for store in stores]) if stores else np.empty(0)
+            for name in (*PRICE_COLUMNS, 'timestamp', 'day_index')
+        })
+
+    def session_bounds(self) -> np.ndarray:
+        """
+        Start offsets of each session, followed by the number of bars
+        """
+        return sessions.session_bounds(self.day_index)
+
+    def time_slice(self, start: Optional['pd.Timestamp'] = None, end: Optional['pd.Timestamp'] = None) -> 'BarStore':
+        """
+        Zero-copy view on the bars within [start, end), found by binary search on the timestamps
+        """
+        import pandas as pd
+
+        lo = np.searchsorted(self.timestamp, pd.Timestamp(start).value) if start is not None else 0
+        hi = np.searchsorted(self.timestamp, pd.Timestamp(end).value) if end is not None else len(self)
+        return self[lo:hi]
+
+    @classmethod
+    def from_frame(cls, df: 'pd.DataFrame') -> 'BarStore':
+        """
+        Build a store from a processed dataframe (open, high, low, last, datetime columns)
+        """
+        return cls(
+            open=df['open'].to_numpy(dtype=np.float64),
+            high=df['high'].to_numpy(dtype=np.float64),
+            low=df['low'].to_numpy(dtype=np.float64),
+            last=df['last'].to_numpy(dtype=np.float64),
+            timestamp=df['datetime'].to_numpy(dtype='datetime64[ns]').view(np.int64),
+            day_index=df['day_index'].to_numpy() if 'day_index' in df.columns else None
+        )
+
+    @classmethod
+    def from_arrow(cls, table: 'pa.Table') -> 'BarStore':
+        """
+        Build a store from an arrow table without going through pandas
+        """
+        import pyarrow as pa
+
+        timestamp = table.column('datetime').cast(pa.timestamp('ns')).to_numpy()
+        has_day_index = 'day_index' in table.column_names
+
+        return cls(
+            open=table.column('open').to_numpy(),
+            high=table.column('high').to_numpy(),
+            low=table.column('low').to_numpy(),
+            last=table.column('last').to_numpy(),
+            timestamp=timestamp.view(np.int64),
+            day_index=table.column('day_index').to_numpy() if has_day_index else None
+        )
+
+    @classmethod
+    def from_parquet(cls, file_path: str) -> 'BarStore':
+        """
+        Load the OHLC columns of a processed parquet file straight into contiguous arrays
+        """
+        import pyarrow.parquet as pq
+
+        columns = [*PRICE_COLUMNS, 'datetime']
+        if 'day_index' in pq.read_schema(file_path).names:
+            columns.append('day_index')
+
+        return cls.from_arrow(pq.read_table(file_path, columns=columns))
+
+    def to_arrow(self) -> 'pa.Table':
+        import pyarrow as pa
+
+        return pa.table({
+            **{name: getattr(self, name) for name in PRICE_COLUMNS},
+            'datetime': pa.array(self.timestamp.view('datetime64[ns]')),
+            'day_index': self.day_index,
+        })
+
+    def to_frame(self) -> 'pd.DataFrame':
+        import pandas as pd
+
+        return pd.DataFrame({
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'last': self.last,
+            'datetime': self.timestamp.view('datetime64[ns]'),
+            'day_index': self.day_index,
+        })
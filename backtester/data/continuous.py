@@ -0,0 +1,211 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from backtester.const import SESSION_START
+from backtester.data.bar_store import PRICE_COLUMNS
+from backtester.data.sessions import NS_PER_DAY, day_index, session_offset_ns
+
+ROLLS_SUFFIX = '.rolls.json'
+ADJUSTMENTS = ('difference', 'ratio', 'none')
+
+# Roll rule: 'volume' (crossover of the daily volumes) or one roll date per pair of consecutive contracts
+RollRule = Union[str, Sequence[Union[str, pd.Timestamp]]]
+
+
+@dataclass(frozen=True)
+class Contract:
+    """
+    Processed parquet bars of one contract (output of sierra_txt_file_to_pq), e.g. NQZ25
+    """
+    symbol: str
+    path: str
+
+
+def _signature(contract: Contract) -> List[Any]:
+    stat = os.stat(contract.path)
+    return [contract.symbol, stat.st_size, stat.st_mtime_ns]
+
+
+def _read_columns(path: str, columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    table = pq.read_table(path, columns=list(columns))
+    out = {name: table.column(name).to_numpy() for name in columns if name != 'datetime'}
+    if 'datetime' in columns:
+        out['datetime'] = table.column('datetime').cast(pa.timestamp('ns')).to_numpy().view(np.int64)
+    return out
+
+
+def _daily_volume(path: str, session_start: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trading days (day_index) of a contract and their total volume
+    """
+    columns = _read_columns(path, ['volume', 'datetime'])
+    days, inverse = np.unique(day_index(columns['datetime'], session_start), return_inverse=True)
+    return days, np.bincount(inverse, weights=columns['volume'].astype(np.float64))
+
+
+def _volume_roll_day(front: Contract, back: Contract, session_start: str) -> int:
+    """
+    Day following the first trading day where the back contract traded more volume than the front one.
+    The crossover is only known once its day is over, so the roll takes effect the next day.
+    Without crossover, the roll happens after the last day of the front contract.
+    """
+    front_days, front_volume = _daily_volume(front.path, session_start)
+    back_days, back_volume = _daily_volume(back.path, session_start)
+    days, front_at, back_at = np.intersect1d(front_days, back_days, return_indices=True)
+    crossed = np.flatnonzero(back_volume[back_at] > front_volume[front_at])
+
+    if crossed.size:
+        return int(days[crossed[0]]) + 1
+    return int(front_days[-1]) + 1
+
+
+def _day_start_ns(day: int, session_start: str) -> int:
+    """First nanosecond of a trading day (the session start of the evening before)"""
+    return day * NS_PER_DAY - session_offset_ns(session_start)
+
+
+def _roll_prices(front: Contract, back: Contract, roll_ns: int) -> Tuple[float, float]:
+    """
+    Last prices of both contracts at the last front bar before the roll, used to adjust the history
+    """
+    front_columns = _read_columns(front.path, ['last', 'datetime'])
+    back_columns = _read_columns(back.path, ['last', 'datetime'])
+
+    i = np.searchsorted(front_columns['datetime'], roll_ns, side='left') - 1
+    if i < 0:
+        raise ValueError(f"{front.symbol} has no bar before its roll to {back.symbol}")
+    # Back contract price at the same time, or its first bar if it did not trade yet
+    j = max(np.searchsorted(back_columns['datetime'], front_columns['datetime'][i], side='right') - 1, 0)
+
+    return float(front_columns['last'][i]), float(back_columns['last'][j])
+
+
+def _read_rolls(path: str) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_rolls(path: str, rolls: Dict[str, Any]) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(rolls, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def compute_rolls(
+    contracts: Sequence[Contract],
+    roll: RollRule = 'volume',
+    session_start: str = SESSION_START,
+    cache_path: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Roll points between consecutive contracts (ordered by expiry): the trading day from which the
+    back contract is used, and the prices of both contracts just before.
+
+    Roll points are cached by contract pair, file signature and rule in `cache_path`, so adding
+    a contract only computes the roll into it.
+    """
+    if isinstance(roll, str) and roll != 'volume':
+        raise ValueError(f"Unknown roll rule {roll!r}, expected 'volume' or a sequence of roll dates")
+    if roll != 'volume' and len(roll) != len(contracts) - 1:
+        raise ValueError(f"Expected {len(contracts) - 1} roll dates for {len(contracts)} contracts, got {len(roll)}")
+
+    cache = _read_rolls(cache_path) if cache_path else {}
+    rows = []
+    for k, (front, back) in enumerate(zip(contracts[:-1], contracts[1:])):
+        rule = 'volume' if roll == 'volume' else str(pd.Timestamp(roll[k]).date())
+        key = f"{front.symbol}->{back.symbol}"
+        signature = [_signature(front), _signature(back), rule, session_start]
+        cached = cache.get(key)
+
+        if cached is None or cached['signature'] != signature:
+            if roll == 'volume':
+                day = _volume_roll_day(front, back, session_start)
+            else:
+                day = int(np.datetime64(rule, 'D').astype(np.int64))
+            front_price, back_price = _roll_prices(front, back, _day_start_ns(day, session_start))
+            cached = cache[key] = {
+                'signature': signature,
+                'day': day,
+                'front_price': front_price,
+                'back_price': back_price,
+            }
+
+        rows.append({
+            'front': front.symbol,
+            'back': back.symbol,
+            'roll_day': np.datetime64(cached['day'], 'D'),
+            'front_price': cached['front_price'],
+            'back_price': cached['back_price'],
+        })
+
+    if cache_path:
+        _write_rolls(cache_path, cache)
+
+    return pd.DataFrame(rows, columns=['front', 'back', 'roll_day', 'front_price', 'back_price'])
+
+
+def build_continuous_contract(
+    contracts: Sequence[Contract],
+    out_file: str,
+    roll: RollRule = 'volume',
+    adjustment: str = 'difference',
+    session_start: str = SESSION_START
+) -> pd.DataFrame:
+    """
+    Stitch per-contract parquet bars into one continuous series written to `out_file`.
+
+    Each contract is used from its roll day to the next roll day. History is back-adjusted so that
+    prices line up with the latest contract: shifted by the price gaps at the later rolls ('difference')
+    or scaled by their ratios ('ratio'), or left as traded ('none'). A `contract` column records the source
+    of each bar. Roll points are cached next to the output. Returns the roll table.
+    """
+    if adjustment not in ADJUSTMENTS:
+        raise ValueError(f"Unknown adjustment {adjustment!r}, expected one of {ADJUSTMENTS}")
+
+    rolls = compute_rolls(contracts, roll, session_start, cache_path=out_file + ROLLS_SUFFIX)
+    roll_ns = [_day_start_ns(int(day.astype(np.int64)), session_start) for day in rolls['roll_day'].to_numpy('datetime64[D]')]
+    bounds = [np.iinfo(np.int64).min, *roll_ns, np.iinfo(np.int64).max]
+
+    # Adjustment of each segment, accumulated from the latest contract backwards
+    gaps = (rolls['back_price'] - rolls['front_price']).to_numpy()
+    ratios = (rolls['back_price'] / rolls['front_price']).to_numpy()
+    offsets = np.r_[np.cumsum(gaps[::-1])[::-1], 0.]
+    factors = np.r_[np.cumprod(ratios[::-1])[::-1], 1.]
+
+    tables = []
+    for k, contract in enumerate(contracts):
+        start, end = bounds[k], bounds[k + 1]
+        names = pq.read_schema(contract.path).names
+        columns = [*PRICE_COLUMNS, *(['volume'] if 'volume' in names else []), 'datetime']
+        table = pq.read_table(contract.path, columns=columns)
+        timestamp = table.column('datetime').cast(pa.timestamp('ns')).to_numpy().view(np.int64)
+        lo, hi = np.searchsorted(timestamp, start, side='left'), np.searchsorted(timestamp, end, side='left')
+        if hi <= lo:
+            continue
+
+        segment = {}
+        for name in PRICE_COLUMNS:
+            values = table.column(name).to_numpy()[lo:hi].astype(np.float64)
+            if adjustment == 'difference':
+                values = values + offsets[k]
+            elif adjustment == 'ratio':
+                values = values * factors[k]
+            segment[name] = values
+        if 'volume' in names:
+            segment['volume'] = table.column('volume').to_numpy()[lo:hi]
+        segment['datetime'] = pa.array(timestamp[lo:hi].view('datetime64[ns]'))
+        segment['day_index'] = day_index(timestamp[lo:hi], session_start)
+        segment['contract'] = pa.array(np.full(hi - lo, contract.symbol))
+        tables.append(pa.table(segment))
+
+    pq.write_table(pa.concat_tables(tables), out_file)
+    return rolls
@@ -0,0 +1,196 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import List, Optional, Union
+from backtester.const import SESSION_START
+from backtester.data.sessions import trading_day
+
+PARTITION_SUFFIX = '.arrow'
+
+TimeLike = Union[str, pd.Timestamp, np.datetime64]
+
+
+def partition_dir(root: str, symbol: str) -> str:
+    return os.path.join(root, symbol)
+
+
+def partition_path(root: str, symbol: str, day: np.datetime64) -> str:
+    return os.path.join(partition_dir(root, symbol), f"{day}{PARTITION_SUFFIX}")
+
+
+class PartitionedDatasetWriter:
+    """
+    Writes time-ordered bars as one uncompressed Arrow IPC file per symbol and trading day.
+
+    Each day is written as a single record batch so the loader can memory-map it and hand out
+    its columns without copies. Only the day currently being written is buffered in memory.
+    Bars already in a day file on disk when the day is opened are dropped, so ingesting the same export
+    twice leaves the dataset unchanged. Bars sharing a timestamp (e.g. volume bars) are told apart
+    by their count: with k bars at the last timestamp of the file, the first k incoming ones at that
+    timestamp are skipped. Bars written in the same run are never dropped.
+    """
+    def __init__(self, root: str, symbol: str, session_start: str = SESSION_START):
+        self.root = root
+        self.symbol = symbol
+        self.session_start = session_start
+        self._day = None
+        self._batches: List[pa.RecordBatch] = []
+        # Last timestamp of the day file on disk and how many of its bars at that timestamp remain to skip
+        self._resume_timestamp: Optional[int] = None
+        self._resume_count = 0
+        os.makedirs(partition_dir(root, symbol), exist_ok=True)
+
+    def write(self, data: Union[pd.DataFrame, pa.Table, pa.RecordBatch]) -> int:
+        """
+        Append time-ordered bars and return the number written, bars already on disk are skipped
+        """
+        if isinstance(data, pd.DataFrame):
+            data = pa.Table.from_pandas(data, preserve_index=False)
+        if isinstance(data, pa.RecordBatch):
+            data = pa.Table.from_batches([data])
+        if data.num_rows == 0:
+            return 0
+
+        # Days resumed from disk are combined with new batches, schemas must match without pandas metadata
+        data = data.replace_schema_metadata(None)
+        data = data.set_column(
+            data.schema.get_field_index('datetime'),
+            'datetime',
+            data.column('datetime').cast(pa.timestamp('ns'))
+        )
+        timestamp = data.column('datetime').to_numpy().view(np.int64)
+        days = trading_day(timestamp, self.session_start)
+
+        # Bars are time-ordered, so each trading day is one contiguous run of rows
+        written = 0
+        boundaries = np.flatnonzero(days[1:] != days[:-1]) + 1
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(days)]):
+            if days[start] != self._day:
+                self._flush()
+                self._open_day(days[start])
+
+            # Skip the bars already in the day file, e.g. when an export is ingested again
+            if self._resume_timestamp is not None:
+                start = self._skip_written(timestamp, start, end)
+            if start < end:
+                self._batches.extend(data.slice(start, end - start).to_batches())
+                written += end - start
+
+        return written
+
+    def _skip_written(self, timestamp: np.ndarray, start: int, end: int) -> int:
+        """
+        First row of timestamp[start:end] that is not in the day file on disk. The state carries over
+        to the next call while all the rows are skipped, the chunk may end within the bars on disk.
+        """
+        resume = self._resume_timestamp
+        before = start + int(np.searchsorted(timestamp[start:end], resume, side='left'))
+        at_resume = start + int(np.searchsorted(timestamp[start:end], resume, side='right')) - before
+        skipped = min(at_resume, self._resume_count)
+        self._resume_count -= skipped
+        start = before + skipped
+
+        if start < end:
+            self._resume_timestamp = None
+        return start
+
+    def _open_day(self, day: np.datetime64) -> None:
+        self._day = day
+        self._resume_timestamp = None
+        path = partition_path(self.root, self.symbol, day)
+
+        # A day already on disk (e.g. the last day of a previous ingest) is extended, not replaced
+        if os.path.exists(path):
+            table = read_partition(path)
+            self._batches = table.to_batches()
+            if table.num_rows:
+                timestamp = table.column('datetime').cast(pa.timestamp('ns')).to_numpy().view(np.int64)
+                self._resume_timestamp = int(timestamp[-1])
+                self._resume_count = len(timestamp) - int(np.searchsorted(timestamp, timestamp[-1], side='left'))
+
+    def _flush(self) -> None:
+        if self._day is None:
+            return
+
+        table = pa.Table.from_batches(self._batches)
+        write_partition(table, partition_path(self.root, self.symbol, self._day))
+
+        self._day = None
+        self._batches = []
+
+    def close(self) -> None:
+        self._flush()
+
+    def __enter__(self) -> 'PartitionedDatasetWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def write_partitioned_dataset(
+    source: Union[str, pd.DataFrame],
+    root: str,
+    symbol: str,
+    session_start: str = SESSION_START
+) -> None:
+    """
+    Partition processed bars (a parquet file or a dataframe) by trading day under `root/symbol`
+    """
+    with PartitionedDatasetWriter(root, symbol, session_start) as writer:
+        if isinstance(source, pd.DataFrame):
+            writer.write(source)
+            return
+
+        # Parquet files are streamed one batch at a time
+        for batch in pq.ParquetFile(source).iter_batches():
+            writer.write(batch)
+
+
+def write_partition(table: pa.Table, path: str) -> None:
+    """
+    Write a table as a single-batch uncompressed Arrow IPC file, so it can be memory-mapped without copies
+    """
+    table = table.combine_chunks()
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, path)
+
+
+def read_partition(path: str) -> pa.Table:
+    """
+    Memory-map a day partition, the returned table references the file pages without copying them
+    """
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+def list_partitions(
+    root: str,
+    symbol: str,
+    start_day: Optional[np.datetime64] = None,
+    end_day: Optional[np.datetime64] = None
+) -> List[str]:
+    """
+    Paths of the day partitions of a symbol within [start_day, end_day], in time order
+    """
+    directory = partition_dir(root, symbol)
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"No partitioned data for symbol '{symbol}' under {root}")
+
+    paths = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(PARTITION_SUFFIX):
+            continue
+
+        # Partition names are ISO dates, string ordering is time ordering
+        day = name[:-len(PARTITION_SUFFIX)]
+        if start_day is not None and day < str(start_day):
+            continue
+        if end_day is not None and day > str(end_day):
+            continue
+        paths.append(os.path.join(directory, name))
+
+    return paths
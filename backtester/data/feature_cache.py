@@ -0,0 +1,215 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Any, Dict, List, Optional, Tuple
+from backtester.const import SESSION_START
+from backtester.data.features import FEATURES, FEATURE_COLUMNS
+from backtester.data.sessions import day_index
+
+CACHE_DIR = '_features'
+DATASETS_DIR = '_datasets'
+HASH_BLOCK_SIZE = 1 << 23
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def content_hash(path: str) -> str:
+    """
+    BLAKE2b digest of the bytes of a file, read in blocks
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def feature_key(dataset_hash: str, name: str, params: Dict[str, Any]) -> str:
+    payload = json.dumps([dataset_hash, name, params], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    # Unique temporary name, several processes may write the same entry
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def cached_content_hash(cache_dir: str, dataset_path: str) -> str:
+    """
+    Content hash of a file, memoized in `cache_dir` by path and only recomputed when the size or
+    modification time of the file changed. Each file has its own memo, written only when hashing.
+    """
+    path = os.path.abspath(dataset_path)
+    stat = os.stat(path)
+    memo_dir = os.path.join(cache_dir, DATASETS_DIR)
+    memo_path = os.path.join(memo_dir, hashlib.blake2b(path.encode(), digest_size=16).hexdigest() + '.json')
+    try:
+        with open(memo_path) as f:
+            memo = json.load(f)
+        if memo['size'] == stat.st_size and memo['mtime_ns'] == stat.st_mtime_ns:
+            return memo['hash']
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    digest = content_hash(path)
+    os.makedirs(memo_dir, exist_ok=True)
+    _write_json(memo_path, {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest})
+    return digest
+
+
+def touch(path: str) -> None:
+    """Mark a cache entry as used, the modification time of the file orders the LRU"""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def cache_entries(cache_dir: str, suffix: str) -> List[Tuple[str, int, int]]:
+    """
+    (key, bytes, last use in ns) of the entries of a cache directory, least recently used first
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(suffix) or '.tmp' in name:
+            continue
+        try:
+            stat = os.stat(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            continue
+        entries.append((name[:-len(suffix)], stat.st_size, stat.st_mtime_ns))
+
+    return sorted(entries, key=lambda entry: (entry[2], entry[0]))
+
+
+def remove_entry(cache_dir: str, key: str, suffix: str) -> None:
+    for path in (os.path.join(cache_dir, key + suffix), os.path.join(cache_dir, key + '.json')):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def evict_lru(cache_dir: str, max_bytes: int, suffix: str, keep: Optional[str] = None) -> None:
+    """
+    Remove the least recently used entries of a cache directory until it fits in `max_bytes`.
+    The directory listing is the index, so entries written by other processes are accounted for.
+    """
+    entries = cache_entries(cache_dir, suffix)
+    total = sum(size for _, size, _ in entries)
+    for key, size, _ in entries:
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        remove_entry(cache_dir, key, suffix)
+        total -= size
+
+
+class FeatureCache:
+    """
+    On-disk cache of features computed over processed parquet bars.
+
+    Entries are keyed by (content hash of the parquet file, feature name, parameters) and stored as
+    .npy files in a `_features` directory next to the data, loaded back memory-mapped, with a small
+    .json file describing each one. Rewriting the parquet file changes its hash, so stale features are
+    never served. When the cache grows past `max_bytes`, the least recently used entries are evicted.
+
+    There is no shared index: a hit only touches the modification time of its file, and sizes and
+    last uses are read from the directory, so several processes (e.g. sweep workers) can share a cache.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, session_start: str = SESSION_START):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.session_start = session_start
+        os.makedirs(cache_dir, exist_ok=True)
+        self._columns: Dict[str, Dict[str, np.ndarray]] = {}
+
+    @classmethod
+    def next_to(cls, dataset_path: str, **kwargs) -> 'FeatureCache':
+        """Cache in the `_features` directory beside a parquet file"""
+        return cls(os.path.join(os.path.dirname(os.path.abspath(dataset_path)), CACHE_DIR), **kwargs)
+
+    def dataset_hash(self, dataset_path: str) -> str:
+        """
+        Content hash of a parquet file, only recomputed when its size or modification time changed
+        """
+        return cached_content_hash(self.cache_dir, dataset_path)
+
+    def _load_columns(self, dataset_path: str, dataset_hash: str) -> Dict[str, np.ndarray]:
+        if dataset_hash not in self._columns:
+            names = pq.read_schema(dataset_path).names
+            table = pq.read_table(dataset_path, columns=[c for c in (*FEATURE_COLUMNS, 'datetime') if c in names])
+            columns = {
+                name: table.column(name).to_numpy()
+                for name in FEATURE_COLUMNS if name in table.column_names
+            }
+            if 'day_index' not in columns:
+                timestamp = table.column('datetime').cast(pa.timestamp('ns')).to_numpy().view(np.int64)
+                columns['day_index'] = day_index(timestamp, self.session_start)
+            # Only the columns of the latest dataset are kept in memory
+            self._columns = {dataset_hash: columns}
+
+        return self._columns[dataset_hash]
+
+    def get(self, dataset_path: str, name: str, **params) -> np.ndarray:
+        """
+        Feature `name` of a parquet file, read from the cache (memory-mapped) or computed and stored
+        """
+        if name not in FEATURES:
+            raise KeyError(f"Unknown feature {name!r}, expected one of {sorted(FEATURES)}")
+
+        dataset_hash = self.dataset_hash(dataset_path)
+        key = feature_key(dataset_hash, name, params)
+        path = os.path.join(self.cache_dir, f"{key}.npy")
+
+        try:
+            values = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            pass
+        else:
+            touch(path)
+            return values
+
+        values = FEATURES[name](self._load_columns(dataset_path, dataset_hash), **params)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, values)
+        os.replace(tmp_path, path)
+        _write_json(os.path.join(self.cache_dir, f"{key}.json"),
+                    {'dataset': dataset_hash, 'name': name, 'params': params})
+
+        self._evict(keep=key)
+        return np.load(path, mmap_mode='r')
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        Description, size and last use of the cached features, least recently used first
+        """
+        entries = []
+        for key, size, last_used in cache_entries(self.cache_dir, '.npy'):
+            try:
+                with open(os.path.join(self.cache_dir, f"{key}.json")) as f:
+                    entry = json.load(f)
+            except FileNotFoundError:
+                entry = {}
+            entries.append({'key': key, **entry, 'bytes': size, 'last_used_ns': last_used})
+        return entries
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in cache_entries(self.cache_dir, '.npy'))
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        evict_lru(self.cache_dir, self.max_bytes, '.npy', keep)
+
+    def clear(self) -> None:
+        for key, _, _ in cache_entries(self.cache_dir, '.npy'):
+            remove_entry(self.cache_dir, key, '.npy')
+        shutil.rmtree(os.path.join(self.cache_dir, DATASETS_DIR), ignore_errors=True)
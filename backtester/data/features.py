@@ -0,0 +1,120 @@
+import numpy as np
+from typing import Callable, Dict, Mapping
+from backtester.data.sessions import session_bounds
+
+Columns = Mapping[str, np.ndarray]
+FeatureFn = Callable[..., np.ndarray]
+
+# Columns of the processed bars the features are computed from
+FEATURE_COLUMNS = ('open', 'high', 'low', 'last', 'volume', 'day_index')
+
+
+def _per_session(values: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """
+    Repeat one value per session over the bars of the session
+    """
+    return np.repeat(values, np.diff(bounds))
+
+
+def session_vwap(columns: Columns) -> np.ndarray:
+    """
+    Volume-weighted average of the typical price (high + low + last) / 3, reset at each session start
+    """
+    typical = (columns['high'] + columns['low'] + columns['last']) / 3
+    volume = columns['volume'].astype(np.float64)
+    bounds = session_bounds(columns['day_index'])
+
+    cum_pv = np.cumsum(typical * volume)
+    cum_volume = np.cumsum(volume)
+    # Running sums at the end of the previous session, subtracted from every bar of the session
+    starts = bounds[:-1]
+    before_pv = _per_session(np.r_[0., cum_pv[starts[1:] - 1]], bounds)
+    before_volume = _per_session(np.r_[0., cum_volume[starts[1:] - 1]], bounds)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (cum_pv - before_pv) / (cum_volume - before_volume)
+
+
+def true_range(columns: Columns) -> np.ndarray:
+    high, low, last = columns['high'], columns['low'], columns['last']
+    previous = np.r_[np.nan, last[:-1]]
+    return np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+
+
+def atr(columns: Columns, period: int = 14) -> np.ndarray:
+    """
+    Average true range, as the simple moving average of the true range over `period` bars
+    """
+    tr = true_range(columns)
+    cum = np.r_[0., np.cumsum(tr)]
+    out = np.full(len(tr), np.nan)
+    out[period - 1:] = (cum[period:] - cum[:-period]) / period
+    return out
+
+
+def _rolling(values: np.ndarray, window: int, reduce: Callable[..., np.ndarray]) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = reduce(np.lib.stride_tricks.sliding_window_view(values, window), axis=1)
+    return out
+
+
+def rolling_high(columns: Columns, window: int = 20) -> np.ndarray:
+    """Highest high of the last `window` bars, current bar included"""
+    return _rolling(columns['high'], window, np.max)
+
+
+def rolling_low(columns: Columns, window: int = 20) -> np.ndarray:
+    """Lowest low of the last `window` bars, current bar included"""
+    return _rolling(columns['low'], window, np.min)
+
+
+def value_area(columns: Columns, value_area_pct: float = 0.7, tick_size: float = 0.25) -> np.ndarray:
+    """
+    Value area low, point of control and value area high of the previous session, as an (n, 3) array.
+
+    The volume profile of a session buckets the volume of each bar at its last price on the tick grid.
+    The value area is made of the highest-volume price levels holding `value_area_pct` of the volume.
+    Bars of the first session have no previous session and get NaN.
+    """
+    day = columns['day_index']
+    ticks = np.round(columns['last'] / tick_size).astype(np.int64)
+    volume = columns['volume'].astype(np.float64)
+    bounds = session_bounds(day)
+    session = np.repeat(np.arange(len(bounds) - 1), np.diff(bounds))
+
+    # Volume per (session, price level), levels sorted by decreasing volume within each session
+    keys, inverse = np.unique(np.stack([session, ticks], axis=1), axis=0, return_inverse=True)
+    level_volume = np.bincount(inverse.ravel(), weights=volume, minlength=len(keys))
+    level_session, level_ticks = keys[:, 0], keys[:, 1]
+    order = np.lexsort((level_ticks, -level_volume, level_session))
+    level_session, level_ticks, level_volume = level_session[order], level_ticks[order], level_volume[order]
+
+    level_bounds = session_bounds(level_session)
+    session_volume = np.add.reduceat(level_volume, level_bounds[:-1])
+    cum = np.cumsum(level_volume)
+    cum_within = cum - _per_session(np.r_[0., cum[level_bounds[1:-1] - 1]], level_bounds)
+    # A level is in the value area if the volume of the levels ahead of it is still short of the target
+    target = _per_session(value_area_pct * session_volume, level_bounds)
+    in_area = (cum_within - level_volume) < target
+
+    masked_high = np.where(in_area, level_ticks, np.iinfo(np.int64).min)
+    masked_low = np.where(in_area, level_ticks, np.iinfo(np.int64).max)
+    levels = np.stack([
+        np.minimum.reduceat(masked_low, level_bounds[:-1]),
+        level_ticks[level_bounds[:-1]],
+        np.maximum.reduceat(masked_high, level_bounds[:-1]),
+    ], axis=1) * tick_size
+
+    # Shift by one session so that no bar sees the profile of its own session
+    previous = np.vstack([np.full((1, 3), np.nan), levels[:-1]])
+    return previous[session]
+
+
+FEATURES: Dict[str, FeatureFn] = {
+    'session_vwap': session_vwap,
+    'atr': atr,
+    'rolling_high': rolling_high,
+    'rolling_low': rolling_low,
+    'value_area': value_area,
+}
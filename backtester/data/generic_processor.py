@@ -1,16 +1,322 @@
+import io
+import os
+import json
+import hashlib
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Any, BinaryIO, Dict, Iterable, Optional, Tuple
+from backtester import instrumentation
+from backtester.const import SESSION_START
+from backtester.data.dataset import PartitionedDatasetWriter
+from backtester.data.sessions import day_index
 
-def sierra_txt_file_to_pq(path: str, out_file: str) -> pd.DataFrame:
+SIERRA_DATETIME_FORMAT = '%Y/%m/%d %H:%M:%S.%f'
+MANIFEST_FILE = '_manifest.json'
+PART_FILE_FORMAT = 'part-{:05d}.parquet'
+
+
+def sierra_txt_file_to_pq(
+    path: str,
+    out_file: str,
+    datetime_format: str = SIERRA_DATETIME_FORMAT,
+    session_start: str = SESSION_START
+) -> pd.DataFrame:
     """
     Basic processing of raw Sierra Chart data and optionally save to parquet
     """
     df = pd.read_csv(path)
-    initial_cols = df.columns.values
-    df = df.rename(columns={c: c.lower().strip().replace(' ', '_') for c in initial_cols})
-    
-    # Convert to pandas datetime first, then to Python datetime
-    df['datetime'] = pd.to_datetime(df['date'] + df['time']).apply(lambda x: x.to_pydatetime())
-    
+    df = _process_sierra_chunk(df, datetime_format, session_start)
+
     df.to_parquet(out_file)
-    
+
     return df
+
+
+def _process_sierra_chunk(
+    df: pd.DataFrame,
+    datetime_format: str,
+    session_start: str = SESSION_START
+) -> pd.DataFrame:
+    """
+    Normalize the column names of a raw Sierra Chart frame, parse its timestamps and tag each bar
+    with its session (day_index)
+    """
+    with instrumentation.stage('ingest.process_chunk'):
+        df = df.rename(columns={c: c.lower().strip().replace(' ', '_') for c in df.columns})
+
+        # Fixed-format parsing keeps the column as native datetime64[ns]
+        df['datetime'] = pd.to_datetime(
+            df['date'].str.strip() + ' ' + df['time'].str.strip(),
+            format=datetime_format
+        ).astype('datetime64[ns]')
+        df['day_index'] = day_index(df['datetime'].to_numpy().view(np.int64), session_start)
+
+    return df
+
+
+def _write_sierra_chunks(
+    chunks: Iterable[pd.DataFrame],
+    out_file: str,
+    datetime_format: str,
+    session_start: str = SESSION_START,
+    schema: Optional[pa.Schema] = None
+) -> Tuple[int, Optional[pd.Timestamp]]:
+    """
+    Process raw Sierra Chart chunks and write each one as a parquet row group.
+    Returns the number of rows written and the last timestamp seen.
+    """
+    writer = None
+    rows = 0
+    last_datetime = None
+
+    try:
+        for chunk in chunks:
+            chunk = _process_sierra_chunk(chunk, datetime_format, session_start)
+
+            # The first chunk fixes the schema (unless given), later chunks are cast to it
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(out_file, schema)
+
+            writer.write_table(table)
+            rows += len(chunk)
+            if len(chunk):
+                last_datetime = chunk['datetime'].iloc[-1]
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return rows, last_datetime
+
+
+def sierra_txt_file_to_pq_chunked(
+    path: str,
+    out_file: str,
+    chunk_size: int = 1_000_000,
+    datetime_format: str = SIERRA_DATETIME_FORMAT,
+    session_start: str = SESSION_START
+) -> int:
+    """
+    Streaming version of sierra_txt_file_to_pq for exports that do not fit in memory.
+
+    The export is read `chunk_size` rows at a time and each chunk is written as a parquet row group,
+    so peak memory is bounded by the chunk size whatever the size of the input.
+    Returns the number of rows written.
+    """
+    with pd.read_csv(path, chunksize=chunk_size) as reader:
+        rows, _ = _write_sierra_chunks(reader, out_file, datetime_format, session_start)
+
+    return rows
+
+
+def sierra_txt_file_to_dataset(
+    path: str,
+    root: str,
+    symbol: str,
+    chunk_size: int = 1_000_000,
+    datetime_format: str = SIERRA_DATETIME_FORMAT,
+    session_start: str = SESSION_START
+) -> int:
+    """
+    Stream a Sierra Chart export into a dataset partitioned by symbol and trading day under `root`.
+    Returns the number of rows written, bars already in the dataset are skipped.
+    """
+    rows = 0
+    with pd.read_csv(path, chunksize=chunk_size) as reader, \
+            PartitionedDatasetWriter(root, symbol, session_start) as writer:
+        for chunk in reader:
+            rows += writer.write(_process_sierra_chunk(chunk, datetime_format, session_start))
+
+    return rows
+
+
+class _ByteRange(io.RawIOBase):
+    """
+    Readable file-like restricted to `length` bytes from the current position of `f`
+    """
+    def __init__(self, f: BinaryIO, length: int):
+        self._f = f
+        self._remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._f.read(min(len(buffer), self._remaining))
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def _complete_lines_end(f: BinaryIO, size: int, block_size: int = 1 << 16) -> int:
+    """
+    Offset right after the last newline of the file, a trailing partial line is left for the next run
+    """
+    position = size
+    while position > 0:
+        start = max(0, position - block_size)
+        f.seek(start)
+        block = f.read(position - start)
+        newline = block.rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        position = start
+
+    return 0
+
+
+def _line_fingerprint(f: BinaryIO, offset: int, block_size: int = 1 << 16) -> str:
+    """
+    Hash of the line ending right before `offset`, a partial line never matches a complete one
+    """
+    position = offset - 1
+    while position > 0:
+        start = max(0, position - block_size)
+        f.seek(start)
+        newline = f.read(position - start).rfind(b'\n')
+        if newline >= 0:
+            position = start + newline + 1
+            break
+        position = start
+
+    f.seek(max(position, 0))
+    return hashlib.blake2b(f.read(offset - max(position, 0)), digest_size=16).hexdigest()
+
+
+def _read_manifest(out_dir: str) -> Optional[Dict[str, Any]]:
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def _write_manifest(out_dir: str, manifest: Dict[str, Any]) -> None:
+    # Write then rename so a crash never leaves a truncated manifest behind
+    tmp_path = os.path.join(out_dir, MANIFEST_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST_FILE))
+
+
+def sierra_txt_file_to_pq_incremental(
+    path: str,
+    out_dir: str,
+    chunk_size: int = 1_000_000,
+    datetime_format: str = SIERRA_DATETIME_FORMAT,
+    session_start: str = SESSION_START
+) -> int:
+    """
+    Incrementally ingest a Sierra Chart export that keeps growing.
+
+    `out_dir` holds numbered parquet parts plus a manifest recording the byte offset, a hash of the
+    line right before it and the last timestamp ingested. Each call only parses the bytes appended since the previous call and writes
+    them as a new part, so reading the directory gives the same frame as a full rebuild.
+    The whole export is rebuilt when its header changed, it shrank or it was rewritten (the bytes
+    before the offset differ, or older bars follow it).
+    Returns the number of rows added.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _read_manifest(out_dir)
+
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+        header = header_line.decode().rstrip('\r\n')
+        end = _complete_lines_end(f, os.fstat(f.fileno()).st_size)
+
+        if manifest is None or _needs_rebuild(f, manifest, header, end, datetime_format, session_start):
+            manifest = _reset_incremental_output(out_dir, header, len(header_line), session_start)
+            manifest['last_line'] = _line_fingerprint(f, manifest['byte_offset'])
+
+        offset = manifest['byte_offset']
+        if end <= offset:
+            return 0
+
+        schema = None
+        if manifest['parts']:
+            schema = pq.read_schema(os.path.join(out_dir, manifest['parts'][0]))
+
+        f.seek(offset)
+        part = PART_FILE_FORMAT.format(len(manifest['parts']))
+        with pd.read_csv(
+            io.BufferedReader(_ByteRange(f, end - offset)),
+            header=None,
+            names=header.split(','),
+            chunksize=chunk_size
+        ) as reader:
+            rows, last_datetime = _write_sierra_chunks(
+                reader, os.path.join(out_dir, part), datetime_format, session_start, schema
+            )
+        last_line = _line_fingerprint(f, end)
+
+    manifest['parts'].append(part)
+    manifest['byte_offset'] = end
+    manifest['last_line'] = last_line
+    manifest['rows'] += rows
+    if last_datetime is not None:
+        manifest['last_datetime'] = str(last_datetime)
+    _write_manifest(out_dir, manifest)
+
+    return rows
+
+
+def _needs_rebuild(
+    f: BinaryIO,
+    manifest: Dict[str, Any],
+    header: str,
+    end: int,
+    datetime_format: str,
+    session_start: str
+) -> bool:
+    """
+    Whether the export was rewritten since the manifest was recorded (rather than appended to),
+    or the previous parts were tagged with different sessions
+    """
+    offset = manifest['byte_offset']
+    if manifest['header'] != header or offset > end or manifest.get('session_start') != session_start:
+        return True
+
+    # The offset must still sit right after the last line ingested, not in the middle of a rewritten one
+    if offset > 0:
+        f.seek(offset - 1)
+        if f.read(1) != b'\n' or manifest.get('last_line') != _line_fingerprint(f, offset):
+            return True
+
+    if offset == end or manifest['last_datetime'] is None:
+        return False
+
+    # Appended bars can never be older than the last one ingested
+    f.seek(offset)
+    try:
+        first_line = pd.read_csv(io.BytesIO(f.readline()), header=None, names=header.split(','))
+        first_datetime = _process_sierra_chunk(first_line, datetime_format)['datetime'].iloc[0]
+    except (ValueError, TypeError, AttributeError):
+        return True
+
+    return first_datetime < pd.Timestamp(manifest['last_datetime'])
+
+
+def _reset_incremental_output(out_dir: str, header: str, header_size: int, session_start: str) -> Dict[str, Any]:
+    """
+    Remove previously written parts and start a manifest for a full rebuild
+    """
+    manifest = _read_manifest(out_dir)
+    if manifest is not None:
+        for part in manifest['parts']:
+            part_path = os.path.join(out_dir, part)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    return {
+        'header': header,
+        'session_start': session_start,
+        'byte_offset': header_size,
+        'last_line': None,
+        'last_datetime': None,
+        'parts': [],
+        'rows': 0,
+    }
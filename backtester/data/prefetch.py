@@ -0,0 +1,148 @@
+"""
+Overlapped loading of bars: the next chunk (parquet row group or day partition) is read and decoded on a
+background thread while the current one is simulated, so a pass over a dataset takes about
+max(I/O, compute) rather than their sum.
+
+    for chunk in prefetch_partitions(root, 'NQ', start_day, end_day):
+        book.update_at_bar(...)  # or evaluate_bracket_orders(chunk, ...)
+
+File reads and Arrow/parquet decoding release the GIL and overlap with the simulation. Pure Python work
+in the loader (e.g. building BarData objects) would not, so chunks are decoded into BarStores.
+"""
+import queue
+import threading
+from contextlib import closing
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Generator, Iterable, Iterator, Optional, TypeVar
+from backtester import instrumentation
+from backtester.data.bar_store import BarStore, PRICE_COLUMNS
+from backtester.data.dataset import list_partitions
+
+T = TypeVar('T')
+
+_DONE = object()
+
+
+class _Failure:
+    __slots__ = ('error',)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(items: Iterable[T], depth: int = 2) -> Iterator[T]:
+    """
+    Iterate `items` while a background thread produces the next ones, at most `depth` ahead, so memory
+    is capped at about depth + 2 items (queued, being produced, being consumed). Errors raised by `items`
+    are raised in the consumer. Closing the iterator early stops the thread after its current item.
+    """
+    if depth < 1:
+        raise ValueError(f"Prefetch depth must be at least 1, got {depth}")
+
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Wait for room in the queue, unless the consumer went away
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as error:
+            put(_Failure(error))
+
+    thread = threading.Thread(target=produce, name='backtester-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            # Time the consumer spends waiting on I/O, near 0 when loading keeps up with the simulation
+            with instrumentation.stage('prefetch.wait'):
+                item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _counted(stores: Generator[BarStore, None, None]) -> Iterator[BarStore]:
+    """
+    Count the bars of each store as it is handed to the consumer, on the consumer thread: the
+    instrumentation recorder is not thread-safe, and chunks read ahead but never consumed are not loaded.
+    Closing this iterator closes `stores`, stopping a prefetch thread.
+    """
+    with closing(stores):
+        for store in stores:
+            instrumentation.count(instrumentation.BARS_LOADED, len(store))
+            yield store
+
+
+def _read_row_groups(file_path: str) -> Iterator[BarStore]:
+    parquet_file = pq.ParquetFile(file_path)
+    names = parquet_file.schema_arrow.names
+    columns = [*PRICE_COLUMNS, 'datetime', *(['day_index'] if 'day_index' in names else [])]
+    for i in range(parquet_file.num_row_groups):
+        yield BarStore.from_arrow(parquet_file.read_row_group(i, columns=columns))
+
+
+def _read_partitions(
+    root: str,
+    symbol: str,
+    start_day: Optional[np.datetime64] = None,
+    end_day: Optional[np.datetime64] = None
+) -> Iterator[BarStore]:
+    for path in list_partitions(root, symbol, start_day, end_day):
+        with pa.OSFile(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+        yield BarStore.from_arrow(table)
+
+
+def iter_row_groups(file_path: str) -> Iterator[BarStore]:
+    """
+    Bars of a processed parquet file, one BarStore per row group
+    """
+    return _counted(_read_row_groups(file_path))
+
+
+def iter_partitions(
+    root: str,
+    symbol: str,
+    start_day: Optional[np.datetime64] = None,
+    end_day: Optional[np.datetime64] = None
+) -> Iterator[BarStore]:
+    """
+    Bars of a dataset partitioned by trading day, one BarStore per day within [start_day, end_day].
+
+    Partitions are read into memory rather than memory-mapped as in read_partition: with a memory map,
+    the pages would only be read when the simulation first touches them, on the consumer thread.
+    """
+    return _counted(_read_partitions(root, symbol, start_day, end_day))
+
+
+def prefetch_row_groups(file_path: str, depth: int = 2) -> Iterator[BarStore]:
+    return _counted(prefetch(_read_row_groups(file_path), depth))
+
+
+def prefetch_partitions(
+    root: str,
+    symbol: str,
+    start_day: Optional[np.datetime64] = None,
+    end_day: Optional[np.datetime64] = None,
+    depth: int = 2
+) -> Iterator[BarStore]:
+    return _counted(prefetch(_read_partitions(root, symbol, start_day, end_day), depth))
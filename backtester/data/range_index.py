@@ -0,0 +1,91 @@
+import numpy as np
+from typing import Tuple
+from backtester.data.bar_store import BarStore
+
+
+def _pyramid(values: np.ndarray, reduce: np.ufunc, pad: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    All levels of a reduction pyramid in one flat array, level k holding the reduction of the aligned
+    blocks [j * 2^k, (j + 1) * 2^k), the last block of a level being partial. Returns (flat, offsets).
+    """
+    levels = [np.asarray(values, dtype=np.float64)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        if len(level) % 2:
+            level = np.r_[level, pad]
+        levels.append(reduce(level[0::2], level[1::2]))
+
+    offsets = np.r_[0, np.cumsum([len(level) for level in levels])[:-1]].astype(np.int64)
+    return np.concatenate(levels), offsets
+
+
+class RangeExtremaIndex:
+    """
+    Block max(high) / min(low) pyramid over the bars, built once per dataset in O(n) time and memory.
+
+    first_crossing finds, for many orders at once, the first bar crossing a price band by ascending
+    the pyramid over clean blocks and descending into the first dirty one: O(log n) steps per order
+    however long the order stays open, instead of one step per bar.
+    """
+    def __init__(self, high: np.ndarray, low: np.ndarray):
+        self.n_bars = len(high)
+        self.high, self.offsets = _pyramid(high, np.maximum, -np.inf)
+        self.low, _ = _pyramid(low, np.minimum, np.inf)
+        self.top = len(self.offsets) - 1
+
+    @classmethod
+    def from_bars(cls, bars: BarStore) -> 'RangeExtremaIndex':
+        return cls(bars.high, bars.low)
+
+    def first_crossing(
+        self,
+        start: np.ndarray,
+        upper: np.ndarray,
+        lower: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        First bar at or after `start` with high >= upper or low <= lower, or -1 if there is none.
+        Also returns the max high and min low over the bars from `start` to that bar included
+        (to the last bar when there is no crossing).
+        """
+        start = np.asarray(start, dtype=np.int64)
+        upper = np.asarray(upper, dtype=np.float64)
+        lower = np.asarray(lower, dtype=np.float64)
+        n_orders = len(start)
+
+        position = start.copy()
+        level = np.zeros(n_orders, dtype=np.int64)
+        high_max = np.full(n_orders, -np.inf)
+        low_min = np.full(n_orders, np.inf)
+        crossing = np.full(n_orders, -1, dtype=np.int64)
+        active = np.flatnonzero(position < self.n_bars)
+
+        while active.size:
+            p, k = position[active], level[active]
+            block = self.offsets[k] + (p >> k)
+            block_high, block_low = self.high[block], self.low[block]
+            clean = (block_high < upper[active]) & (block_low > lower[active])
+
+            # Clean block: fold its extrema in, skip it and go up a level when aligned for it
+            skip = active[clean]
+            high_max[skip] = np.maximum(high_max[skip], block_high[clean])
+            low_min[skip] = np.minimum(low_min[skip], block_low[clean])
+            k_skip = k[clean]
+            position[skip] = p[clean] + (1 << k_skip)
+            ascend = (((position[skip] >> k_skip) & 1) == 0) & (k_skip < self.top)
+            level[skip[ascend]] += 1
+
+            # Dirty block: the crossing is in it, go down a level or stop at a single bar
+            dirty = active[~clean]
+            found = dirty[k[~clean] == 0]
+            level[dirty[k[~clean] > 0]] -= 1
+            crossing[found] = position[found]
+            high_max[found] = np.maximum(high_max[found], self.high[position[found]])
+            low_min[found] = np.minimum(low_min[found], self.low[position[found]])
+
+            done = np.zeros(len(active), dtype=bool)
+            done[np.flatnonzero(clean)] = position[skip] >= self.n_bars
+            done[np.flatnonzero(~clean)] = k[~clean] == 0
+            active = active[~done]
+
+        return crossing, high_max, low_min
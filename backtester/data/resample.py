@@ -0,0 +1,223 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from backtester.const import SESSION_START
+from backtester.data.bar_store import BarStore, PRICE_COLUMNS
+from backtester.data.dataset import read_partition, write_partition
+from backtester.data.feature_cache import DEFAULT_MAX_BYTES, cached_content_hash, evict_lru, feature_key, touch
+from backtester.data.sessions import NS_PER_DAY, session_bounds, session_offset_ns
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+RESAMPLED_DIR = '_resampled'
+KINDS = ('time', 'volume', 'range')
+
+
+@dataclass(frozen=True)
+class ResampledBars:
+    """
+    Coarse bars aggregated from a base series, with the span of base bars of each coarse bar:
+    coarse bar i covers the base bars [bounds[i], bounds[i + 1]).
+    """
+    bars: BarStore
+    bounds: np.ndarray
+    volume: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.bars)
+
+    def base_span(self, index: int) -> Tuple[int, int]:
+        return int(self.bounds[index]), int(self.bounds[index + 1])
+
+    def base_index(self, index: np.ndarray) -> np.ndarray:
+        """
+        First base bar of coarse bars. An order live from coarse bar i is evaluated against the base
+        bars from base_index(i), e.g. evaluate_bracket_orders(base, ..., entry_index=base_index(i)).
+        """
+        return self.bounds[np.asarray(index)]
+
+    def coarse_index(self, base_index: np.ndarray) -> np.ndarray:
+        """Coarse bar holding each base bar"""
+        return np.searchsorted(self.bounds, np.asarray(base_index), side='right') - 1
+
+    def to_arrow(self) -> pa.Table:
+        table = self.bars.to_arrow()
+        table = table.append_column('base_start', pa.array(self.bounds[:-1]))
+        table = table.append_column('base_end', pa.array(self.bounds[1:]))
+        if self.volume is not None:
+            table = table.append_column('volume', pa.array(self.volume))
+        return table
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> 'ResampledBars':
+        start = table.column('base_start').to_numpy()
+        end = table.column('base_end').to_numpy()
+        return cls(
+            bars=BarStore.from_arrow(table),
+            bounds=np.r_[start, end[-1:]].astype(np.int64),
+            volume=table.column('volume').to_numpy() if 'volume' in table.column_names else None
+        )
+
+
+def _aggregate(bars: BarStore, starts: np.ndarray, timestamp: np.ndarray, volume: Optional[np.ndarray]) -> ResampledBars:
+    """
+    OHLC(V) of the runs of base bars beginning at `starts`, in one reduceat per column
+    """
+    bounds = np.r_[starts, len(bars)].astype(np.int64)
+    coarse = BarStore(
+        open=bars.open[starts],
+        high=np.maximum.reduceat(bars.high, starts),
+        low=np.minimum.reduceat(bars.low, starts),
+        last=bars.last[bounds[1:] - 1],
+        timestamp=timestamp,
+        day_index=bars.day_index[starts]
+    )
+    return ResampledBars(
+        bars=coarse,
+        bounds=bounds,
+        volume=np.add.reduceat(volume, starts) if volume is not None else None
+    )
+
+
+def _change_points(*keys: np.ndarray) -> np.ndarray:
+    """Start offsets of the runs of equal keys"""
+    changed = np.zeros(len(keys[0]), dtype=bool)
+    changed[0] = True
+    for key in keys:
+        changed[1:] |= key[1:] != key[:-1]
+    return np.flatnonzero(changed)
+
+
+def resample_time(
+    bars: BarStore,
+    freq: str,
+    volume: Optional[np.ndarray] = None,
+    session_start: str = SESSION_START
+) -> ResampledBars:
+    """
+    Time bars of `freq` (a pandas duration such as '1min', '5min', or 'session'), aligned on the session
+    start and never spanning two sessions. Coarse bars are stamped with the start of their interval.
+    """
+    if not len(bars):
+        raise ValueError("Cannot resample an empty BarStore")
+
+    offset = session_offset_ns(session_start)
+    if freq == 'session':
+        starts = session_bounds(bars.day_index)[:-1]
+        timestamp = bars.day_index[starts].astype(np.int64) * NS_PER_DAY - offset
+        return _aggregate(bars, starts, timestamp, volume)
+
+    step = pd.Timedelta(freq).value
+    bucket = (bars.timestamp + offset) // step
+    starts = _change_points(bucket, bars.day_index)
+    return _aggregate(bars, starts, bucket[starts] * step - offset, volume)
+
+
+def resample_volume(bars: BarStore, volume: np.ndarray, bar_volume: float) -> ResampledBars:
+    """
+    Bars holding `bar_volume` contracts each: a base bar starts a new coarse bar once the volume traded
+    before it in its session reaches a multiple of `bar_volume`. Coarse bars are stamped with their first base bar.
+    """
+    if not len(bars):
+        raise ValueError("Cannot resample an empty BarStore")
+
+    volume = np.asarray(volume)
+    bounds = session_bounds(bars.day_index)
+    cum = np.cumsum(volume, dtype=np.float64)
+    # Volume traded in the session before each bar
+    before_session = np.repeat(np.r_[0., cum[bounds[1:-1] - 1]], np.diff(bounds))
+    traded_before = cum - volume - before_session
+    starts = _change_points(traded_before // bar_volume, bars.day_index)
+    return _aggregate(bars, starts, bars.timestamp[starts], volume)
+
+
+def _range_starts(high: np.ndarray, low: np.ndarray, day_index: np.ndarray, range_size: float, starts: np.ndarray) -> int:
+    """
+    Sequential split of base bars into range bars, writing the start offsets into `starts`.
+    A new range bar begins when adding a bar would make high - low exceed `range_size`, or at a new session.
+    """
+    n_starts = 1
+    starts[0] = 0
+    bar_high = high[0]
+    bar_low = low[0]
+    for i in range(1, len(high)):
+        h = max(bar_high, high[i])
+        l = min(bar_low, low[i])
+        if h - l > range_size or day_index[i] != day_index[i - 1]:
+            starts[n_starts] = i
+            n_starts += 1
+            bar_high = high[i]
+            bar_low = low[i]
+        else:
+            bar_high = h
+            bar_low = l
+
+    return n_starts
+
+
+if HAS_NUMBA:
+    _range_starts = njit(cache=True, nogil=True)(_range_starts)
+
+
+def resample_range(bars: BarStore, range_size: float, volume: Optional[np.ndarray] = None) -> ResampledBars:
+    """
+    Range bars whose high - low does not exceed `range_size` (unless a single base bar does).
+    Each range bar depends on where the previous one ended, so the split is a sequential scan,
+    compiled with Numba when available. Coarse bars are stamped with their first base bar.
+    """
+    if not len(bars):
+        raise ValueError("Cannot resample an empty BarStore")
+
+    starts = np.empty(len(bars), dtype=np.int64)
+    n_starts = _range_starts(bars.high, bars.low, bars.day_index, float(range_size), starts)
+    starts = starts[:n_starts]
+    return _aggregate(bars, starts, bars.timestamp[starts], volume)
+
+
+def resample(bars: BarStore, kind: str, volume: Optional[np.ndarray] = None, **params) -> ResampledBars:
+    if kind == 'time':
+        return resample_time(bars, volume=volume, **params)
+    if kind == 'volume':
+        return resample_volume(bars, volume, **params)
+    if kind == 'range':
+        return resample_range(bars, volume=volume, **params)
+    raise ValueError(f"Unknown resampling {kind!r}, expected one of {KINDS}")
+
+
+def load_resampled(dataset_path: str, kind: str, max_bytes: int = DEFAULT_MAX_BYTES, **params) -> ResampledBars:
+    """
+    Resampled bars of a processed parquet file, cached as a memory-mapped Arrow file in a `_resampled`
+    directory next to it. As in FeatureCache, entries are keyed by the content hash of the source, and
+    the least recently used ones are evicted once the directory grows past `max_bytes`, stale entries
+    of rewritten sources included.
+    """
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(dataset_path)), RESAMPLED_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    key = feature_key(cached_content_hash(cache_dir, dataset_path), kind, params)
+    cache_path = os.path.join(cache_dir, f"{key}.arrow")
+
+    try:
+        table = read_partition(cache_path)
+    except FileNotFoundError:
+        pass
+    else:
+        touch(cache_path)
+        return ResampledBars.from_arrow(table)
+
+    names = pq.read_schema(dataset_path).names
+    columns = [*PRICE_COLUMNS, 'datetime', *(c for c in ('day_index', 'volume') if c in names)]
+    table = pq.read_table(dataset_path, columns=columns)
+    volume = table.column('volume').to_numpy() if 'volume' in names else None
+    resampled = resample(BarStore.from_arrow(table), kind, volume=volume, **params)
+
+    write_partition(resampled.to_arrow(), cache_path)
+    evict_lru(cache_dir, max_bytes, '.arrow', keep=key)
+    return ResampledBars.from_arrow(read_partition(cache_path))
@@ -0,0 +1,38 @@
+import numpy as np
+from backtester.const import SESSION_START
+
+NS_PER_DAY = 86_400_000_000_000
+
+
+def session_offset_ns(session_start: str = SESSION_START) -> int:
+    """
+    Offset to add to a timestamp so that the session start falls on midnight of its trading day
+    """
+    hours, minutes = (int(x) for x in session_start.split(':'))
+    start_ns = (hours * 60 + minutes) * 60_000_000_000
+
+    return (NS_PER_DAY - start_ns) % NS_PER_DAY
+
+
+def trading_day(timestamp: np.ndarray, session_start: str = SESSION_START) -> np.ndarray:
+    """
+    Trading day (datetime64[D]) of int64 nanosecond timestamps
+    """
+    timestamp = np.asarray(timestamp, dtype=np.int64)
+    return ((timestamp + session_offset_ns(session_start)) // NS_PER_DAY).astype('datetime64[D]')
+
+
+def day_index(timestamp: np.ndarray, session_start: str = SESSION_START) -> np.ndarray:
+    """
+    Session id of int64 nanosecond timestamps: the trading day as int32 days since epoch.
+    Stable across files and partitions, and increasing with time.
+    """
+    return trading_day(timestamp, session_start).view(np.int64).astype(np.int32)
+
+
+def session_bounds(day_index: np.ndarray) -> np.ndarray:
+    """
+    Start offsets of each session in a time-ordered day_index array, followed by its length
+    """
+    day_index = np.asarray(day_index)
+    return np.r_[0, np.flatnonzero(day_index[1:] != day_index[:-1]) + 1, len(day_index)]
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+SIERRA_HEADER = "Date, Time, Open, High, Low, Last, Volume, NumberOfTrades, BidVolume, AskVolume"
+
+
+def generate_bars(
+    n: int,
+    seed: int = 0,
+    start: str = "2025-09-15 18:00:00",
+    freq: str = "1s",
+    tick_size: float = 0.25,
+    start_price: float = 24500.
+) -> pd.DataFrame:
+    """
+    Random-walk OHLC bars on a tick grid, in the layout of a processed Sierra Chart export
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(-2, 3, size=n) * tick_size
+    last = start_price + np.cumsum(steps)
+    open_ = np.concatenate([[start_price], last[:-1]])
+    high = np.maximum(open_, last) + rng.integers(0, 3, size=n) * tick_size
+    low = np.minimum(open_, last) - rng.integers(0, 3, size=n) * tick_size
+    volume = rng.integers(1, 100, size=n)
+    bid_volume = rng.integers(0, volume + 1)
+
+    return pd.DataFrame({
+        'open': open_,
+        'high': high,
+        'low': low,
+        'last': last,
+        'volume': volume,
+        'numberoftrades': np.maximum(volume // 3, 1),
+        'bidvolume': bid_volume,
+        'askvolume': volume - bid_volume,
+        'datetime': pd.date_range(start, periods=n, freq=freq),
+    })
+
+
+def write_sierra_txt(df: pd.DataFrame, path: str, chunk_size: int = 1_000_000) -> None:
+    """
+    Write bars as a Sierra Chart text export (the input of sierra_txt_file_to_pq)
+    """
+    with open(path, 'w', newline='\n') as f:
+        f.write(SIERRA_HEADER + '\n')
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            # 'YYYY-MM-DDTHH:MM:SS.fff', formatted in C rather than with a per-row strftime
+            iso = pd.Series(np.datetime_as_string(chunk['datetime'].to_numpy(), unit='ms'), index=chunk.index)
+            out = pd.DataFrame({
+                'date': iso.str[:10].str.replace('-', '/'),
+                'time': ' ' + iso.str[11:],
+                'open': chunk['open'],
+                'high': chunk['high'],
+                'low': chunk['low'],
+                'last': chunk['last'],
+                'volume': chunk['volume'],
+                'numberoftrades': chunk['numberoftrades'],
+                'bidvolume': chunk['bidvolume'],
+                'askvolume': chunk['askvolume'],
+            })
+            out.to_csv(f, header=False, index=False, float_format='%.2f', sep=',', lineterminator='\n')
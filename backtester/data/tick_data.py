@@ -0,0 +1,145 @@
+import os
+import numpy as np
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TIMESTAMP_FILE = 'timestamp.npy'
+PRICE_FILE = 'price.npy'
+VOLUME_FILE = 'volume.npy'
+
+
+@dataclass(frozen=True)
+class TickStore:
+    """
+    Time-ordered trade prices (float64), int64 nanosecond timestamps and optionally trade volumes.
+    Opened from disk, the arrays are memory-mapped and only the pages actually read are loaded.
+    """
+    timestamp: np.ndarray
+    price: np.ndarray
+    volume: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @classmethod
+    def open(cls, directory: str) -> 'TickStore':
+        volume_path = os.path.join(directory, VOLUME_FILE)
+        return cls(
+            timestamp=np.load(os.path.join(directory, TIMESTAMP_FILE), mmap_mode='r'),
+            price=np.load(os.path.join(directory, PRICE_FILE), mmap_mode='r'),
+            volume=np.load(volume_path, mmap_mode='r') if os.path.exists(volume_path) else None
+        )
+
+
+def write_tick_store(source: Union[str, 'pd.DataFrame'], directory: str) -> TickStore:
+    """
+    Write processed Sierra Chart tick data (a parquet file or a dataframe with `last` and `datetime`
+    columns, and `volume` if present) as memory-mappable arrays. Parquet files are streamed one batch at a time.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(directory, exist_ok=True)
+
+    if isinstance(source, pd.DataFrame):
+        np.save(os.path.join(directory, TIMESTAMP_FILE), source['datetime'].to_numpy('datetime64[ns]').view(np.int64))
+        np.save(os.path.join(directory, PRICE_FILE), source['last'].to_numpy(np.float64))
+        if 'volume' in source:
+            np.save(os.path.join(directory, VOLUME_FILE), source['volume'].to_numpy(np.float64))
+        return TickStore.open(directory)
+
+    parquet_file = pq.ParquetFile(source)
+    n = parquet_file.metadata.num_rows
+    timestamp = np.lib.format.open_memmap(os.path.join(directory, TIMESTAMP_FILE), mode='w+', dtype=np.int64, shape=(n,))
+    price = np.lib.format.open_memmap(os.path.join(directory, PRICE_FILE), mode='w+', dtype=np.float64, shape=(n,))
+    has_volume = 'volume' in parquet_file.schema_arrow.names
+    volume = np.lib.format.open_memmap(
+        os.path.join(directory, VOLUME_FILE), mode='w+', dtype=np.float64, shape=(n,)
+    ) if has_volume else None
+
+    position = 0
+    for batch in parquet_file.iter_batches(columns=['last', 'datetime', *(['volume'] if has_volume else [])]):
+        size = batch.num_rows
+        timestamp[position:position + size] = (
+            batch.column('datetime').cast(pa.timestamp('ns')).to_numpy(zero_copy_only=False).view(np.int64)
+        )
+        price[position:position + size] = batch.column('last').to_numpy(zero_copy_only=False)
+        if has_volume:
+            volume[position:position + size] = batch.column('volume').to_numpy(zero_copy_only=False)
+        position += size
+
+    for array in (timestamp, price, volume):
+        if array is not None:
+            array.flush()
+    del timestamp, price, volume
+
+    return TickStore.open(directory)
+
+
+class IntrabarTickIndex:
+    """
+    Maps bars to their span of ticks, bar i holding the ticks in [timestamp[i], next bar timestamp).
+
+    Bars sharing a timestamp (e.g. volume bars completed within the same second) split the ticks of
+    that span by cumulative volume, which needs `bar_volume` and a TickStore with volumes: a tick
+    belongs to the bar during which the volume traded before it falls.
+
+    Offsets are searched lazily and cached per bar, so the cost is proportional to the number of bars
+    actually resolved at tick level, not to the number of ticks.
+    """
+    def __init__(self, ticks: TickStore, bar_timestamp: np.ndarray, bar_volume: Optional[np.ndarray] = None):
+        self.ticks = ticks
+        self.bar_timestamp = np.asarray(bar_timestamp, dtype=np.int64)
+        self.bar_volume = None if bar_volume is None else np.asarray(bar_volume, dtype=np.float64)
+        self._start = np.full(len(self.bar_timestamp), -1, dtype=np.int64)
+        self._end = np.full(len(self.bar_timestamp), -1, dtype=np.int64)
+
+    def offsets(self, bar_index: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Start and end (exclusive) tick offsets of the given bars
+        """
+        bar_index = np.asarray(bar_index, dtype=np.int64)
+        missing = np.unique(bar_index[self._start[bar_index] < 0])
+
+        if missing.size:
+            bar_timestamp, tick_timestamp = self.bar_timestamp, self.ticks.timestamp
+            first = np.searchsorted(bar_timestamp, bar_timestamp[missing], side='left')
+            after = np.searchsorted(bar_timestamp, bar_timestamp[missing], side='right')
+
+            start = np.searchsorted(tick_timestamp, bar_timestamp[missing], side='left')
+            end = np.full(missing.size, len(self.ticks), dtype=np.int64)
+            has_next = after < len(bar_timestamp)
+            end[has_next] = np.searchsorted(tick_timestamp, bar_timestamp[after[has_next]], side='left')
+
+            single = after - first == 1
+            self._start[missing[single]] = start[single]
+            self._end[missing[single]] = end[single]
+            for k in np.flatnonzero(~single):
+                self._split_by_volume(first[k], after[k], start[k], end[k])
+
+        return self._start[bar_index], self._end[bar_index]
+
+    def _split_by_volume(self, first: int, after: int, start: int, end: int) -> None:
+        """
+        Share the ticks in [start, end) between bars first to after - 1, which have the same timestamp
+        """
+        if self.bar_volume is None or self.ticks.volume is None:
+            raise ValueError(
+                f"Bars {first} to {after - 1} share a timestamp, splitting their ticks needs bar and tick volumes"
+            )
+
+        tick_volume = np.asarray(self.ticks.volume[start:end], dtype=np.float64)
+        traded_before = np.cumsum(tick_volume) - tick_volume
+        bar_end = np.cumsum(self.bar_volume[first:after - 1])
+        splits = start + np.searchsorted(traded_before, bar_end, side='left')
+
+        self._start[first:after] = np.concatenate([[start], splits])
+        self._end[first:after] = np.concatenate([splits, [end]])
+
+    def prices(self, bar: int) -> np.ndarray:
+        start, end = self.offsets(np.array([bar]))
+        return self.ticks.price[start[0]:end[0]]
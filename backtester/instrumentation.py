@@ -0,0 +1,158 @@
+"""
+Opt-in counters and stage timings for the backtester.
+
+Instrumentation is off by default: count() and stage() then return right away, so call sites cost a
+function call. Inside `with record() as recorder:` counters and stage timings are collected, and can be
+exported as a flat stats table or a Chrome trace (chrome://tracing, https://ui.perfetto.dev):
+
+    with record() as recorder:
+        run_backtest(bars, strategy)
+    print(recorder.stats())
+    recorder.to_chrome_trace('trace.json')
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Counter names used across the package
+BARS_PROCESSED = 'bars_processed'
+BARS_LOADED = 'bars_loaded'
+ORDERS_CREATED = 'orders_created'
+ORDERS_LIVE = 'orders_live'
+STOP_HITS = 'stop_hits'
+TARGET_HITS = 'target_hits'
+
+
+class Recorder:
+    """
+    Counters, per-stage call counts and durations and, when `trace` is set, one event per stage call
+    """
+    def __init__(self, trace: bool = True, on_stage: Optional[Callable[[str, float], None]] = None):
+        self.trace = trace
+        self.on_stage = on_stage
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.stage_calls: Dict[str, int] = defaultdict(int)
+        self.stage_seconds: Dict[str, float] = defaultdict(float)
+        self.events: List[Dict[str, Any]] = []
+        self._origin_ns = time.perf_counter_ns()
+
+    def add_time(self, name: str, seconds: float, start_ns: Optional[int] = None) -> None:
+        self.stage_calls[name] += 1
+        self.stage_seconds[name] += seconds
+        if self.trace and start_ns is not None:
+            self.events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': (start_ns - self._origin_ns) / 1000,
+                'dur': seconds * 1e6,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            })
+        if self.on_stage is not None:
+            self.on_stage(name, seconds)
+
+    def stats(self) -> 'pd.DataFrame':
+        """
+        One row per counter and per stage: name, kind, count (calls for stages), seconds and mean µs per call
+        """
+        import pandas as pd
+
+        rows = [
+            {'name': name, 'kind': 'counter', 'count': value, 'seconds': float('nan'), 'mean_us': float('nan')}
+            for name, value in sorted(self.counters.items())
+        ]
+        rows += [
+            {'name': name, 'kind': 'stage', 'count': calls, 'seconds': self.stage_seconds[name],
+             'mean_us': 1e6 * self.stage_seconds[name] / calls}
+            for name, calls in sorted(self.stage_calls.items())
+        ]
+        return pd.DataFrame(rows, columns=['name', 'kind', 'count', 'seconds', 'mean_us'])
+
+    def to_chrome_trace(self, path: str) -> None:
+        """
+        Write the stage events, and the final counter values, in the Chrome trace event format
+        """
+        end_us = (time.perf_counter_ns() - self._origin_ns) / 1000
+        counters = [
+            {'name': name, 'ph': 'C', 'ts': end_us, 'pid': os.getpid(), 'args': {name: value}}
+            for name, value in sorted(self.counters.items())
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events + counters, 'displayTimeUnit': 'ms'}, f)
+
+
+_recorder: Optional[Recorder] = None
+
+
+class _Stage:
+    __slots__ = ('recorder', 'name', 'start')
+
+    def __init__(self, recorder: Recorder, name: str):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc) -> None:
+        self.recorder.add_time(self.name, (time.perf_counter_ns() - self.start) / 1e9, self.start)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+def enabled() -> bool:
+    return _recorder is not None
+
+
+def count(name: str, n: int = 1) -> None:
+    if _recorder is not None:
+        _recorder.counters[name] += int(n)
+
+
+def add_time(name: str, seconds: float) -> None:
+    """Record a duration measured elsewhere (e.g. the engine timings) as one call of a stage"""
+    if _recorder is not None:
+        _recorder.add_time(name, seconds)
+
+
+def stage(name: str):
+    """
+    Context manager timing a stage, a shared no-op object when instrumentation is off
+    """
+    if _recorder is None:
+        return _NULL_STAGE
+    return _Stage(_recorder, name)
+
+
+@contextmanager
+def record(trace: bool = True, on_stage: Optional[Callable[[str, float], None]] = None) -> Iterator[Recorder]:
+    """
+    Turn instrumentation on for the duration of the block. `on_stage(name, seconds)` is called after each
+    stage. Recording is process-wide (but not inherited by worker processes) and can be nested,
+    the inner recorder taking over until its block ends.
+    """
+    global _recorder
+    previous = _recorder
+    _recorder = Recorder(trace=trace, on_stage=on_stage)
+    try:
+        yield _recorder
+    finally:
+        _recorder = previous
@@ -1,7 +1,9 @@
 from backtester.order.order_base import Order
 from backtester.order.order_market import MarketOrder
 from backtester.order.order_limit import LimitOrder
+from backtester.order.order_batch import evaluate_bracket_orders
+from backtester.order.order_book import OrderBook
 
-__all__ = ['Order', 'MarketOrder', 'LimitOrder']
+__all__ = ['Order', 'MarketOrder', 'LimitOrder', 'evaluate_bracket_orders', 'OrderBook']
 
 
@@ -0,0 +1,224 @@
+"""
+Compiled kernels running the order state machine (live -> P&L stats -> exit) over a range of bars.
+
+The kernels work on plain arrays and scalars, with enums encoded as small ints (sides as 1/-1,
+order types as order_book.MARKET/LIMIT, level hits as order_batch codes). They are compiled with
+Numba when it is installed (`pip install backtester[numba]`). Without it, simulate_order and
+simulate_orders fall back to the Order classes, with identical results.
+"""
+import math
+import numpy as np
+from typing import Optional
+from backtester import instrumentation
+from backtester.const import LevelHit, OrderSide
+from backtester.data.bar_store import BarStore
+from backtester.order.order_base import Order
+from backtester.order.order_limit import LimitOrder
+from backtester.order.order_market import MarketOrder
+from backtester.order.order_batch import LEVEL_HIT_CATEGORIES, NOHIT_CODE, STOP_CODE, TARGET_CODE, side_to_sign
+from backtester.order.order_book import LIMIT, MARKET
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _run_order(high, low, last, start, end, sign, order_type, is_live, entry, stop, target, quantity,
+               max_pl, min_pl, close_pl, state):
+    """
+    Update one order from bar `start` to bar `end` (exclusive), or until it closes.
+    P&L stats are NaN until the order is live. Writes into `state`:
+    [exit_index (-1 while open), level_hit, exit_price, exit_pl, max_pl, min_pl, close_pl, is_live]
+    """
+    real_best = sign * (target - entry)
+    real_worse = sign * (stop - entry)
+    exit_index = -1
+    level_hit = NOHIT_CODE
+    exit_price = math.nan
+    exit_pl = math.nan
+
+    for i in range(start, end):
+        h = high[i]
+        l = low[i]
+        if not is_live:
+            if order_type == MARKET:
+                is_live = True
+            elif sign == 1:
+                is_live = h > entry
+            else:
+                is_live = l < entry
+            if not is_live:
+                continue
+
+        if sign == 1:
+            best = (h - entry) * quantity
+            worse = (l - entry) * quantity
+            close_pl = (last[i] - entry) * quantity
+        else:
+            best = (entry - l) * quantity
+            worse = (entry - h) * quantity
+            close_pl = (entry - last[i]) * quantity
+
+        best = min(best, real_best)
+        worse = max(worse, real_worse)
+        max_pl = best if math.isnan(max_pl) else max(max_pl, best)
+        min_pl = worse if math.isnan(min_pl) else min(min_pl, worse)
+
+        # Worst case: stop first on LONG, target first on SHORT
+        if sign == 1:
+            if l <= stop:
+                level_hit = STOP_CODE
+            elif h > target:
+                level_hit = TARGET_CODE
+        else:
+            if l < target:
+                level_hit = TARGET_CODE
+            elif h >= stop:
+                level_hit = STOP_CODE
+
+        if level_hit != NOHIT_CODE:
+            exit_index = i
+            exit_price = stop if level_hit == STOP_CODE else target
+            exit_pl = sign * (exit_price - entry)
+            is_live = False
+            break
+
+    state[0] = exit_index
+    state[1] = level_hit
+    state[2] = exit_price
+    state[3] = exit_pl
+    state[4] = max_pl
+    state[5] = min_pl
+    state[6] = close_pl
+    state[7] = 1. if is_live else 0.
+
+
+def _run_orders(high, low, last, sign, order_type, entry, stop, target, quantity, entry_index, out):
+    """
+    Run independent orders, each from its entry bar to the end of the data, one row of `out` per order
+    """
+    n = len(high)
+    for k in range(len(sign)):
+        _run_order(high, low, last, entry_index[k], n, sign[k], order_type[k], order_type[k] == MARKET,
+                   entry[k], stop[k], target[k], quantity[k], math.nan, math.nan, math.nan, out[k])
+
+
+if HAS_NUMBA:
+    _run_order = njit(cache=True, nogil=True)(_run_order)
+    _run_orders = njit(cache=True, nogil=True)(_run_orders)
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+
+def _nan_if_none(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+
+def simulate_order(order: Order, bars: BarStore, start: int = 0, end: Optional[int] = None,
+                   use_kernel: bool = HAS_NUMBA) -> int:
+    """
+    Update a MarketOrder or LimitOrder in place over bars [start, end), as repeated update_at_bar calls
+    would. Returns the index of the exit bar, or -1 if the order is still open.
+    Without Numba, use_kernel=True runs the kernel interpreted (useful to test it, but slow).
+    """
+    end = len(bars) if end is None else end
+    if order.is_closed:
+        return -1
+
+    order.count_placed()
+    if not use_kernel:
+        for i in range(start, end):
+            order.update_at_bar(bars[i])
+            if order.is_closed:
+                return i
+        return -1
+
+    state = np.empty(8)
+    _run_order(bars.high, bars.low, bars.last, start, end, 1 if order.sign == 1 else -1,
+               LIMIT if isinstance(order, LimitOrder) else MARKET, order.is_live, order.entry_price,
+               order.stop_price, order.target_price, order.quantity, _nan_if_none(order.max_open_pl),
+               _nan_if_none(order.min_open_pl), _nan_if_none(order.bar_close_pl), state)
+
+    # Same counts as Order.update_at_bar: a transition to live gives the order P&L stats, then its exit
+    if instrumentation.enabled():
+        if not order.is_live and not math.isnan(state[4]):
+            instrumentation.count(instrumentation.ORDERS_LIVE)
+        if state[1] != NOHIT_CODE:
+            instrumentation.count(instrumentation.STOP_HITS if state[1] == STOP_CODE else instrumentation.TARGET_HITS)
+
+    order.is_live = bool(state[7])
+    order.max_open_pl = _optional(state[4])
+    order.min_open_pl = _optional(state[5])
+    order.bar_close_pl = _optional(state[6])
+    exit_index = int(state[0])
+    if exit_index >= 0:
+        order.is_closed = True
+        order.level_hit = LevelHit(LEVEL_HIT_CATEGORIES[int(state[1])])
+        order.exit_price = float(state[2])
+        order.exit_pl = float(state[3])
+
+    return exit_index
+
+
+def simulate_orders(
+    bars: BarStore,
+    side,
+    order_type,
+    entry_price,
+    stop_price,
+    target_price,
+    entry_index,
+    quantity=1,
+    use_kernel: bool = HAS_NUMBA
+) -> np.ndarray:
+    """
+    Run many independent orders, each from its entry bar until it closes or the data ends.
+
+    Returns an (n, 8) float64 array with one row per order:
+    exit_index (-1 if still open), level_hit code, exit_price, exit_pl, max_open_pl, min_open_pl,
+    bar_close_pl, is_live. P&L stats are NaN for orders that never went live.
+    """
+    sign, order_type, entry, stop, target, entry_index, quantity = np.broadcast_arrays(
+        side_to_sign(side), np.atleast_1d(order_type), entry_price, stop_price, target_price, entry_index, quantity
+    )
+    n_orders = len(sign)
+    out = np.empty((n_orders, 8))
+
+    if use_kernel:
+        _run_orders(bars.high, bars.low, bars.last, np.ascontiguousarray(sign, dtype=np.int64),
+                    np.ascontiguousarray(order_type, dtype=np.int64), np.ascontiguousarray(entry, dtype=np.float64),
+                    np.ascontiguousarray(stop, dtype=np.float64), np.ascontiguousarray(target, dtype=np.float64),
+                    np.ascontiguousarray(quantity, dtype=np.float64), np.ascontiguousarray(entry_index, dtype=np.int64),
+                    out)
+        if instrumentation.enabled():
+            # Same counts as the Order classes: orders that went live have P&L stats
+            instrumentation.count(instrumentation.ORDERS_CREATED, n_orders)
+            instrumentation.count(instrumentation.ORDERS_LIVE, np.count_nonzero(~np.isnan(out[:, 4])))
+            instrumentation.count(instrumentation.STOP_HITS, np.count_nonzero(out[:, 1] == STOP_CODE))
+            instrumentation.count(instrumentation.TARGET_HITS, np.count_nonzero(out[:, 1] == TARGET_CODE))
+        return out
+
+    # Each Order counts its placement, transition to live and exit, as the kernel path above
+    for k in range(n_orders):
+        cls = LimitOrder if order_type[k] == LIMIT else MarketOrder
+        order = cls(side=OrderSide.LONG if sign[k] == 1 else OrderSide.SHORT, stop_price=float(stop[k]),
+                    target_price=float(target[k]), entry_price=float(entry[k]), quantity=quantity[k].item(),
+                    is_live=cls is MarketOrder)
+        exit_index = simulate_order(order, bars, int(entry_index[k]), use_kernel=False)
+
+        out[k] = (
+            exit_index,
+            LEVEL_HIT_CATEGORIES.index(order.level_hit.value) if order.is_closed else NOHIT_CODE,
+            order.exit_price if order.is_closed else math.nan,
+            _nan_if_none(order.exit_pl),
+            _nan_if_none(order.max_open_pl),
+            _nan_if_none(order.min_open_pl),
+            _nan_if_none(order.bar_close_pl),
+            float(order.is_live),
+        )
+
+    return out
@@ -1,18 +1,21 @@
-from pandas import Timestamp
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 from typing import Tuple, Optional, Union
+from backtester import instrumentation
 from backtester.data.bar_data import BarData
 from backtester.const import OrderSide, LevelHit
 
 
-@dataclass
+@dataclass(slots=True)
 class Order(ABC):
     """
     Base class for trading orders.
     
     Orders track their status and P&L statistics. They assume worst-case
     OHLC ordering (non-favorable fills) when updating at each bar.
+
+    An order is counted by the instrumentation once, when it is placed: by a factory or an OrderBook,
+    or else at its first update. Transitions to live and exits are counted as they happen.
     """
     side: OrderSide
     stop_price: float
@@ -32,6 +35,18 @@ class Order(ABC):
     min_open_pl: float = None
     exit_pl: float = None
 
+    # Whether the order was counted as created
+    _placed: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def count_placed(self) -> None:
+        """Count the order as created, and as live if it already is, unless it was counted before"""
+        if self._placed:
+            return
+
+        self._placed = True
+        instrumentation.count(instrumentation.ORDERS_CREATED)
+        if self.is_live:
+            instrumentation.count(instrumentation.ORDERS_LIVE)
 
     @property
     def sign(self) -> int:
@@ -72,6 +87,7 @@ class Order(ABC):
         self.exit_price = exit_price
 
         if level_hit != LevelHit.NOHIT:
+            instrumentation.count(instrumentation.STOP_HITS if level_hit == LevelHit.STOP else instrumentation.TARGET_HITS)
             self.is_closed = True
             self.is_live = False
             sign = 1 if  self.side == OrderSide.LONG else -1
@@ -108,8 +124,13 @@ class Order(ABC):
         if self.is_closed:
             return
 
+        if not self._placed:
+            self.count_placed()
+
         if not self.is_live:
             self._set_live_status_at_bar(bar_data)
+            if self.is_live:
+                instrumentation.count(instrumentation.ORDERS_LIVE)
 
         if self.is_live:
             assert self.entry_price is not None, "When order is live, the entry price must be set"
@@ -0,0 +1,301 @@
+import numpy as np
+from typing import TYPE_CHECKING, Optional, Sequence, Union
+from backtester import instrumentation
+from backtester.const import OrderSide, LevelHit
+from backtester.data.bar_store import BarStore
+from backtester.data.range_index import RangeExtremaIndex
+from backtester.data.tick_data import IntrabarTickIndex
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Integer codes of LevelHit, in the declaration order of the enum
+LEVEL_HIT_CATEGORIES = [level.value for level in LevelHit]
+TARGET_CODE = LEVEL_HIT_CATEGORIES.index(LevelHit.TARGET.value)
+STOP_CODE = LEVEL_HIT_CATEGORIES.index(LevelHit.STOP.value)
+NOHIT_CODE = LEVEL_HIT_CATEGORIES.index(LevelHit.NOHIT.value)
+
+ArrayLike = Union[np.ndarray, Sequence, float, int]
+
+
+def side_to_sign(side: ArrayLike) -> np.ndarray:
+    """
+    Encode order sides as int8 signs: 1 for LONG, -1 for SHORT.
+    Accepts OrderSide members, their string values or already encoded signs.
+    """
+    side = np.atleast_1d(np.asarray(side))
+    if side.dtype.kind in 'iuf':
+        sign = side.astype(np.int8)
+        if not np.isin(sign, (1, -1)).all():
+            raise ValueError("Numeric sides must be encoded as 1 (LONG) or -1 (SHORT)")
+        return sign
+
+    return np.array([1 if OrderSide(s) == OrderSide.LONG else -1 for s in side], dtype=np.int8)
+
+
+def evaluate_bracket_orders(
+    bars: BarStore,
+    side: ArrayLike,
+    entry_price: ArrayLike,
+    stop_price: ArrayLike,
+    target_price: ArrayLike,
+    entry_index: ArrayLike,
+    quantity: ArrayLike = 1,
+    max_cells: int = 1 << 22,
+    intrabar: Optional[IntrabarTickIndex] = None,
+    range_index: Optional[RangeExtremaIndex] = None
+) -> 'pd.DataFrame':
+    """
+    Evaluate many bracket orders at once against the bar arrays.
+
+    Each order is live from `entry_index` on (the first bar it would be passed to Order.update_at_bar)
+    and is closed at the first bar crossing its stop or target, with the same worst-case rule as the
+    scalar Order path: stop first on LONG, target first on SHORT.
+
+    All pending orders are scanned together over windows of bars, the window grows while orders stay
+    open and the window matrix never exceeds `max_cells` elements. With a `range_index` built once
+    over the same bars, each order jumps straight to its exit bar in O(log n) steps instead, which pays
+    off when brackets are wide and orders stay open for many bars.
+
+    With an `intrabar` tick index, exit bars where both the stop and the target are touched are replayed
+    tick by tick instead of applying the worst-case rule, other bars stay on the OHLC path.
+    Returns one row per order, in input order.
+    """
+    sign = side_to_sign(side)
+    n_orders, = np.broadcast_shapes(
+        sign.shape,
+        *(np.shape(x) for x in (entry_price, stop_price, target_price, entry_index, quantity))
+    )
+    sign = np.broadcast_to(sign, (n_orders,))
+    entry, stop, target, quantity = (
+        np.broadcast_to(np.asarray(x, dtype=np.float64), (n_orders,))
+        for x in (entry_price, stop_price, target_price, quantity)
+    )
+    entry_index = np.broadcast_to(np.asarray(entry_index, dtype=np.int64), (n_orders,))
+
+    n_bars = len(bars)
+    if ((entry_index < 0) | (entry_index >= n_bars)).any():
+        raise ValueError(f"Entry indices must be within [0, {n_bars})")
+
+    is_long = sign == 1
+    with instrumentation.stage('orders.batch'):
+        if range_index is not None:
+            level_hit, exit_index, high_max, low_min = _scan_with_range_index(
+                bars, range_index, is_long, stop, target, entry_index
+            )
+        else:
+            level_hit, exit_index, high_max, low_min = _scan_windows(
+                bars, is_long, stop, target, entry_index, max_cells
+            )
+
+    if intrabar is not None:
+        with instrumentation.stage('orders.intrabar'):
+            _resolve_intrabar(bars, intrabar, is_long, stop, target, entry_index,
+                              level_hit, exit_index, high_max, low_min)
+
+    if instrumentation.enabled():
+        # Market orders, live from their entry bar
+        instrumentation.count(instrumentation.ORDERS_CREATED, n_orders)
+        instrumentation.count(instrumentation.ORDERS_LIVE, n_orders)
+        instrumentation.count(instrumentation.STOP_HITS, np.count_nonzero(level_hit == STOP_CODE))
+        instrumentation.count(instrumentation.TARGET_HITS, np.count_nonzero(level_hit == TARGET_CODE))
+
+    return _order_outcomes(sign, entry, stop, target, quantity, entry_index,
+                           level_hit, exit_index, high_max, low_min)
+
+
+def _exit_levels(
+    bars: BarStore,
+    is_long: np.ndarray,
+    stop: np.ndarray,
+    target: np.ndarray,
+    exit_index: np.ndarray
+) -> np.ndarray:
+    """
+    Level hit at the exit bar of each order (-1 when still open), with the worst-case rule
+    """
+    level_hit = np.full(len(exit_index), NOHIT_CODE, dtype=np.int8)
+    closed = np.flatnonzero(exit_index >= 0)
+    high, low = bars.high[exit_index[closed]], bars.low[exit_index[closed]]
+    long = is_long[closed]
+    stop_hit = np.where(long, low <= stop[closed], high >= stop[closed])
+    target_hit = np.where(long, high > target[closed], low < target[closed])
+    level_hit[closed] = np.where(
+        long,
+        np.where(stop_hit, STOP_CODE, TARGET_CODE),
+        np.where(target_hit, TARGET_CODE, STOP_CODE)
+    )
+    return level_hit
+
+
+def _scan_with_range_index(
+    bars: BarStore,
+    range_index: RangeExtremaIndex,
+    is_long: np.ndarray,
+    stop: np.ndarray,
+    target: np.ndarray,
+    entry_index: np.ndarray
+):
+    if range_index.n_bars != len(bars):
+        raise ValueError("The range index was not built over these bars")
+
+    # Both levels as an inclusive band: strict crossings are moved to the next float
+    upper = np.where(is_long, np.nextafter(target, np.inf), stop)
+    lower = np.where(is_long, stop, np.nextafter(target, -np.inf))
+    exit_index, high_max, low_min = range_index.first_crossing(entry_index, upper, lower)
+
+    return _exit_levels(bars, is_long, stop, target, exit_index), exit_index, high_max, low_min
+
+
+def _scan_windows(
+    bars: BarStore,
+    is_long: np.ndarray,
+    stop: np.ndarray,
+    target: np.ndarray,
+    entry_index: np.ndarray,
+    max_cells: int
+):
+    n_bars = len(bars)
+    n_orders = len(is_long)
+    level_hit = np.full(n_orders, NOHIT_CODE, dtype=np.int8)
+    exit_index = np.full(n_orders, -1, dtype=np.int64)
+    high_max = np.full(n_orders, -np.inf)
+    low_min = np.full(n_orders, np.inf)
+
+    position = entry_index.copy()
+    pending = np.arange(n_orders)
+    window = 16
+
+    while pending.size:
+        window = max(1, min(window, max_cells // pending.size))
+        columns = position[pending, None] + np.arange(window)
+        in_range = columns < n_bars
+        columns = np.minimum(columns, n_bars - 1)
+        high = bars.high[columns]
+        low = bars.low[columns]
+
+        long = is_long[pending, None]
+        stop_hit = np.where(long, low <= stop[pending, None], high >= stop[pending, None]) & in_range
+        target_hit = np.where(long, high > target[pending, None], low < target[pending, None]) & in_range
+        any_hit = stop_hit | target_hit
+
+        has_hit = any_hit.any(axis=1)
+        first = np.where(has_hit, any_hit.argmax(axis=1), window)
+
+        # Extrema over the bars the order was live on, up to and including the exit bar
+        seen = (np.arange(window) <= first[:, None]) & in_range
+        high_max[pending] = np.maximum(high_max[pending], np.where(seen, high, -np.inf).max(axis=1))
+        low_min[pending] = np.minimum(low_min[pending], np.where(seen, low, np.inf).min(axis=1))
+
+        hit_rows = np.flatnonzero(has_hit)
+        hit_orders = pending[hit_rows]
+        hit_first = first[hit_rows]
+        stop_first = stop_hit[hit_rows, hit_first]
+        target_first = target_hit[hit_rows, hit_first]
+        level_hit[hit_orders] = np.where(
+            is_long[hit_orders],
+            np.where(stop_first, STOP_CODE, TARGET_CODE),
+            np.where(target_first, TARGET_CODE, STOP_CODE)
+        )
+        exit_index[hit_orders] = position[hit_orders] + hit_first
+
+        position[pending] += window
+        pending = pending[~has_hit & (position[pending] < n_bars)]
+        window *= 2
+
+    return level_hit, exit_index, high_max, low_min
+
+
+def _resolve_intrabar(
+    bars: BarStore,
+    intrabar: IntrabarTickIndex,
+    is_long: np.ndarray,
+    stop: np.ndarray,
+    target: np.ndarray,
+    entry_index: np.ndarray,
+    level_hit: np.ndarray,
+    exit_index: np.ndarray,
+    high_max: np.ndarray,
+    low_min: np.ndarray
+) -> None:
+    """
+    Replay the ticks of exit bars touching both levels, updating exit levels and extrema in place.
+    Bars without ticks reaching either level keep their worst-case outcome.
+    """
+    closed = np.flatnonzero(exit_index >= 0)
+    x = exit_index[closed]
+    high, low = bars.high[x], bars.low[x]
+    both_touched = np.where(
+        is_long[closed],
+        (low <= stop[closed]) & (high > target[closed]),
+        (low < target[closed]) & (high >= stop[closed])
+    )
+    ambiguous = closed[both_touched]
+    if not ambiguous.size:
+        return
+
+    starts, ends = intrabar.offsets(exit_index[ambiguous])
+    for i, start, end in zip(ambiguous, starts, ends):
+        prices = np.asarray(intrabar.ticks.price[start:end])
+        if is_long[i]:
+            stop_ticks, target_ticks = prices <= stop[i], prices > target[i]
+        else:
+            stop_ticks, target_ticks = prices >= stop[i], prices < target[i]
+
+        hits = stop_ticks | target_ticks
+        if not hits.any():
+            continue
+
+        k = int(hits.argmax())
+        level_hit[i] = STOP_CODE if stop_ticks[k] else TARGET_CODE
+
+        # Extrema of the bars before the exit bar, then of the ticks up to the exit tick
+        first, last = entry_index[i], exit_index[i]
+        high_max[i] = prices[:k + 1].max()
+        low_min[i] = prices[:k + 1].min()
+        if last > first:
+            high_max[i] = max(high_max[i], bars.high[first:last].max())
+            low_min[i] = min(low_min[i], bars.low[first:last].min())
+
+
+def _order_outcomes(
+    sign: np.ndarray,
+    entry: np.ndarray,
+    stop: np.ndarray,
+    target: np.ndarray,
+    quantity: np.ndarray,
+    entry_index: np.ndarray,
+    level_hit: np.ndarray,
+    exit_index: np.ndarray,
+    high_max: np.ndarray,
+    low_min: np.ndarray
+) -> 'pd.DataFrame':
+    """
+    Turn per-order extrema and exit levels into the P&L columns of the scalar Order path
+    """
+    import pandas as pd
+
+    is_long = sign == 1
+    best = np.where(is_long, (high_max - entry) * quantity, (entry - low_min) * quantity)
+    worse = np.where(is_long, (low_min - entry) * quantity, (entry - high_max) * quantity)
+
+    # Target-aware stats, the best and worse P&L can never exceed the ones defined by the target and stop
+    real_best = sign * (target - entry)
+    real_worse = sign * (stop - entry)
+
+    exit_price = np.select(
+        [level_hit == STOP_CODE, level_hit == TARGET_CODE],
+        [stop, target],
+        np.nan
+    )
+
+    return pd.DataFrame({
+        'entry_index': entry_index,
+        'exit_index': exit_index,
+        'level_hit': pd.Categorical.from_codes(level_hit, categories=LEVEL_HIT_CATEGORIES),
+        'exit_price': exit_price,
+        'exit_pl': sign * (exit_price - entry),
+        'quantity': quantity,
+        'max_open_pl': np.minimum(best, real_best),
+        'min_open_pl': np.maximum(worse, real_worse),
+    })
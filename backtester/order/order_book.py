@@ -0,0 +1,424 @@
+import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+from backtester import instrumentation
+from backtester.const import OrderSide, LevelHit
+from backtester.data.bar_data import BarData
+from backtester.order.order_base import Order
+from backtester.order.order_market import MarketOrder
+from backtester.order.order_limit import LimitOrder
+from backtester.order.order_batch import (
+    LEVEL_HIT_CATEGORIES, NOHIT_CODE, STOP_CODE, TARGET_CODE, side_to_sign
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MARKET = 0
+LIMIT = 1
+
+# Books with up to this many open orders are updated by a scalar loop, the vectorized update costs
+# about 30 NumPy calls per bar whatever the number of orders
+SCALAR_UPDATE_MAX_ORDERS = 32
+
+_OPEN_COLUMNS = {
+    'order_id': np.int64,
+    'order_type': np.int8,
+    'side': np.int8,
+    'entry_price': np.float64,
+    'stop_price': np.float64,
+    'target_price': np.float64,
+    'quantity': np.float64,
+    'slippage': np.float64,
+    'is_live': np.bool_,
+    'bar_close_pl': np.float64,
+    'max_open_pl': np.float64,
+    'min_open_pl': np.float64,
+}
+
+# Columns read by the scalar update, in the order it unpacks them
+_SCALAR_COLUMNS = (
+    'order_type', 'side', 'entry_price', 'stop_price', 'target_price', 'quantity', 'slippage', 'is_live',
+    'bar_close_pl', 'max_open_pl', 'min_open_pl',
+)
+
+_FILL_COLUMNS = {
+    'order_id': np.int64,
+    'order_type': np.int8,
+    'side': np.int8,
+    'entry_price': np.float64,
+    'stop_price': np.float64,
+    'target_price': np.float64,
+    'quantity': np.float64,
+    'level_hit': np.int8,
+    'exit_price': np.float64,
+    'exit_pl': np.float64,
+    'bar_close_pl': np.float64,
+    'max_open_pl': np.float64,
+    'min_open_pl': np.float64,
+    'exit_index': np.int64,
+    'exit_time': np.int64,
+}
+
+
+class OrderBook:
+    """
+    Struct-of-arrays container for market and limit orders.
+
+    Open orders live in contiguous arrays and are updated all together at each bar, with the same
+    rules as Order.update_at_bar. Market orders added without an entry price fill at the open of the
+    next bar plus slippage, as MarketOrder.create_at_bar. Closed orders are retired into a compact
+    columnar fills log.
+
+    With at most `scalar_max_orders` open orders, a bar is processed by a plain loop over the arrays,
+    whose cost is proportional to the number of orders, rather than by the vectorized update.
+    Per-order objects can still be materialized with get_order, for debugging.
+    """
+    def __init__(self, capacity: int = 1024, scalar_max_orders: int = SCALAR_UPDATE_MAX_ORDERS):
+        self._open = {name: np.empty(capacity, dtype=dtype) for name, dtype in _OPEN_COLUMNS.items()}
+        self.scalar_max_orders = scalar_max_orders
+        self._size = 0
+        # Views of the open orders, rebuilt only when the number of open orders changes
+        self._views: Dict[str, np.ndarray] = {}
+        self._views_size = -1
+        self._set_scalar_columns()
+        self._n_pending = 0
+        self._next_id = 0
+        self._fill_chunks: Dict[str, List[np.ndarray]] = {name: [] for name in _FILL_COLUMNS}
+        # Running P&L of the closed orders, exit_pl times quantity
+        self.closed_pl = 0.
+
+    def __len__(self) -> int:
+        """Number of open orders"""
+        return self._size
+
+    @property
+    def open_quantity(self) -> float:
+        """Contracts of the open orders, pending limit orders included"""
+        return float(self._open['quantity'][:self._size].sum())
+
+    @property
+    def open_pl(self) -> float:
+        """P&L of the live orders at the close of the last bar, orders placed since then count for 0"""
+        return float(np.nansum(self._open['bar_close_pl'][:self._size]))
+
+    def add(
+        self,
+        side: Union[OrderSide, int],
+        stop_price: float,
+        target_price: float,
+        entry_price: float = np.nan,
+        quantity: int = 1,
+        order_type: int = MARKET,
+        slippage: float = 0.
+    ) -> int:
+        """
+        Add an order and return its id. Market orders without an entry price fill at the open of the
+        next bar, plus slippage for LONG and minus for SHORT, and are live from that bar. Market orders
+        with an entry price are live immediately, limit orders once touched.
+        """
+        if order_type == LIMIT and np.isnan(entry_price):
+            raise ValueError("Limit orders need an entry price")
+
+        order_id = self._insert(side, stop_price, target_price, entry_price, quantity, order_type, slippage)
+        instrumentation.count(instrumentation.ORDERS_CREATED)
+        if order_type == MARKET and not np.isnan(entry_price):
+            instrumentation.count(instrumentation.ORDERS_LIVE)
+        return order_id
+
+    def _insert(
+        self,
+        side: Union[OrderSide, int],
+        stop_price: float,
+        target_price: float,
+        entry_price: float,
+        quantity: int,
+        order_type: int,
+        slippage: float = 0.
+    ) -> int:
+        if self._size == len(self._open['order_id']):
+            self._grow()
+
+        i = self._size
+        order_id = self._next_id
+        row = self._open
+        row['order_id'][i] = order_id
+        row['order_type'][i] = order_type
+        row['side'][i] = side_to_sign(side)[0]
+        row['entry_price'][i] = entry_price
+        row['stop_price'][i] = stop_price
+        row['target_price'][i] = target_price
+        row['quantity'][i] = quantity
+        row['slippage'][i] = slippage
+        pending = order_type == MARKET and np.isnan(entry_price)
+        row['is_live'][i] = order_type == MARKET and not pending
+        row['bar_close_pl'][i] = np.nan
+        row['max_open_pl'][i] = np.nan
+        row['min_open_pl'][i] = np.nan
+
+        self._size += 1
+        self._n_pending += pending
+        self._next_id += 1
+        return order_id
+
+    def add_order(self, order: Order) -> int:
+        """
+        Add an open MarketOrder or LimitOrder object, its current state is copied into the book.
+        The order is counted as created unless it was already (see Order.count_placed).
+        """
+        if isinstance(order, MarketOrder):
+            order_type = MARKET
+        elif isinstance(order, LimitOrder):
+            order_type = LIMIT
+        else:
+            raise TypeError(f"Only MarketOrder and LimitOrder can be held in an OrderBook, got {type(order).__name__}")
+
+        if order.is_closed:
+            raise ValueError("Cannot add a closed order to the book")
+
+        order.count_placed()
+        order_id = self._insert(order.side, order.stop_price, order.target_price, order.entry_price,
+                                order.quantity, order_type)
+        i = self._size - 1
+        self._open['is_live'][i] = order.is_live
+        for name in ('bar_close_pl', 'max_open_pl', 'min_open_pl'):
+            value = getattr(order, name)
+            self._open[name][i] = np.nan if value is None else value
+
+        return order_id
+
+    def _grow(self) -> None:
+        capacity = max(1, 2 * len(self._open['order_id']))
+        for name, array in self._open.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._open[name] = grown
+        self._views_size = -1
+        self._set_scalar_columns()
+
+    def _set_scalar_columns(self) -> None:
+        self._scalar_columns = tuple(self._open[name] for name in _SCALAR_COLUMNS)
+
+    def _open_views(self) -> Dict[str, np.ndarray]:
+        n = self._size
+        if self._views_size != n:
+            self._views = {name: array[:n] for name, array in self._open.items()}
+            self._views_size = n
+        return self._views
+
+    def update_at_bar(self, bar_data: BarData) -> None:
+        """
+        Update all open orders at a new bar and retire the ones that closed
+        """
+        n = self._size
+        if n == 0:
+            return
+        if n <= self.scalar_max_orders:
+            self._update_scalar(bar_data)
+            return
+
+        o = self._open_views()
+        high, low, last = bar_data.high, bar_data.low, bar_data.last
+        is_long = o['side'] == 1
+        entry = o['entry_price']
+
+        # Market orders placed at the previous bar fill at the open of this one
+        filled = np.zeros(n, dtype=bool)
+        if self._n_pending:
+            filled = (o['order_type'] == MARKET) & np.isnan(entry)
+            entry[filled] = bar_data.open + o['side'][filled] * o['slippage'][filled]
+            self._n_pending = 0
+
+        # Live status: market orders are live once filled, limit orders once their price is crossed
+        touched = np.where(is_long, high > entry, low < entry)
+        live = o['is_live'] | filled | ((o['order_type'] == LIMIT) & touched)
+        if instrumentation.enabled():
+            instrumentation.count(instrumentation.ORDERS_LIVE, np.count_nonzero(live & ~o['is_live']))
+        o['is_live'][:] = live
+
+        # Target-aware P&L stats, computed as in Order._set_pl_stats
+        quantity = o['quantity']
+        best = np.where(is_long, (high - entry) * quantity, (entry - low) * quantity)
+        worse = np.where(is_long, (low - entry) * quantity, (entry - high) * quantity)
+        close = np.where(is_long, (last - entry) * quantity, (entry - last) * quantity)
+        best = np.minimum(best, o['side'] * (o['target_price'] - entry))
+        worse = np.maximum(worse, o['side'] * (o['stop_price'] - entry))
+
+        o['bar_close_pl'][:] = np.where(live, close, o['bar_close_pl'])
+        o['max_open_pl'][:] = np.where(live, np.fmax(o['max_open_pl'], best), o['max_open_pl'])
+        o['min_open_pl'][:] = np.where(live, np.fmin(o['min_open_pl'], worse), o['min_open_pl'])
+
+        # Exit status, stop first on LONG and target first on SHORT
+        stop_hit = np.where(is_long, low <= o['stop_price'], high >= o['stop_price'])
+        target_hit = np.where(is_long, high > o['target_price'], low < o['target_price'])
+        level_hit = np.where(
+            is_long,
+            np.where(stop_hit, STOP_CODE, np.where(target_hit, TARGET_CODE, NOHIT_CODE)),
+            np.where(target_hit, TARGET_CODE, np.where(stop_hit, STOP_CODE, NOHIT_CODE))
+        )
+        closed = live & (level_hit != NOHIT_CODE)
+
+        if closed.any():
+            self._retire(o, closed, level_hit, bar_data)
+
+    def _update_scalar(self, bar_data: BarData) -> None:
+        """
+        Same update as update_at_bar, one order at a time on Python floats
+        """
+        n = self._size
+        order_type, side, entry_price, stop_price, target_price, quantity, slippage, is_live, bar_close_pl, \
+            max_open_pl, min_open_pl = self._scalar_columns
+        high, low, last = float(bar_data.high), float(bar_data.low), float(bar_data.last)
+        fill_pending = self._n_pending > 0
+        self._n_pending = 0
+        went_live = 0
+        closed = None
+
+        for i in range(n):
+            sign = side.item(i)
+            entry = entry_price.item(i)
+            if not is_live.item(i):
+                if order_type.item(i) == MARKET:
+                    # Market orders placed at the previous bar fill at the open of this one
+                    if not (fill_pending and entry != entry):
+                        continue
+                    entry = float(bar_data.open) + sign * slippage.item(i)
+                    entry_price[i] = entry
+                elif not (high > entry if sign == 1 else low < entry):
+                    continue
+                is_live[i] = True
+                went_live += 1
+
+            q = quantity.item(i)
+            stop, target = stop_price.item(i), target_price.item(i)
+            if sign == 1:
+                best, worse, close = (high - entry) * q, (low - entry) * q, (last - entry) * q
+            else:
+                best, worse, close = (entry - low) * q, (entry - high) * q, (entry - last) * q
+            best = min(best, sign * (target - entry))
+            worse = max(worse, sign * (stop - entry))
+
+            bar_close_pl[i] = close
+            previous = max_open_pl.item(i)
+            max_open_pl[i] = best if previous != previous else max(previous, best)
+            previous = min_open_pl.item(i)
+            min_open_pl[i] = worse if previous != previous else min(previous, worse)
+
+            # Exit status, stop first on LONG and target first on SHORT
+            if sign == 1:
+                level_hit = STOP_CODE if low <= stop else TARGET_CODE if high > target else NOHIT_CODE
+            else:
+                level_hit = TARGET_CODE if low < target else STOP_CODE if high >= stop else NOHIT_CODE
+            if level_hit != NOHIT_CODE:
+                if closed is None:
+                    closed = np.full(n, NOHIT_CODE, dtype=np.int8)
+                closed[i] = level_hit
+
+        if went_live and instrumentation.enabled():
+            instrumentation.count(instrumentation.ORDERS_LIVE, went_live)
+        if closed is not None:
+            self._retire(self._open_views(), closed != NOHIT_CODE, closed, bar_data)
+
+    def _retire(self, o: Dict[str, np.ndarray], closed: np.ndarray, level_hit: np.ndarray, bar_data: BarData) -> None:
+        level_hit = level_hit[closed]
+        entry = o['entry_price'][closed]
+        if instrumentation.enabled():
+            instrumentation.count(instrumentation.STOP_HITS, np.count_nonzero(level_hit == STOP_CODE))
+            instrumentation.count(instrumentation.TARGET_HITS, np.count_nonzero(level_hit == TARGET_CODE))
+        exit_price = np.where(level_hit == STOP_CODE, o['stop_price'][closed], o['target_price'][closed])
+        n_closed = len(level_hit)
+
+        fills = {name: o[name][closed] for name in _FILL_COLUMNS if name in o}
+        fills['level_hit'] = level_hit.astype(np.int8)
+        fills['exit_price'] = exit_price
+        fills['exit_pl'] = fills['side'] * (exit_price - entry)
+        self.closed_pl += float(np.dot(fills['exit_pl'], fills['quantity']))
+        fills['exit_index'] = np.full(n_closed, getattr(bar_data, 'index', -1), dtype=np.int64)
+        fills['exit_time'] = np.full(n_closed, _timestamp_ns(bar_data), dtype=np.int64)
+        for name, values in fills.items():
+            self._fill_chunks[name].append(values)
+
+        # Compact the open orders, keeping their relative order
+        keep = ~closed
+        k = int(keep.sum())
+        for name, array in o.items():
+            array[:k] = array[keep]
+        self._size = k
+
+    @property
+    def open_orders(self) -> 'pd.DataFrame':
+        import pandas as pd
+
+        return pd.DataFrame({name: array[:self._size].copy() for name, array in self._open.items()})
+
+    @property
+    def fills(self) -> 'pd.DataFrame':
+        """
+        Log of the closed orders, in closing order
+        """
+        import pandas as pd
+
+        columns = {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtype=_FILL_COLUMNS[name])
+            for name, chunks in self._fill_chunks.items()
+        }
+        # Collapse the chunks so the log stays a handful of arrays however many bars were processed
+        self._fill_chunks = {name: [values] for name, values in columns.items()}
+
+        df = pd.DataFrame(columns)
+        df['level_hit'] = pd.Categorical.from_codes(df['level_hit'], categories=LEVEL_HIT_CATEGORIES)
+        return df
+
+    def get_order(self, order_id: int) -> Order:
+        """
+        Materialize an order (open or closed) as a MarketOrder or LimitOrder snapshot, for debugging
+        """
+        slot = np.flatnonzero(self._open['order_id'][:self._size] == order_id)
+        if slot.size:
+            row = {name: array[slot[0]] for name, array in self._open.items()}
+            return _to_order(row, is_closed=False)
+
+        fills = self.fills
+        match = fills.index[fills['order_id'] == order_id]
+        if not match.size:
+            raise KeyError(f"Unknown order id {order_id}")
+
+        row = fills.loc[match[0]].to_dict()
+        row['level_hit'] = LEVEL_HIT_CATEGORIES.index(row['level_hit'])
+        return _to_order(row, is_closed=True)
+
+
+def _timestamp_ns(bar_data: BarData) -> int:
+    # Bar views carry their int64 timestamp, BarData objects a pandas Timestamp
+    timestamp = getattr(bar_data, 'timestamp', None)
+    if timestamp is not None:
+        return timestamp
+
+    import pandas as pd
+    return pd.Timestamp(bar_data.datetime).value
+
+
+def _to_order(row: dict, is_closed: bool) -> Order:
+    def optional(value: float) -> Optional[float]:
+        return None if np.isnan(value) else float(value)
+
+    cls = LimitOrder if row['order_type'] == LIMIT else MarketOrder
+    order = cls(
+        side=OrderSide.LONG if row['side'] == 1 else OrderSide.SHORT,
+        stop_price=float(row['stop_price']),
+        target_price=float(row['target_price']),
+        entry_price=optional(row['entry_price']),
+        quantity=int(row['quantity']),
+        is_closed=is_closed,
+        is_live=bool(row.get('is_live', False)),
+        bar_close_pl=optional(row['bar_close_pl']),
+        max_open_pl=optional(row['max_open_pl']),
+        min_open_pl=optional(row['min_open_pl']),
+    )
+    # Snapshots of orders already counted by the book
+    order._placed = True
+    if is_closed:
+        order.level_hit = LevelHit(LEVEL_HIT_CATEGORIES[row['level_hit']])
+        order.exit_price = float(row['exit_price'])
+        order.exit_pl = float(row['exit_pl'])
+
+    return order
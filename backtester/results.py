@@ -0,0 +1,280 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Sequence
+from backtester.const import LevelHit, SESSION_START
+from backtester.data.sessions import day_index
+from backtester.order.order_base import Order
+from backtester.order.order_batch import LEVEL_HIT_CATEGORIES
+
+FILL_COLUMNS = {
+    'side': np.int8,
+    'entry_price': np.float64,
+    'exit_price': np.float64,
+    'exit_pl': np.float64,
+    'quantity': np.float64,
+    'max_open_pl': np.float64,
+    'min_open_pl': np.float64,
+    'level_hit': np.int8,
+    'exit_index': np.int64,
+    'exit_time': np.int64,
+}
+
+METRIC_COLUMNS = [
+    'trades', 'wins', 'losses', 'win_rate', 'total_pl', 'expectancy', 'avg_win', 'avg_loss',
+    'profit_factor', 'max_drawdown', 'mfe_mean', 'mae_mean',
+]
+
+# Columns identifying the configuration of a sweep, in order of preference
+CONFIG_COLUMNS = ('config_hash', 'config_id')
+
+
+def _to_frame(columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+    df = pd.DataFrame(columns)
+    df['level_hit'] = pd.Categorical.from_codes(df['level_hit'], categories=LEVEL_HIT_CATEGORIES)
+    return df
+
+
+def fills_from_orders(
+    orders: Iterable[Order],
+    exit_index: Optional[Sequence[int]] = None,
+    exit_time: Optional[Sequence[int]] = None
+) -> pd.DataFrame:
+    """
+    Typed fills table of closed Order objects: side as int8, level_hit as categorical, timestamps as int64.
+    Exit bars and times are not kept by the orders and default to -1.
+    """
+    closed = [order for order in orders if order.is_closed]
+    n = len(closed)
+    columns = {
+        'side': np.fromiter((order.sign for order in closed), np.int8, n),
+        'entry_price': np.fromiter((order.entry_price for order in closed), np.float64, n),
+        'exit_price': np.fromiter((order.exit_price for order in closed), np.float64, n),
+        'exit_pl': np.fromiter((order.exit_pl for order in closed), np.float64, n),
+        'quantity': np.fromiter((order.quantity for order in closed), np.float64, n),
+        'max_open_pl': np.fromiter((order.max_open_pl for order in closed), np.float64, n),
+        'min_open_pl': np.fromiter((order.min_open_pl for order in closed), np.float64, n),
+        'level_hit': np.fromiter((LEVEL_HIT_CATEGORIES.index(order.level_hit.value) for order in closed), np.int8, n),
+        'exit_index': np.full(n, -1, dtype=np.int64) if exit_index is None else np.asarray(exit_index, dtype=np.int64),
+        'exit_time': np.full(n, -1, dtype=np.int64) if exit_time is None else np.asarray(exit_time, dtype=np.int64),
+    }
+    return _to_frame(columns)
+
+
+def _closed(fills: pd.DataFrame) -> pd.DataFrame:
+    """
+    Closed trades only (evaluate_bracket_orders also returns the open ones), in exit order
+    """
+    fills = fills[fills['level_hit'] != LevelHit.NOHIT.value]
+    if 'exit_index' in fills and not fills['exit_index'].is_monotonic_increasing:
+        fills = fills.iloc[np.argsort(fills['exit_index'].to_numpy(), kind='stable')]
+    return fills
+
+
+def _trade_pl(fills: pd.DataFrame) -> np.ndarray:
+    """
+    P&L of each trade: exit_pl is per contract, weighted by the `quantity` column when there is one
+    (as in OrderBook.closed_pl). max_open_pl and min_open_pl already are for the whole quantity.
+    """
+    pl = fills['exit_pl'].to_numpy(np.float64)
+    if 'quantity' in fills:
+        pl = pl * fills['quantity'].to_numpy(np.float64)
+    return pl
+
+
+def _grouped_metrics(group: np.ndarray, pl: np.ndarray, mfe: np.ndarray, mae: np.ndarray, n_groups: int) -> pd.DataFrame:
+    """
+    Metrics of trades grouped by integer codes in [0, n_groups), trades of a group being in exit order.
+    Every statistic is a bincount or a reduceat over the groups, there is no per-group Python work.
+    """
+    trades = np.bincount(group, minlength=n_groups)
+    win, loss = pl > 0, pl < 0
+    wins = np.bincount(group, weights=win, minlength=n_groups)
+    losses = np.bincount(group, weights=loss, minlength=n_groups)
+    gross_profit = np.bincount(group, weights=np.where(win, pl, 0.), minlength=n_groups)
+    gross_loss = -np.bincount(group, weights=np.where(loss, pl, 0.), minlength=n_groups)
+    total = np.bincount(group, weights=pl, minlength=n_groups)
+
+    # Closed-trade equity within each group, drawdown from its running peak (starting at 0)
+    order = np.argsort(group, kind='stable')
+    sorted_group, sorted_pl = group[order], pl[order]
+    equity = pd.Series(sorted_pl).groupby(sorted_group).cumsum().to_numpy()
+    peak = np.maximum(pd.Series(equity).groupby(sorted_group).cummax().to_numpy(), 0.)
+    max_drawdown = np.zeros(n_groups)
+    non_empty = np.flatnonzero(trades)
+    if non_empty.size:
+        starts = np.r_[0, np.cumsum(trades[non_empty])[:-1]]
+        max_drawdown[non_empty] = np.minimum(np.minimum.reduceat(equity - peak, starts), 0.)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame({
+            'trades': trades,
+            'wins': wins.astype(np.int64),
+            'losses': losses.astype(np.int64),
+            'win_rate': wins / trades,
+            'total_pl': total,
+            'expectancy': total / trades,
+            'avg_win': gross_profit / wins,
+            'avg_loss': -gross_loss / losses,
+            'profit_factor': np.where(gross_loss > 0, gross_profit / gross_loss, np.where(gross_profit > 0, np.inf, np.nan)),
+            'max_drawdown': max_drawdown,
+            'mfe_mean': np.bincount(group, weights=mfe, minlength=n_groups) / trades,
+            'mae_mean': np.bincount(group, weights=mae, minlength=n_groups) / trades,
+        }, columns=METRIC_COLUMNS)
+
+
+def trade_metrics(fills: pd.DataFrame) -> pd.Series:
+    """
+    Standard metric set of the closed trades of a fills table (OrderBook.fills, evaluate_bracket_orders output
+    or fills_from_orders): win rate, expectancy, profit factor, max drawdown of the closed-trade equity,
+    mean favorable (MFE) and adverse (MAE) excursions
+    """
+    fills = _closed(fills)
+    metrics = _grouped_metrics(
+        np.zeros(len(fills), dtype=np.int64),
+        _trade_pl(fills),
+        fills['max_open_pl'].to_numpy(np.float64),
+        fills['min_open_pl'].to_numpy(np.float64),
+        1
+    )
+    return metrics.iloc[0].rename(None)
+
+
+def sweep_metrics(fills: pd.DataFrame, by: Optional[str] = None) -> pd.DataFrame:
+    """
+    trade_metrics of every configuration of a sweep at once, from the fills of all configurations
+    stacked in one table with a `by` column. By default, the `config_hash` column of sweep results,
+    or a `config_id` column.
+    """
+    if by is None:
+        by = next((name for name in CONFIG_COLUMNS if name in fills), None)
+        if by is None:
+            raise KeyError(f"Fills have none of the configuration columns {CONFIG_COLUMNS}, pass `by`")
+
+    fills = _closed(fills)
+    keys, group = np.unique(fills[by].to_numpy(), return_inverse=True)
+    metrics = _grouped_metrics(
+        group.ravel().astype(np.int64),
+        _trade_pl(fills),
+        fills['max_open_pl'].to_numpy(np.float64),
+        fills['min_open_pl'].to_numpy(np.float64),
+        len(keys)
+    )
+    metrics.index = pd.Index(keys, name=by)
+    return metrics
+
+
+def excursions(fills: pd.DataFrame, quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95)) -> pd.DataFrame:
+    """
+    Quantiles of the favorable (MFE, max_open_pl) and adverse (MAE, min_open_pl) excursions of closed trades
+    """
+    fills = _closed(fills)
+    return pd.DataFrame({
+        'mfe': np.quantile(fills['max_open_pl'].to_numpy(np.float64), quantiles) if len(fills) else np.nan,
+        'mae': np.quantile(fills['min_open_pl'].to_numpy(np.float64), quantiles) if len(fills) else np.nan,
+    }, index=pd.Index(quantiles, name='quantile'))
+
+
+def equity_curve(fills: pd.DataFrame) -> pd.DataFrame:
+    """
+    Closed-trade equity after each exit, with its drawdown from the running peak
+    """
+    fills = _closed(fills)
+    equity = np.cumsum(_trade_pl(fills))
+    peak = np.maximum(np.maximum.accumulate(equity), 0.) if len(equity) else equity
+    columns = {name: fills[name].to_numpy() for name in ('exit_index', 'exit_time') if name in fills}
+    return pd.DataFrame({**columns, 'equity': equity, 'drawdown': equity - peak})
+
+
+def session_pl(fills: pd.DataFrame, session_start: str = SESSION_START) -> pd.Series:
+    """
+    P&L of closed trades per trading day of their exit, from the int64 `exit_time` column
+    """
+    fills = _closed(fills)
+    days = day_index(fills['exit_time'].to_numpy(np.int64), session_start)
+    keys, group = np.unique(days, return_inverse=True)
+    pl = np.bincount(group.ravel(), weights=_trade_pl(fills), minlength=len(keys))
+    return pd.Series(pl, index=pd.Index(keys.astype('datetime64[D]'), name='trading_day'), name='pl')
+
+
+class TradeLog:
+    """
+    Columnar log of closed trades with running metrics.
+
+    Fills are appended in chunks as orders close (e.g. OrderBook.fills after each bar, or each
+    evaluate_bracket_orders batch). Totals, win/loss counts and the equity drawdown are updated
+    incrementally, so `metrics` is O(1) however many trades were logged.
+    """
+    def __init__(self):
+        self._chunks: Dict[str, List[np.ndarray]] = {name: [] for name in FILL_COLUMNS}
+        self.trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.gross_profit = 0.
+        self.gross_loss = 0.
+        self.mfe_sum = 0.
+        self.mae_sum = 0.
+        self.equity = 0.
+        self.peak = 0.
+        self.max_drawdown = 0.
+
+    def __len__(self) -> int:
+        return self.trades
+
+    def append(self, fills: pd.DataFrame) -> None:
+        fills = _closed(fills)
+        n = len(fills)
+        if not n:
+            return
+
+        for name, dtype in FILL_COLUMNS.items():
+            if name == 'level_hit':
+                values = fills['level_hit'].cat.codes.to_numpy() if hasattr(fills['level_hit'], 'cat') else fills['level_hit']
+            elif name in fills:
+                values = fills[name].to_numpy()
+            elif name == 'quantity':
+                values = np.ones(n)
+            else:
+                values = np.full(n, -1 if np.issubdtype(dtype, np.integer) else np.nan)
+            self._chunks[name].append(np.asarray(values, dtype=dtype))
+
+        pl = _trade_pl(fills)
+        self.trades += n
+        self.wins += int(np.count_nonzero(pl > 0))
+        self.losses += int(np.count_nonzero(pl < 0))
+        self.gross_profit += float(pl[pl > 0].sum())
+        self.gross_loss -= float(pl[pl < 0].sum())
+        self.mfe_sum += float(fills['max_open_pl'].sum())
+        self.mae_sum += float(fills['min_open_pl'].sum())
+
+        equity = self.equity + np.cumsum(pl)
+        peak = np.maximum(np.maximum.accumulate(equity), self.peak)
+        self.max_drawdown = min(self.max_drawdown, float((equity - peak).min()))
+        self.equity = float(equity[-1])
+        self.peak = float(peak[-1])
+
+    def metrics(self) -> pd.Series:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            trades = np.float64(self.trades)
+            return pd.Series({
+                'trades': self.trades,
+                'wins': self.wins,
+                'losses': self.losses,
+                'win_rate': self.wins / trades,
+                'total_pl': self.equity,
+                'expectancy': self.equity / trades,
+                'avg_win': self.gross_profit / np.float64(self.wins),
+                'avg_loss': -self.gross_loss / np.float64(self.losses),
+                'profit_factor': (self.gross_profit / self.gross_loss if self.gross_loss > 0
+                                  else np.inf if self.gross_profit > 0 else np.nan),
+                'max_drawdown': self.max_drawdown,
+                'mfe_mean': self.mfe_sum / trades,
+                'mae_mean': self.mae_sum / trades,
+            })[METRIC_COLUMNS]
+
+    def to_frame(self) -> pd.DataFrame:
+        columns = {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtype=FILL_COLUMNS[name])
+            for name, chunks in self._chunks.items()
+        }
+        self._chunks = {name: [values] for name, values in columns.items()}
+        return _to_frame(columns)
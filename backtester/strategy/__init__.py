@@ -0,0 +1,11 @@
+from backtester.strategy.strategy_base import Strategy
+from backtester.strategy.engine import Engine, BacktestResult, EngineTimings, run_backtest
+from backtester.strategy.portfolio import (
+    Portfolio, PortfolioEngine, PortfolioLimits, PortfolioResult, PortfolioStrategy, merge_bars, run_portfolio
+)
+
+__all__ = [
+    'Strategy', 'Engine', 'BacktestResult', 'EngineTimings', 'run_backtest',
+    'Portfolio', 'PortfolioEngine', 'PortfolioLimits', 'PortfolioResult', 'PortfolioStrategy', 'merge_bars',
+    'run_portfolio',
+]
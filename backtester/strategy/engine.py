@@ -0,0 +1,114 @@
+import time
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Dict
+from backtester import instrumentation
+from backtester.data.bar_store import BarStore, BarView
+from backtester.order.order_book import OrderBook
+from backtester.results import trade_metrics
+from backtester.strategy.strategy_base import Strategy
+
+
+@dataclass
+class EngineTimings:
+    """
+    Wall time (seconds) spent in the strategy callbacks, in the order updates and in the engine itself
+    (bar views, loop overhead), over one run
+    """
+    bars: int = 0
+    strategy: float = 0.
+    orders: float = 0.
+    bookkeeping: float = 0.
+
+    @property
+    def total(self) -> float:
+        return self.strategy + self.orders + self.bookkeeping
+
+    def to_dict(self) -> Dict[str, float]:
+        return {'bars': self.bars, 'strategy': self.strategy, 'orders': self.orders,
+                'bookkeeping': self.bookkeeping, 'total': self.total}
+
+    def __str__(self) -> str:
+        total = self.total or 1.
+        return '\n'.join(
+            f"{name:<12} {seconds:9.3f} s  {100 * seconds / total:5.1f}%"
+            for name, seconds in (('strategy', self.strategy), ('orders', self.orders),
+                                  ('bookkeeping', self.bookkeeping))
+        )
+
+
+@dataclass
+class BacktestResult:
+    fills: pd.DataFrame
+    open_orders: pd.DataFrame
+    timings: EngineTimings = field(default_factory=EngineTimings)
+
+    def metrics(self) -> pd.Series:
+        return trade_metrics(self.fills)
+
+
+class Engine:
+    """
+    Event-driven replay of a BarStore: each bar first updates the open orders of the book, all together,
+    then is handed to the strategy.
+
+    The book only keeps open orders in its arrays, closed ones are retired into the fills log,
+    so the cost of a bar depends on the number of open orders, not on the number of orders ever placed.
+    """
+    def __init__(self, bars: BarStore, book_capacity: int = 1024, timed: bool = True):
+        self.bars = bars
+        self.book_capacity = book_capacity
+        self.timed = timed
+
+    def run(self, strategy: Strategy) -> BacktestResult:
+        bars = self.bars
+        book = OrderBook(capacity=self.book_capacity)
+        strategy.bars = bars
+        strategy.book = book
+        timings = EngineTimings(bars=len(bars))
+
+        if self.timed:
+            clock = time.perf_counter
+            run_start = clock()
+            strategy.on_start()
+            strategy_time = clock() - run_start
+            orders_time = 0.
+
+            for i in range(len(bars)):
+                bar = BarView(bars, i)
+                if len(book):
+                    start = clock()
+                    book.update_at_bar(bar)
+                    orders_time += clock() - start
+
+                start = clock()
+                strategy.on_bar(bar)
+                strategy_time += clock() - start
+
+            start = clock()
+            strategy.on_end()
+            strategy_time += clock() - start
+
+            timings.strategy = strategy_time
+            timings.orders = orders_time
+            timings.bookkeeping = max(clock() - run_start - strategy_time - orders_time, 0.)
+        else:
+            strategy.on_start()
+            for i in range(len(bars)):
+                bar = BarView(bars, i)
+                if len(book):
+                    book.update_at_bar(bar)
+                strategy.on_bar(bar)
+            strategy.on_end()
+
+        instrumentation.count(instrumentation.BARS_PROCESSED, len(bars))
+        if self.timed:
+            instrumentation.add_time('engine.strategy', timings.strategy)
+            instrumentation.add_time('engine.orders', timings.orders)
+            instrumentation.add_time('engine.bookkeeping', timings.bookkeeping)
+
+        return BacktestResult(fills=book.fills, open_orders=book.open_orders, timings=timings)
+
+
+def run_backtest(bars: BarStore, strategy: Strategy, timed: bool = True) -> BacktestResult:
+    return Engine(bars, timed=timed).run(strategy)
@@ -0,0 +1,275 @@
+import heapq
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Mapping, Optional, Sequence, Tuple, Union
+from backtester import instrumentation
+from backtester.const import OrderSide
+from backtester.data.bar_store import BarStore, BarView
+from backtester.order.order_book import OrderBook, MARKET, LIMIT
+from backtester.results import sweep_metrics
+
+# Reasons an order can be rejected by the portfolio
+REJECT_MARGIN = 'margin'
+REJECT_POSITION = 'position'
+REJECT_DRAWDOWN = 'drawdown'
+
+
+def bar_close_time(store: BarStore, index: int) -> int:
+    """
+    Close time of a bar: the open of the next bar of its session. The last bar of a session is
+    assumed to last as long as the bar before it.
+    """
+    timestamp, day_index = store.timestamp, store.day_index
+    if index + 1 < len(store) and day_index[index + 1] == day_index[index]:
+        return int(timestamp[index + 1])
+    if index > 0 and day_index[index - 1] == day_index[index]:
+        return int(2 * timestamp[index] - timestamp[index - 1])
+    return int(timestamp[index])
+
+
+def merge_bars(stores: Mapping[str, BarStore]) -> Iterator[Tuple[str, BarView]]:
+    """
+    Bars of several symbols in the order they close, as (symbol, bar view), bars closing at the same
+    time coming in the order of `stores`. Bar timestamps are open times, so ordering on them would hand
+    a slow symbol's bar to the strategy before the faster bars that close within it (look-ahead).
+    A heap holds the next bar of each symbol, so the merge costs O(log k) per bar for k symbols and
+    nothing is copied out of the stores.
+    """
+    symbols = list(stores)
+    heap = [(bar_close_time(store, 0), rank, 0) for rank, store in enumerate(stores.values()) if len(store)]
+    heapq.heapify(heap)
+
+    while heap:
+        _, rank, i = heap[0]
+        symbol = symbols[rank]
+        store = stores[symbol]
+        yield symbol, BarView(store, i)
+
+        if i + 1 < len(store):
+            heapq.heapreplace(heap, (bar_close_time(store, i + 1), rank, i + 1))
+        else:
+            heapq.heappop(heap)
+
+
+@dataclass
+class PortfolioLimits:
+    """
+    Constraints checked when an order is placed. Quantities are in contracts, amounts in currency
+    (price points times the point value of the symbol). Open orders, pending limit orders included,
+    hold margin and count towards positions.
+    """
+    capital: float = np.inf
+    margin: Mapping[str, float] = field(default_factory=dict)
+    max_position: Mapping[str, float] = field(default_factory=dict)
+    max_total_position: float = np.inf
+    max_drawdown: float = np.inf
+
+
+class Portfolio:
+    """
+    Order books of several symbols with shared margin, position limits and a drawdown stop.
+
+    The P&L of a symbol (closed orders plus live orders marked at its last bar) is refreshed when
+    one of its bars is processed, and the portfolio P&L, its peak and drawdown are updated from it
+    in O(1). Once the drawdown reaches limits.max_drawdown, new orders are rejected until the end of the run.
+    """
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        limits: Optional[PortfolioLimits] = None,
+        point_value: Optional[Mapping[str, float]] = None,
+        book_capacity: int = 1024
+    ):
+        self.limits = limits or PortfolioLimits()
+        self.point_value = {symbol: float((point_value or {}).get(symbol, 1.)) for symbol in symbols}
+        self.books = {symbol: OrderBook(capacity=book_capacity) for symbol in symbols}
+        self.symbol_pl = dict.fromkeys(symbols, 0.)
+        self.pl = 0.
+        self.peak_pl = 0.
+        self.max_drawdown = 0.
+        self.halted_at: Optional[int] = None
+        self.rejected = dict.fromkeys((REJECT_MARGIN, REJECT_POSITION, REJECT_DRAWDOWN), 0)
+
+    @property
+    def drawdown(self) -> float:
+        return self.pl - self.peak_pl
+
+    @property
+    def margin_used(self) -> float:
+        margin = self.limits.margin
+        return sum(book.open_quantity * margin.get(symbol, 0.) for symbol, book in self.books.items())
+
+    def position(self, symbol: Optional[str] = None) -> float:
+        """Open contracts of a symbol, or of the whole portfolio"""
+        if symbol is not None:
+            return self.books[symbol].open_quantity
+        return sum(book.open_quantity for book in self.books.values())
+
+    def place(
+        self,
+        symbol: str,
+        side: Union[OrderSide, int],
+        stop_price: float,
+        target_price: float,
+        entry_price: float = np.nan,
+        quantity: int = 1,
+        order_type: int = MARKET,
+        slippage: float = 0.
+    ) -> Optional[int]:
+        """
+        Add an order to the book of `symbol` and return its id, or None if it breaks a limit.
+        Market orders fill at the open of the next bar of the symbol, as in OrderBook.add.
+        """
+        limits = self.limits
+        reason = None
+        if self.halted_at is not None:
+            reason = REJECT_DRAWDOWN
+        elif (self.position(symbol) + quantity > limits.max_position.get(symbol, np.inf)
+              or self.position() + quantity > limits.max_total_position):
+            reason = REJECT_POSITION
+        elif self.margin_used + quantity * limits.margin.get(symbol, 0.) > limits.capital + self.pl:
+            reason = REJECT_MARGIN
+
+        if reason is not None:
+            self.rejected[reason] += 1
+            return None
+        return self.books[symbol].add(side, stop_price, target_price, entry_price, quantity, order_type, slippage)
+
+    def update(self, symbol: str, bar: BarView) -> None:
+        """
+        Update the open orders of `symbol` at one of its bars, then the portfolio P&L and drawdown
+        """
+        book = self.books[symbol]
+        if not len(book):
+            return
+
+        book.update_at_bar(bar)
+        symbol_pl = (book.closed_pl + book.open_pl) * self.point_value[symbol]
+        self.pl += symbol_pl - self.symbol_pl[symbol]
+        self.symbol_pl[symbol] = symbol_pl
+        self.peak_pl = max(self.peak_pl, self.pl)
+        self.max_drawdown = min(self.max_drawdown, self.drawdown)
+        if self.halted_at is None and -self.drawdown >= self.limits.max_drawdown:
+            self.halted_at = bar.timestamp
+
+
+class PortfolioStrategy(ABC):
+    """
+    Base class of the strategies run by the PortfolioEngine.
+
+    on_bar sees the bars of every symbol in the order they close (see merge_bars), and places orders
+    on any symbol with market/limit, which return None when the portfolio rejects the order.
+    Orders placed on a symbol are live from its next bar, market orders filling at its open plus slippage.
+    """
+    portfolio: Portfolio
+    bars: Mapping[str, BarStore]
+
+    def on_start(self) -> None:
+        """Called once before the first bar, `bars` and `portfolio` are set"""
+
+    @abstractmethod
+    def on_bar(self, symbol: str, bar: BarView) -> None:
+        """Called at the close of each bar of each symbol"""
+
+    def on_end(self) -> None:
+        """Called once after the last bar"""
+
+    def market(
+        self,
+        symbol: str,
+        side: Union[OrderSide, int],
+        stop_price: float,
+        target_price: float,
+        quantity: int = 1,
+        slippage: float = 0.
+    ) -> Optional[int]:
+        return self.portfolio.place(symbol, side, stop_price, target_price, quantity=quantity, order_type=MARKET,
+                                    slippage=slippage)
+
+    def limit(
+        self,
+        symbol: str,
+        side: Union[OrderSide, int],
+        entry_price: float,
+        stop_price: float,
+        target_price: float,
+        quantity: int = 1
+    ) -> Optional[int]:
+        return self.portfolio.place(symbol, side, stop_price, target_price, entry_price, quantity, order_type=LIMIT)
+
+
+@dataclass
+class PortfolioResult:
+    """
+    Fills and open orders of all symbols with a `symbol` column, plus the portfolio P&L (currency)
+    """
+    fills: pd.DataFrame
+    open_orders: pd.DataFrame
+    pl: float
+    max_drawdown: float
+    rejected: Dict[str, int]
+    halted_at: Optional[int] = None
+
+    def metrics(self) -> pd.DataFrame:
+        """trade_metrics of each symbol, in price points"""
+        return sweep_metrics(self.fills, by='symbol')
+
+
+def _stack(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    symbols = list(frames)
+    df = pd.concat([frame.assign(symbol=symbol) for symbol, frame in frames.items()], ignore_index=True)
+    df['symbol'] = pd.Categorical(df['symbol'], categories=symbols)
+    return df
+
+
+class PortfolioEngine:
+    """
+    Event-driven replay of several symbols on a shared portfolio.
+
+    The per-symbol BarStores are merged lazily by bar close time (merge_bars), each bar updates the open
+    orders of its symbol only, then is handed to the strategy. Nothing is concatenated: memory is
+    the stores themselves (e.g. memory-mapped), the heap of k next bars and the open orders.
+    """
+    def __init__(
+        self,
+        bars: Mapping[str, BarStore],
+        limits: Optional[PortfolioLimits] = None,
+        point_value: Optional[Mapping[str, float]] = None,
+        book_capacity: int = 1024
+    ):
+        self.bars = bars
+        self.limits = limits
+        self.point_value = point_value
+        self.book_capacity = book_capacity
+
+    def run(self, strategy: PortfolioStrategy) -> PortfolioResult:
+        portfolio = Portfolio(list(self.bars), self.limits, self.point_value, self.book_capacity)
+        strategy.bars = self.bars
+        strategy.portfolio = portfolio
+
+        strategy.on_start()
+        for symbol, bar in merge_bars(self.bars):
+            portfolio.update(symbol, bar)
+            strategy.on_bar(symbol, bar)
+        strategy.on_end()
+
+        instrumentation.count(instrumentation.BARS_PROCESSED, sum(len(store) for store in self.bars.values()))
+        return PortfolioResult(
+            fills=_stack({symbol: book.fills for symbol, book in portfolio.books.items()}),
+            open_orders=_stack({symbol: book.open_orders for symbol, book in portfolio.books.items()}),
+            pl=portfolio.pl,
+            max_drawdown=portfolio.max_drawdown,
+            rejected=dict(portfolio.rejected),
+            halted_at=portfolio.halted_at
+        )
+
+
+def run_portfolio(
+    bars: Mapping[str, BarStore],
+    strategy: PortfolioStrategy,
+    limits: Optional[PortfolioLimits] = None,
+    point_value: Optional[Mapping[str, float]] = None
+) -> PortfolioResult:
+    return PortfolioEngine(bars, limits, point_value).run(strategy)
@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+from typing import Union
+from backtester.const import OrderSide
+from backtester.data.bar_store import BarStore, BarView
+from backtester.order.order_book import OrderBook, MARKET, LIMIT
+
+
+class Strategy(ABC):
+    """
+    Base class of the strategies run by the Engine.
+
+    Subclasses implement on_bar, which sees each bar once it has closed and places orders with
+    market/limit. Orders placed at a bar are live for the following bars only: market orders fill
+    at the open of the next bar plus slippage, limit orders once the next bars cross their price.
+    """
+    bars: BarStore
+    book: OrderBook
+
+    def on_start(self) -> None:
+        """Called once before the first bar, `bars` and `book` are set"""
+
+    @abstractmethod
+    def on_bar(self, bar: BarView) -> None:
+        """Called at the close of each bar"""
+
+    def on_end(self) -> None:
+        """Called once after the last bar"""
+
+    def market(
+        self,
+        side: Union[OrderSide, int],
+        stop_price: float,
+        target_price: float,
+        quantity: int = 1,
+        slippage: float = 0.
+    ) -> int:
+        return self.book.add(side, stop_price, target_price, quantity=quantity, order_type=MARKET, slippage=slippage)
+
+    def limit(
+        self,
+        side: Union[OrderSide, int],
+        entry_price: float,
+        stop_price: float,
+        target_price: float,
+        quantity: int = 1
+    ) -> int:
+        return self.book.add(side, stop_price, target_price, entry_price, quantity, order_type=LIMIT)
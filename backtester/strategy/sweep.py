@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import hashlib
+import itertools
+import tempfile
+import multiprocessing
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Union
+from backtester.data.bar_store import BarStore
+from backtester.data.dataset import read_partition, write_partition
+
+StrategyResult = Union[Dict[str, Any], pd.DataFrame]
+StrategyFn = Callable[[BarStore, Dict[str, Any]], StrategyResult]
+Grid = Union[Mapping[str, Sequence[Any]], Sequence[Dict[str, Any]]]
+
+SHARD_PREFIX = 'shard-'
+SHARD_FILE_FORMAT = SHARD_PREFIX + '{:05d}.parquet'
+SHARD_MANIFEST_FORMAT = SHARD_PREFIX + '{:05d}.json'
+
+# Per-worker state, set once by the pool initializer instead of being pickled with every task
+_worker_bars: Optional[BarStore] = None
+_worker_strategy: Optional[StrategyFn] = None
+
+
+def parameter_grid(grid: Grid) -> List[Dict[str, Any]]:
+    """
+    Expand a {name: values} grid into the list of all parameter combinations.
+    A sequence of parameter dicts is returned as is.
+    """
+    if not isinstance(grid, Mapping):
+        return [dict(params) for params in grid]
+
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _init_worker(bars_path: str, strategy: StrategyFn) -> None:
+    global _worker_bars, _worker_strategy
+
+    # The bar file is memory-mapped, all workers share the same pages of the page cache
+    _worker_bars = BarStore.from_arrow(read_partition(bars_path))
+    _worker_strategy = strategy
+
+
+def _run_config(params: Dict[str, Any]) -> Tuple[Dict[str, Any], StrategyResult]:
+    return params, _worker_strategy(_worker_bars, params)
+
+
+def _to_rows(params: Dict[str, Any], result: StrategyResult) -> pd.DataFrame:
+    """
+    Tidy rows of one configuration: parameter columns followed by the strategy outputs
+    """
+    rows = result if isinstance(result, pd.DataFrame) else pd.DataFrame([result])
+    rows = rows.reset_index(drop=True)
+    return pd.concat([pd.DataFrame([params] * len(rows)), rows], axis=1)
+
+
+def iter_sweep(
+    bars: BarStore,
+    strategy: StrategyFn,
+    grid: Grid,
+    n_workers: Optional[int] = None,
+    chunksize: Optional[int] = None
+) -> Iterator[Tuple[Dict[str, Any], StrategyResult]]:
+    """
+    Run `strategy(bars, params)` for every configuration of the grid on a process pool, yielding
+    (params, result) pairs as they complete (not in grid order).
+
+    The bars are written once to a memory-mapped Arrow file that every worker maps at start-up,
+    so no bar data is pickled. `strategy` must be picklable (a module-level function).
+    """
+    configs = parameter_grid(grid)
+    n_workers = n_workers or os.cpu_count()
+
+    if n_workers == 1:
+        for params in configs:
+            yield params, strategy(bars, params)
+        return
+
+    if chunksize is None:
+        chunksize = max(1, len(configs) // (n_workers * 4))
+
+    with tempfile.TemporaryDirectory(prefix='backtester-sweep-') as tmp_dir:
+        bars_path = os.path.join(tmp_dir, 'bars.arrow')
+        write_partition(bars.to_arrow(), bars_path)
+
+        with multiprocessing.Pool(n_workers, initializer=_init_worker, initargs=(bars_path, strategy)) as pool:
+            yield from pool.imap_unordered(_run_config, configs, chunksize=chunksize)
+
+
+def run_sweep(
+    bars: BarStore,
+    strategy: StrategyFn,
+    grid: Grid,
+    n_workers: Optional[int] = None,
+    chunksize: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Run a parameter sweep in parallel and collect the results into one table.
+
+    The strategy returns either a dict (one row) or a dataframe (several rows) per configuration,
+    every row is prefixed with the parameter columns of its configuration.
+    """
+    frames = [_to_rows(params, result) for params, result in iter_sweep(bars, strategy, grid, n_workers, chunksize)]
+    if not frames:
+        return pd.DataFrame()
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def config_hash(params: Dict[str, Any]) -> str:
+    """
+    Stable hash of a parameter configuration
+    """
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+def _read_shard_manifests(out_dir: str) -> List[Dict[str, Any]]:
+    """
+    Manifests of the complete shards of a sweep directory, in shard order
+    """
+    manifests = []
+    for name in sorted(os.listdir(out_dir)) if os.path.isdir(out_dir) else []:
+        if name.startswith(SHARD_PREFIX) and name.endswith('.json'):
+            with open(os.path.join(out_dir, name)) as f:
+                manifests.append(json.load(f))
+    return manifests
+
+
+def _write_shard_manifest(out_dir: str, index: int, manifest: Dict[str, Any]) -> None:
+    # Written after its shard, then renamed: a shard only counts once its manifest exists
+    path = os.path.join(out_dir, SHARD_MANIFEST_FORMAT.format(index))
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.tmp', path)
+
+
+def completed_configs(out_dir: str) -> Set[str]:
+    """
+    Hashes of the configurations whose results are in the shards of a sweep directory
+    """
+    return {h for manifest in _read_shard_manifests(out_dir) for h in manifest['configs']}
+
+
+def run_sweep_to_shards(
+    bars: BarStore,
+    strategy: StrategyFn,
+    grid: Grid,
+    out_dir: str,
+    n_workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    shard_configs: int = 1000,
+    flush_seconds: float = 60.
+) -> int:
+    """
+    Run a parameter sweep writing results to parquet shards in `out_dir` as configurations complete.
+
+    A shard is written every `shard_configs` configurations or `flush_seconds`, and when the sweep
+    stops, on an error too. Each shard is then recorded by a small manifest next to it with the hashes
+    of its configurations, so recording costs O(shard) whatever the size of the sweep. Running again
+    with the same directory resumes: configurations in the shard manifests are skipped, and a shard
+    written without its manifest when the process died is overwritten. Rows have a `config_hash`
+    column besides the parameter columns. Returns the number of configurations run.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifests = _read_shard_manifests(out_dir)
+    done = {h for manifest in manifests for h in manifest['configs']}
+    pending = [params for params in parameter_grid(grid) if config_hash(params) not in done]
+    next_shard = max((int(m['file'][len(SHARD_PREFIX):-len('.parquet')]) for m in manifests), default=-1) + 1
+
+    frames: List[pd.DataFrame] = []
+    hashes: List[str] = []
+    last_flush = time.monotonic()
+
+    def flush() -> None:
+        nonlocal frames, hashes, last_flush, next_shard
+        if hashes:
+            file_name = SHARD_FILE_FORMAT.format(next_shard)
+            table = pa.Table.from_pandas(pd.concat(frames, ignore_index=True), preserve_index=False)
+            pq.write_table(table, os.path.join(out_dir, file_name))
+            _write_shard_manifest(out_dir, next_shard, {'file': file_name, 'rows': table.num_rows, 'configs': hashes})
+            next_shard += 1
+        frames, hashes, last_flush = [], [], time.monotonic()
+
+    try:
+        for params, result in iter_sweep(bars, strategy, pending, n_workers, chunksize):
+            h = config_hash(params)
+            rows = _to_rows(params, result)
+            rows.insert(0, 'config_hash', h)
+            frames.append(rows)
+            hashes.append(h)
+            if len(hashes) >= shard_configs or time.monotonic() - last_flush >= flush_seconds:
+                flush()
+    finally:
+        # Results collected before a failing configuration are kept for the next run
+        flush()
+
+    return len(pending)
+
+
+def open_sweep_results(out_dir: str) -> ds.Dataset:
+    """
+    Lazy view on the shards of a sweep: filters and column selections are pushed down to the files,
+    e.g. `open_sweep_results(d).to_table(columns=[...], filter=ds.field('total_pl') > 0)`
+    """
+    files = [os.path.join(out_dir, manifest['file']) for manifest in _read_shard_manifests(out_dir)]
+    return ds.dataset(files, format='parquet')
@@ -0,0 +1,171 @@
+import json
+import hashlib
+import functools
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from types import CodeType
+from typing import Any, Dict, List, MutableMapping, Optional, Tuple
+from backtester.data.bar_store import BarStore
+from backtester.results import METRIC_COLUMNS
+from backtester.strategy.sweep import Grid, StrategyFn, iter_sweep, parameter_grid
+
+# Per-session results of a strategy, keyed by (day_index, session fingerprint, strategy, parameters)
+SessionCache = MutableMapping[Tuple[int, str, str, str], Dict[str, Any]]
+
+# Metrics that do not add up over sessions, a window score cannot be the sum of their session values
+NON_ADDITIVE_OBJECTIVES = frozenset(METRIC_COLUMNS) - {'trades', 'wins', 'losses', 'total_pl'}
+
+
+@dataclass(frozen=True)
+class Fold:
+    """
+    In-sample (train) and out-of-sample (test) windows of a walk-forward, as session positions [start, end)
+    """
+    index: int
+    train_start: int
+    train_end: int
+    test_start: int
+    test_end: int
+
+
+def walk_forward_folds(
+    n_sessions: int,
+    train_sessions: int,
+    test_sessions: int,
+    step_sessions: Optional[int] = None,
+    anchored: bool = False
+) -> List[Fold]:
+    """
+    Rolling folds over sessions: each test window follows its train window, and windows move forward by
+    `step_sessions` (the test length by default). Anchored folds keep their train window starting at 0.
+    """
+    step_sessions = step_sessions or test_sessions
+    folds = []
+    start = 0
+    while start + train_sessions + test_sessions <= n_sessions:
+        train_end = start + train_sessions
+        folds.append(Fold(len(folds), 0 if anchored else start, train_end, train_end, train_end + test_sessions))
+        start += step_sessions
+
+    return folds
+
+
+def _params_key(params: Dict[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _strategy_key(strategy: StrategyFn) -> str:
+    # functools.partial objects are identified by their function and bound arguments
+    func = getattr(strategy, 'func', strategy)
+    qualname = getattr(func, '__qualname__', type(func).__qualname__)
+    key = f"{getattr(func, '__module__', '')}.{qualname}"
+    if '<' in qualname and hasattr(func, '__code__'):
+        # Lambdas and closures share their qualname, tell them apart by code and captured values
+        key += _code_key(func.__code__)
+        if func.__closure__:
+            key += _params_key({'closure': [cell.cell_contents for cell in func.__closure__]})
+    if func is not strategy:
+        key += _params_key({'args': list(strategy.args), 'keywords': strategy.keywords})
+    return key
+
+
+def _code_key(code: CodeType) -> str:
+    digest = hashlib.blake2b(code.co_code, digest_size=12)
+    digest.update(' '.join(code.co_names).encode())
+    for const in code.co_consts:
+        digest.update(_code_key(const).encode() if isinstance(const, CodeType) else repr(const).encode())
+    return f"@{code.co_filename}:{code.co_firstlineno}:{digest.hexdigest()}"
+
+
+def _session_fingerprint(bars: BarStore, start: int, end: int) -> str:
+    # A session that grew after an incremental ingest, or the bars of another symbol, do not match
+    return f"{end - start}:{bars.timestamp[start]}:{bars.timestamp[end - 1]}:{bars.last[end - 1]!r}"
+
+
+def _run_on_session(strategy: StrategyFn, bars: BarStore, task: Dict[str, Any]) -> Dict[str, Any]:
+    # Zero-copy view on the session, in the worker's memory-mapped bars
+    return strategy(bars[task['start']:task['end']], task['params'])
+
+
+def run_walk_forward(
+    bars: BarStore,
+    strategy: StrategyFn,
+    grid: Grid,
+    train_sessions: int,
+    test_sessions: int,
+    objective: str = 'total_pl',
+    step_sessions: Optional[int] = None,
+    anchored: bool = False,
+    n_workers: Optional[int] = None,
+    cache: Optional[SessionCache] = None
+) -> pd.DataFrame:
+    """
+    Walk-forward optimization with folds defined by trading session (BarStore.day_index).
+
+    `strategy(bars, params)` is run once per session and configuration, on a zero-copy slice of the
+    session, and must return a dict of metrics that add up over sessions (P&L, trade counts...).
+    Window scores are sums of session results, so overlapping windows share their sessions and a
+    walk-forward costs about one pass over the data per configuration, whatever the number of folds.
+    Sessions are spread over a process pool as in run_sweep. Passing the same `cache` dict to later runs
+    reuses the session results of unchanged configurations, sessions and strategies.
+
+    Each session is simulated on its own: positions still open at the end of a session are not carried
+    into the next one, so this suits strategies that are flat at the session close, and results can
+    differ from a single run over the whole window. The objective must add up over sessions (P&L,
+    trade counts), ratios such as win_rate or profit_factor are rejected.
+
+    Returns one row per fold: its sessions, the best parameters on the train window by `objective`,
+    and the train and test scores.
+    """
+    if objective in NON_ADDITIVE_OBJECTIVES:
+        raise ValueError(f"Objective {objective!r} does not add up over sessions, use e.g. 'total_pl'")
+
+    configs = parameter_grid(grid)
+    bounds = bars.session_bounds()
+    days = bars.day_index[bounds[:-1]]
+    folds = walk_forward_folds(len(days), train_sessions, test_sessions, step_sessions, anchored)
+    cache = {} if cache is None else cache
+    strategy_key = _strategy_key(strategy)
+
+    def session_key(s: int, params_key: str) -> Tuple[int, str, str, str]:
+        return int(days[s]), fingerprints[s], strategy_key, params_key
+
+    # Each session used by a fold is evaluated once per configuration
+    used = sorted({s for fold in folds for s in range(fold.train_start, fold.test_end)})
+    fingerprints = {s: _session_fingerprint(bars, int(bounds[s]), int(bounds[s + 1])) for s in used}
+    tasks = [
+        {'start': int(bounds[s]), 'end': int(bounds[s + 1]), 'session': s, 'params': params}
+        for s in used for params in configs
+        if session_key(s, _params_key(params)) not in cache
+    ]
+    if tasks:
+        run = functools.partial(_run_on_session, strategy)
+        for task, result in iter_sweep(bars, run, tasks, n_workers):
+            cache[session_key(task['session'], _params_key(task['params']))] = result
+
+    # Session x configuration matrix of the objective, windows are sums over its rows
+    keys = [_params_key(params) for params in configs]
+    scores = np.array([[cache[session_key(s, key)][objective] for key in keys] for s in used]).reshape(len(used), len(keys))
+    position = {s: i for i, s in enumerate(used)}
+    cumulative = np.vstack([np.zeros(len(configs)), np.cumsum(scores, axis=0)]) if used else np.zeros((1, len(configs)))
+
+    def window(start: int, end: int) -> np.ndarray:
+        return cumulative[position[end - 1] + 1] - cumulative[position[start]]
+
+    rows = []
+    for fold in folds:
+        train = window(fold.train_start, fold.train_end)
+        best = int(np.argmax(train))
+        rows.append({
+            'fold': fold.index,
+            'train_start': days[fold.train_start].astype('datetime64[D]'),
+            'train_end': days[fold.train_end - 1].astype('datetime64[D]'),
+            'test_start': days[fold.test_start].astype('datetime64[D]'),
+            'test_end': days[fold.test_end - 1].astype('datetime64[D]'),
+            **configs[best],
+            'train_score': train[best],
+            'test_score': window(fold.test_start, fold.test_end)[best],
+        })
+
+    return pd.DataFrame(rows)
@@ -0,0 +1,274 @@
+"""
+Benchmarks of the data loading and order update hot paths on synthetic bars.
+
+Run from the root of the repo:
+
+    python -m benchmarks.bench_hot_paths --sizes 1e4 1e6 1e7 --out benchmarks/baseline.json
+    python -m benchmarks.bench_hot_paths --sizes 1e4 1e6 --compare benchmarks/baseline.json
+"""
+import os
+import sys
+import json
+import time
+import ctypes
+import argparse
+import platform
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from typing import Any, Callable, Dict, List, Optional
+from backtester.const import OrderSide
+from backtester.data.bar_store import BarStore
+from backtester.data.data_loader import load_bar_store, load_pq_with_bar_data
+from backtester.data.range_index import RangeExtremaIndex
+from backtester.data.generic_processor import sierra_txt_file_to_pq, sierra_txt_file_to_pq_chunked
+from backtester.data.synthetic import generate_bars, write_sierra_txt
+from backtester.order.order_batch import evaluate_bracket_orders
+from backtester.order.order_book import OrderBook, LIMIT
+from backtester.order.order_limit import LimitOrder
+from backtester.order.order_market import MarketOrder
+from backtester.strategy import Strategy, run_backtest
+
+# Benchmarks building one Python object (or call) per bar are skipped above this size by default
+DEFAULT_MAX_OBJECT_BARS = 1_000_000
+DEFAULT_ORDERS = 10_000
+STOP_TICKS = 8
+TARGET_TICKS = 16
+TICK_SIZE = 0.25
+
+
+def _memory_status_kb() -> Dict[str, int]:
+    with open('/proc/self/status') as f:
+        fields = dict(line.split(':', 1) for line in f)
+    return {name: int(fields[name].split()[0]) for name in ('VmRSS', 'VmHWM')}
+
+
+def _release_free_memory() -> None:
+    """
+    Return memory freed by earlier benchmarks but kept by the allocators (Arrow pool, glibc heap) to
+    the OS, otherwise reusing it would not show in the RSS of the next benchmark
+    """
+    pa.default_memory_pool().release_unused()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def peak_rss_mb(fn: Callable[[], Any]) -> float:
+    """
+    Peak resident memory added by one call of `fn`, in MB: the high-water mark of the RSS (what
+    getrusage reports as ru_maxrss) is reset before the call, once free memory held by the allocators
+    is released. Unlike tracemalloc, this counts Arrow buffers and memory-mapped pages. Linux only.
+    """
+    _release_free_memory()
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    start = _memory_status_kb()['VmRSS']
+    fn()
+    return max(_memory_status_kb()['VmHWM'] - start, 0) / 1024
+
+
+def measure(name: str, n_bars: int, items: int, unit: str, fn: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Time one call of `fn`, then record the peak resident memory of a second call (see peak_rss_mb)
+    """
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+
+    return {
+        'name': name,
+        'bars': n_bars,
+        'seconds': seconds,
+        'throughput': items / seconds if seconds > 0 else float('inf'),
+        'unit': unit,
+        'peak_mb': peak_rss_mb(fn),
+    }
+
+
+def _order_setups(store: BarStore, n_orders: int) -> Dict[str, np.ndarray]:
+    """
+    Bracket orders spread evenly over the bars, alternating sides
+    """
+    entry_index = np.linspace(0, len(store) - 1, n_orders).astype(np.int64)
+    sign = np.where(np.arange(n_orders) % 2 == 0, 1, -1).astype(np.int8)
+    entry = store.open[entry_index]
+
+    return {
+        'entry_index': entry_index,
+        'sign': sign,
+        'entry': entry,
+        'stop': entry - sign * STOP_TICKS * TICK_SIZE,
+        'target': entry + sign * TARGET_TICKS * TICK_SIZE,
+    }
+
+
+def _scalar_orders(store: BarStore, setups: Dict[str, np.ndarray], order_type: type) -> int:
+    """
+    Reference path: one order object per setup, updated bar by bar until closed
+    """
+    updates = 0
+    for i in range(len(setups['entry_index'])):
+        side = OrderSide.LONG if setups['sign'][i] == 1 else OrderSide.SHORT
+        order = order_type(side=side, stop_price=float(setups['stop'][i]), target_price=float(setups['target'][i]),
+                           entry_price=float(setups['entry'][i]), is_live=order_type is MarketOrder)
+        for j in range(int(setups['entry_index'][i]), len(store)):
+            order.update_at_bar(store[j])
+            updates += 1
+            if order.is_closed:
+                break
+
+    return updates
+
+
+def _order_book(store: BarStore, setups: Dict[str, np.ndarray], order_type: int) -> None:
+    """
+    Same setups held in an OrderBook, all open orders updated together at each bar
+    """
+    book = OrderBook()
+    entry_index = setups['entry_index']
+    k = 0
+    for j in range(int(entry_index[0]), len(store)):
+        while k < len(entry_index) and entry_index[k] == j:
+            book.add(int(setups['sign'][k]), setups['stop'][k], setups['target'][k], setups['entry'][k],
+                     order_type=order_type)
+            k += 1
+
+        if len(book):
+            book.update_at_bar(store[j])
+        elif k == len(entry_index):
+            break
+
+
+class _HoldOneOrder(Strategy):
+    """
+    One market order with an unreachable bracket and an empty on_bar: the per-bar cost of the engine
+    """
+    def on_start(self) -> None:
+        self.market(1, 0., 1e12)
+
+    def on_bar(self, bar) -> None:
+        pass
+
+
+def run_size(n_bars: int, tmp_dir: str, max_object_bars: int, n_orders: int) -> List[Dict[str, Any]]:
+    results = []
+    df = generate_bars(n_bars)
+    txt_path = os.path.join(tmp_dir, f'bars_{n_bars}.txt')
+    pq_path = os.path.join(tmp_dir, f'bars_{n_bars}.pq')
+    write_sierra_txt(df, txt_path)
+    object_heavy = n_bars <= max_object_bars
+
+    if object_heavy:
+        results.append(measure('sierra_txt_file_to_pq', n_bars, n_bars, 'bars/s',
+                               lambda: sierra_txt_file_to_pq(txt_path, os.path.join(tmp_dir, 'full.pq'))))
+    results.append(measure('sierra_txt_file_to_pq_chunked', n_bars, n_bars, 'bars/s',
+                           lambda: sierra_txt_file_to_pq_chunked(txt_path, pq_path)))
+
+    if object_heavy:
+        results.append(measure('load_pq_with_bar_data', n_bars, n_bars, 'bars/s',
+                               lambda: load_pq_with_bar_data(pq_path)))
+    results.append(measure('load_bar_store', n_bars, n_bars, 'bars/s', lambda: load_bar_store(pq_path)))
+
+    store = load_bar_store(pq_path)
+    if object_heavy:
+        # One order with an unreachable bracket, updated at every bar
+        def single_order_loop():
+            order = MarketOrder(side=OrderSide.LONG, stop_price=0., target_price=1e12,
+                                entry_price=store.open[0], is_live=True)
+            for bar in store:
+                order.update_at_bar(bar)
+
+        results.append(measure('order_update_at_bar_loop', n_bars, n_bars, 'bars/s', single_order_loop))
+        results.append(measure('engine_one_open_order', n_bars, n_bars, 'bars/s',
+                               lambda: run_backtest(store, _HoldOneOrder(), timed=False)))
+
+    setups = _order_setups(store, min(n_orders, n_bars))
+    n = len(setups['entry_index'])
+    if object_heavy:
+        results.append(measure('market_orders_scalar', n_bars, n, 'orders/s',
+                               lambda: _scalar_orders(store, setups, MarketOrder)))
+        results.append(measure('limit_orders_scalar', n_bars, n, 'orders/s',
+                               lambda: _scalar_orders(store, setups, LimitOrder)))
+        results.append(measure('limit_orders_order_book', n_bars, n, 'orders/s',
+                               lambda: _order_book(store, setups, LIMIT)))
+    results.append(measure('market_orders_batch', n_bars, n, 'orders/s', lambda: evaluate_bracket_orders(
+        store, setups['sign'], setups['entry'], setups['stop'], setups['target'], setups['entry_index']
+    )))
+    range_index = RangeExtremaIndex.from_bars(store)
+    results.append(measure('market_orders_range_index', n_bars, n, 'orders/s', lambda: evaluate_bracket_orders(
+        store, setups['sign'], setups['entry'], setups['stop'], setups['target'], setups['entry_index'],
+        range_index=range_index
+    )))
+
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    """
+    Names of the benchmarks whose throughput dropped by more than `tolerance` against the baseline
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['name'], r['bars']): r for r in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        reference = baseline.get((result['name'], result['bars']))
+        if reference is None:
+            continue
+
+        ratio = result['throughput'] / reference['throughput']
+        print(f"{result['name']:<32} {result['bars']:>10,d} bars  {ratio:6.2f}x baseline")
+        if ratio < 1 - tolerance:
+            regressions.append(f"{result['name']}@{result['bars']}")
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', type=float, default=[1e4, 1e6, 1e7])
+    parser.add_argument('--orders', type=int, default=DEFAULT_ORDERS)
+    parser.add_argument('--max-object-bars', type=float, default=DEFAULT_MAX_OBJECT_BARS,
+                        help='skip benchmarks creating one Python object per bar above this size')
+    parser.add_argument('--out', help='write the results as a JSON baseline')
+    parser.add_argument('--compare', help='JSON baseline to compare throughput against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed throughput drop, as a fraction')
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='backtester-bench-') as tmp_dir:
+        for size in args.sizes:
+            for result in run_size(int(size), tmp_dir, int(args.max_object_bars), args.orders):
+                print(f"{result['name']:<32} {result['bars']:>10,d} bars  {result['seconds']:9.3f} s  "
+                      f"{result['throughput']:>14,.0f} {result['unit']:<9} {result['peak_mb']:9.1f} MB peak")
+                results.append(result)
+
+    if args.out:
+        report = {
+            'meta': {
+                'python': sys.version.split()[0],
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'platform': platform.platform(),
+                'processor': platform.processor(),
+                'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+            },
+            'results': results,
+        }
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"Throughput regressions: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
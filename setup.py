@@ -7,4 +7,7 @@ setup(
     author="Raphael Hamez",
     packages=find_packages(exclude=("tests", "datasets")),
     python_requires=">=3.13",
+    extras_require={
+        "numba": ["numba>=0.61"],
+    },
 )
@@ -0,0 +1,12 @@
+import pytest
+from backtester.data.bar_store import BarStore
+from backtester.data.synthetic import generate_bars
+
+
+@pytest.fixture
+def make_store():
+    """Factory of random-walk bars around 100 on a 0.25 tick grid (see synthetic.generate_bars)"""
+    def make(n: int = 2000, seed: int = 0, start: str = "2024-01-01", freq: str = "1s") -> BarStore:
+        return BarStore.from_frame(generate_bars(n, seed=seed, start=start, freq=freq, start_price=100.))
+
+    return make
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.data.bar_data import BarData
+from backtester.data.bar_store import BarStore, BarView
+from backtester.data.data_loader import load_bar_store, load_pq_with_bar_data
+from backtester.order.order_base import Order
+from backtester.const import OrderSide, LevelHit
+
+
+class DummyOrder(Order):
+    def _set_live_status_at_bar(self, bar_data: BarData) -> None:
+        self.is_live = True
+
+
+def make_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        'open': [100., 101., 99., 104.],
+        'high': [105., 104., 103., 140.],
+        'low': [90., 89., 95., 70.],
+        'last': [95., 95., 101., 100.],
+        'volume': [50, 50, 50, 50],
+        'datetime': pd.date_range("2024-01-01 10:00:00", periods=4, freq="min"),
+    })
+
+
+def test_from_frame_dtypes():
+    store = BarStore.from_frame(make_frame())
+
+    assert len(store) == 4
+    for name in ('open', 'high', 'low', 'last'):
+        assert getattr(store, name).dtype == np.float64
+        assert getattr(store, name).flags['C_CONTIGUOUS']
+    assert store.timestamp.dtype == np.int64
+    assert store.timestamp[0] == pd.Timestamp("2024-01-01 10:00:00").value
+
+
+def test_bar_view_matches_bar_data():
+    df = make_frame()
+    store = BarStore.from_frame(df)
+
+    view = store[1]
+    assert isinstance(view, BarView)
+    assert view.to_bar_data() == BarData.from_dict(df.iloc[1].to_dict())
+    assert store[-1].high == 140.
+
+
+def test_slice_shares_memory():
+    store = BarStore.from_frame(make_frame())
+    sliced = store[1:3]
+
+    assert len(sliced) == 2
+    assert np.shares_memory(sliced.high, store.high)
+    assert sliced[0].open == 101.
+
+
+def test_index_out_of_range():
+    store = BarStore.from_frame(make_frame())
+    with pytest.raises(IndexError):
+        store[4]
+
+
+def test_parquet_round_trip(tmp_path):
+    df = make_frame()
+    path = tmp_path / "bars.pq"
+    df.to_parquet(path)
+
+    store = load_bar_store(str(path))
+    pd.testing.assert_frame_equal(store.to_frame().drop(columns='day_index'), df[['open', 'high', 'low', 'last', 'datetime']])
+
+    loaded = load_pq_with_bar_data(str(path))
+    assert [store[i].to_bar_data() for i in range(len(store))] == list(loaded['bar_data'])
+
+
+def test_update_at_bar_with_views():
+    store = BarStore.from_frame(make_frame())
+    order = DummyOrder(side=OrderSide.LONG, stop_price=80, target_price=120, entry_price=100)
+    reference = DummyOrder(side=OrderSide.LONG, stop_price=80, target_price=120, entry_price=100)
+
+    for i in range(1, len(store)):
+        order.update_at_bar(store[i])
+        reference.update_at_bar(store[i].to_bar_data())
+
+    assert order == reference
+    assert order.level_hit == LevelHit.STOP
+    assert order.exit_pl == -20
+
+
+def test_day_index_and_time_slice():
+    timestamp = pd.to_datetime(['2024-01-01 17:59', '2024-01-01 18:00', '2024-01-02 09:30', '2024-01-02 18:30'])
+    store = BarStore(open=[1.] * 4, high=[2.] * 4, low=[0.] * 4, last=[1.] * 4, timestamp=timestamp.values.view(np.int64))
+
+    # Bars from 18:00 belong to the next trading day
+    assert store.day_index.dtype == np.int32
+    assert store.day_index[1] - store.day_index[0] == 1
+    assert store.day_index[2] == store.day_index[1]
+    assert store[3].day_index == store[2].day_index + 1
+    assert list(store.session_bounds()) == [0, 1, 3, 4]
+    assert store[2].timestamp == timestamp[2].value
+
+    sliced = store.time_slice(pd.Timestamp('2024-01-01 18:00'), pd.Timestamp('2024-01-02 18:30'))
+    assert len(sliced) == 2 and np.shares_memory(sliced.day_index, store.day_index)
+    assert len(store.time_slice(start=pd.Timestamp('2024-01-02'))) == 2
+
+    round_trip = BarStore.from_arrow(store.to_arrow())
+    np.testing.assert_array_equal(round_trip.day_index, store.day_index)
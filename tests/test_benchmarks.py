@@ -0,0 +1,16 @@
+import json
+from benchmarks.bench_hot_paths import main
+
+
+def test_benchmark_smoke(tmp_path):
+    out = tmp_path / "baseline.json"
+
+    assert main(["--sizes", "2000", "--orders", "50", "--out", str(out)]) == 0
+
+    report = json.loads(out.read_text())
+    names = {result['name'] for result in report['results']}
+    assert {'load_bar_store', 'order_update_at_bar_loop', 'market_orders_batch'} <= names
+    assert all(result['throughput'] > 0 for result in report['results'])
+
+    # Comparing a run against itself never reports a regression at a loose tolerance
+    assert main(["--sizes", "2000", "--orders", "50", "--compare", str(out), "--tolerance", "0.99"]) == 0
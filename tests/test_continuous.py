@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.data import continuous
+from backtester.data.continuous import Contract, build_continuous_contract, compute_rolls
+from backtester.data.synthetic import generate_bars
+
+HOUR = pd.Timedelta(hours=1)
+
+
+def write_contract(path, start: str, days: int, price: float, volume_ramp: int) -> Contract:
+    """Hourly bars over `days` trading days, volume growing (or shrinking) by `volume_ramp` per day"""
+    df = generate_bars(days * 24, start=start, freq="1h", start_price=price, seed=int(price))
+    df['volume'] = 1000 + volume_ramp * np.arange(len(df)) // 24
+    df.to_parquet(path)
+    return Contract(symbol=path.stem, path=str(path))
+
+
+@pytest.fixture
+def contracts(tmp_path):
+    return [
+        write_contract(tmp_path / "NQU25", "2025-09-01 18:00", 10, 20000., -100),
+        write_contract(tmp_path / "NQZ25", "2025-09-03 18:00", 10, 20100., 100),
+        write_contract(tmp_path / "NQH26", "2025-09-08 18:00", 10, 20300., 100),
+    ]
+
+
+def test_volume_roll(contracts):
+    rolls = compute_rolls(contracts)
+
+    # NQZ25 (1000 + 100 * d) outgrows NQU25 (1000 - 100 * (d + 2)) on its first day, 2025-09-04
+    assert rolls['roll_day'][0] == np.datetime64('2025-09-05')
+    assert list(rolls['front']) == ['NQU25', 'NQZ25'] and list(rolls['back']) == ['NQZ25', 'NQH26']
+
+
+@pytest.mark.parametrize('adjustment', ['difference', 'ratio', 'none'])
+def test_build_back_adjusted(contracts, tmp_path, adjustment):
+    out_file = str(tmp_path / "NQ.pq")
+    rolls = build_continuous_contract(contracts, out_file, roll=['2025-09-05', '2025-09-10'], adjustment=adjustment)
+    df = pd.read_parquet(out_file)
+
+    assert df['datetime'].is_monotonic_increasing
+    assert list(df['contract'].unique()) == ['NQU25', 'NQZ25', 'NQH26']
+    # The first bar of each segment starts its roll day (18:00 the evening before)
+    starts = df.groupby('contract', sort=False)['datetime'].first()
+    assert starts['NQZ25'] == pd.Timestamp('2025-09-04 18:00') and starts['NQH26'] == pd.Timestamp('2025-09-09 18:00')
+
+    # The latest contract is never adjusted
+    last = pd.read_parquet(contracts[-1].path)
+    tail = df[df['contract'] == 'NQH26']
+    np.testing.assert_array_equal(tail['last'], last.set_index('datetime').loc[tail['datetime'], 'last'])
+
+    # At each roll, the adjusted front price equals the adjusted back price it was compared with
+    for k, roll in rolls.iterrows():
+        front_segment = df[df['contract'] == roll['front']]
+        back_raw = pd.read_parquet(contracts[k + 1].path).set_index('datetime')['last']
+        back_adjusted = df[df['contract'] == roll['back']].set_index('datetime')['last']
+        ratio = (back_adjusted / back_raw.loc[back_adjusted.index]).iloc[0]
+        offset = (back_adjusted - back_raw.loc[back_adjusted.index]).iloc[0]
+        expected = {'difference': roll['back_price'] + offset, 'ratio': roll['back_price'] * ratio,
+                    'none': roll['front_price']}[adjustment]
+        assert front_segment['last'].iloc[-1] == pytest.approx(expected)
+
+
+def test_rolls_are_cached(contracts, tmp_path, monkeypatch):
+    out_file = str(tmp_path / "NQ.pq")
+    build_continuous_contract(contracts[:2], out_file)
+
+    calls = []
+    volume_roll_day = continuous._volume_roll_day
+    monkeypatch.setattr(continuous, '_volume_roll_day', lambda front, back, s: calls.append(back.symbol) or volume_roll_day(front, back, s))
+    build_continuous_contract(contracts, out_file)
+
+    assert calls == ['NQH26']
+
+
+def test_invalid_rules(contracts, tmp_path):
+    with pytest.raises(ValueError):
+        compute_rolls(contracts, roll=['2025-09-05'])
+    with pytest.raises(ValueError):
+        compute_rolls(contracts, roll='calendar')
+    with pytest.raises(ValueError):
+        build_continuous_contract(contracts, str(tmp_path / "NQ.pq"), adjustment='log')
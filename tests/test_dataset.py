@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.data.data_loader import load_bar_store, load_bar_store_range
+from backtester.data.dataset import list_partitions, write_partitioned_dataset, PartitionedDatasetWriter
+from backtester.data.sessions import trading_day
+
+
+def make_frame(start: str = "2025-09-14 18:00:00", periods: int = 3 * 24 * 12) -> pd.DataFrame:
+    datetime = pd.date_range(start, periods=periods, freq="5min")
+    price = 24500 + np.arange(periods) * 0.25
+    return pd.DataFrame({
+        'open': price,
+        'high': price + 1,
+        'low': price - 1,
+        'last': price + 0.25,
+        'volume': np.full(periods, 50),
+        'datetime': datetime,
+    })
+
+
+def test_trading_day_session_start():
+    timestamp = pd.to_datetime(["2025-09-15 17:59", "2025-09-15 18:00", "2025-09-16 09:30"]).values.view(np.int64)
+
+    assert list(trading_day(timestamp).astype(str)) == ["2025-09-15", "2025-09-16", "2025-09-16"]
+    assert list(trading_day(timestamp, "00:00").astype(str)) == ["2025-09-15", "2025-09-15", "2025-09-16"]
+
+
+def test_write_and_list_partitions(tmp_path):
+    df = make_frame()
+    source = tmp_path / "bars.pq"
+    df.to_parquet(source)
+
+    write_partitioned_dataset(str(source), str(tmp_path / "dataset"), "NQZ25")
+
+    paths = list_partitions(str(tmp_path / "dataset"), "NQZ25")
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["2025-09-15.arrow", "2025-09-16.arrow", "2025-09-17.arrow"]
+    assert len(list_partitions(str(tmp_path / "dataset"), "NQZ25", np.datetime64("2025-09-16"))) == 2
+
+    with pytest.raises(FileNotFoundError):
+        list_partitions(str(tmp_path / "dataset"), "ESZ25")
+
+
+def test_load_range_matches_full_file(tmp_path):
+    df = make_frame()
+    source = tmp_path / "bars.pq"
+    df.to_parquet(source)
+    write_partitioned_dataset(str(source), str(tmp_path / "dataset"), "NQZ25")
+    full = load_bar_store(str(source))
+
+    start, end = "2025-09-15 09:30", "2025-09-16 16:00"
+    store = load_bar_store_range(str(tmp_path / "dataset"), "NQZ25", start, end)
+    mask = (df['datetime'] >= start) & (df['datetime'] < end)
+
+    np.testing.assert_array_equal(store.timestamp, full.timestamp[mask.to_numpy()])
+    np.testing.assert_array_equal(store.last, full.last[mask.to_numpy()])
+
+    whole = load_bar_store_range(str(tmp_path / "dataset"), "NQZ25")
+    np.testing.assert_array_equal(whole.high, full.high)
+
+
+def test_single_day_is_memory_mapped(tmp_path):
+    write_partitioned_dataset(make_frame(), str(tmp_path / "dataset"), "NQZ25")
+
+    store = load_bar_store_range(str(tmp_path / "dataset"), "NQZ25", "2025-09-15 10:00", "2025-09-15 11:00")
+
+    assert len(store) == 12
+    # Arrays are read-only views on the mapped file, not copies
+    assert not store.high.flags['WRITEABLE']
+    assert not store.timestamp.flags['OWNDATA']
+
+
+def test_writer_extends_existing_day(tmp_path):
+    df = make_frame()
+    root = str(tmp_path / "dataset")
+
+    # Two ingest runs splitting the data in the middle of a trading day
+    with PartitionedDatasetWriter(root, "NQZ25") as writer:
+        writer.write(df.iloc[:400])
+    with PartitionedDatasetWriter(root, "NQZ25") as writer:
+        writer.write(df.iloc[400:])
+
+    store = load_bar_store_range(root, "NQZ25")
+    np.testing.assert_array_equal(store.timestamp, df['datetime'].to_numpy().view(np.int64))
+
+
+def test_bars_sharing_a_timestamp_are_kept(tmp_path):
+    # Volume bars completed within the same second, the group split over two chunks
+    df = make_frame(periods=5).assign(datetime=pd.Timestamp("2025-09-15 10:00:00"))
+    root = str(tmp_path / "dataset")
+
+    with PartitionedDatasetWriter(root, "NQZ25") as writer:
+        assert writer.write(df.iloc[:2]) == 2
+        assert writer.write(df.iloc[2:]) == 3
+    assert len(load_bar_store_range(root, "NQZ25")) == 5
+
+    # Ingesting again, then a longer export with more bars at the same timestamp
+    with PartitionedDatasetWriter(root, "NQZ25") as writer:
+        assert writer.write(df.iloc[:3]) == 0
+        assert writer.write(df.iloc[3:]) == 0
+    longer = pd.concat([df, make_frame(periods=2).assign(datetime=pd.Timestamp("2025-09-15 10:00:00"))])
+    with PartitionedDatasetWriter(root, "NQZ25") as writer:
+        assert writer.write(longer) == 2
+
+    store = load_bar_store_range(root, "NQZ25")
+    np.testing.assert_array_equal(store.open, longer['open'].to_numpy())
@@ -0,0 +1,102 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.const import OrderSide
+from backtester.data.bar_store import BarStore
+from backtester.order.order_market import MarketOrder
+from backtester.order.order_batch import evaluate_bracket_orders
+from backtester.strategy import Engine, Strategy, run_backtest
+
+
+class EveryNBars(Strategy):
+    """Alternating long/short market orders at the close of every n-th bar"""
+    def __init__(self, every: int, stop: float, target: float):
+        self.every = every
+        self.stop = stop
+        self.target = target
+        self.entries = []
+
+    def on_bar(self, bar) -> None:
+        if bar.index % self.every or bar.index + 1 == len(self.bars):
+            return
+
+        sign = 1 if len(self.entries) % 2 == 0 else -1
+        self.market(sign, bar.last - sign * self.stop, bar.last + sign * self.target)
+        self.entries.append((bar.index + 1, sign, bar.last))
+
+
+def test_matches_batch_evaluation(make_store):
+    bars = make_store()
+    strategy = EveryNBars(every=7, stop=1., target=2.)
+    result = run_backtest(bars, strategy)
+
+    entry_index, sign, signal = map(np.array, zip(*strategy.entries))
+    # Market orders fill at the open of the bar after the signal, brackets are set from the signal close
+    expected = evaluate_bracket_orders(bars, sign, bars.open[entry_index], signal - sign * 1., signal + sign * 2., entry_index)
+    closed = expected[expected['level_hit'] != 'nohit'].sort_values(['exit_index', 'entry_index'])
+
+    fills = result.fills.sort_values(['exit_index', 'order_id'])
+    assert len(fills) + len(result.open_orders) == len(strategy.entries)
+    np.testing.assert_array_equal(fills['exit_index'], closed['exit_index'])
+    np.testing.assert_allclose(fills['exit_pl'], closed['exit_pl'])
+    assert list(fills['level_hit'].astype(str)) == list(closed['level_hit'].astype(str))
+    assert result.metrics()['trades'] == len(fills)
+    assert result.metrics()['total_pl'] == closed['exit_pl'].sum()
+
+
+def test_timings(make_store):
+    bars = make_store(500)
+    result = Engine(bars).run(EveryNBars(every=5, stop=1., target=1.))
+    timings = result.timings
+
+    assert timings.bars == 500
+    assert timings.strategy > 0 and timings.orders > 0 and timings.bookkeeping >= 0
+    assert timings.total == pytest.approx(timings.strategy + timings.orders + timings.bookkeeping)
+    assert 'strategy' in str(timings)
+
+    untimed = Engine(bars, timed=False).run(EveryNBars(every=5, stop=1., target=1.))
+    assert untimed.timings.total == 0
+    pd.testing.assert_frame_equal(untimed.fills, result.fills)
+
+
+class HoldOneOrder(Strategy):
+    """One long market order whose bracket is never reached"""
+    def on_start(self) -> None:
+        self.market(1, 0., 1e12)
+
+    def on_bar(self, bar) -> None:
+        pass
+
+
+def test_few_open_orders_cost_about_a_scalar_order(make_store):
+    bars = make_store(20_000)
+    result = run_backtest(bars, HoldOneOrder())
+    assert len(result.open_orders) == 1
+
+    order = MarketOrder(side=OrderSide.LONG, stop_price=0., target_price=1e12, entry_price=bars.open[0], is_live=True)
+    start = time.perf_counter()
+    for bar in bars:
+        order.update_at_bar(bar)
+    scalar = time.perf_counter() - start
+
+    # The vectorized update alone costs about 10 scalar updates per bar
+    assert result.timings.orders < 3 * scalar
+
+
+def test_on_bar_is_required():
+    with pytest.raises(TypeError):
+        Strategy()
+
+
+def test_market_orders_fill_at_next_open_with_slippage(make_store):
+    bars = make_store(50)
+
+    class Once(Strategy):
+        def on_bar(self, bar) -> None:
+            if bar.index == 10:
+                self.market(1, stop_price=0., target_price=1e6, slippage=0.25)
+                self.market(-1, stop_price=1e6, target_price=0., slippage=0.25)
+
+    result = run_backtest(bars, Once())
+    assert list(result.open_orders['entry_price']) == [bars.open[11] + 0.25, bars.open[11] - 0.25]
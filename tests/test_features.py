@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.data import features
+from backtester.data.feature_cache import FeatureCache
+from backtester.data.sessions import day_index
+from backtester.data.synthetic import generate_bars
+
+
+def make_columns(n: int = 3000) -> dict:
+    # 1 minute bars over a little more than two sessions
+    df = generate_bars(n, freq="1min")
+    columns = {name: df[name].to_numpy() for name in ('open', 'high', 'low', 'last', 'volume')}
+    columns['day_index'] = day_index(df['datetime'].to_numpy().view(np.int64))
+    return columns
+
+
+def test_session_vwap_resets_each_session():
+    columns = make_columns()
+    df = pd.DataFrame(columns)
+    df['pv'] = (df['high'] + df['low'] + df['last']) / 3 * df['volume']
+    grouped = df.groupby('day_index')
+    expected = grouped['pv'].cumsum() / grouped['volume'].cumsum()
+
+    np.testing.assert_allclose(features.session_vwap(columns), expected)
+
+
+def test_atr_and_rolling_extrema():
+    columns = make_columns(500)
+    df = pd.DataFrame(columns)
+    previous = df['last'].shift()
+    tr = pd.concat([df['high'] - df['low'], (df['high'] - previous).abs(), (df['low'] - previous).abs()], axis=1).max(axis=1)
+
+    np.testing.assert_allclose(features.atr(columns, period=14), tr.rolling(14).mean())
+    np.testing.assert_array_equal(features.rolling_high(columns, window=20), df['high'].rolling(20).max())
+    np.testing.assert_array_equal(features.rolling_low(columns, window=20), df['low'].rolling(20).min())
+
+
+def test_value_area_of_previous_session():
+    columns = {
+        'last': np.array([10., 10.25, 10.5, 10.25, 11., 11.25]),
+        'volume': np.array([10, 60, 30, 5, 1, 1]),
+        'day_index': np.array([0, 0, 0, 0, 1, 1], dtype=np.int32),
+    }
+    levels = features.value_area(columns, value_area_pct=0.7, tick_size=0.25)
+
+    assert np.isnan(levels[:4]).all()
+    # 10.25 holds 65 of 105, adding 10.5 (30) reaches 70%
+    np.testing.assert_array_equal(levels[4:], [[10.25, 10.25, 10.5]] * 2)
+
+
+def write_dataset(path, n: int = 2000, seed: int = 0):
+    generate_bars(n, seed=seed, freq="1min").to_parquet(path)
+
+
+def test_cache_hit_and_invalidation(tmp_path, monkeypatch):
+    path = tmp_path / "bars.pq"
+    write_dataset(path)
+    cache = FeatureCache.next_to(str(path))
+    calls = []
+    atr = features.FEATURES['atr']
+    monkeypatch.setitem(features.FEATURES, 'atr', lambda columns, **params: calls.append(params) or atr(columns, **params))
+
+    first = cache.get(str(path), 'atr', period=10)
+    second = FeatureCache.next_to(str(path)).get(str(path), 'atr', period=10)
+    assert isinstance(second, np.memmap)
+    np.testing.assert_array_equal(first, second)
+    assert len(calls) == 1
+
+    cache.get(str(path), 'atr', period=5)
+    assert len(calls) == 2
+
+    # New content, new hash
+    write_dataset(path, seed=1)
+    cache.get(str(path), 'atr', period=10)
+    assert len(calls) == 3
+
+    with pytest.raises(KeyError):
+        cache.get(str(path), 'unknown')
+
+
+def test_lru_eviction(tmp_path):
+    path = tmp_path / "bars.pq"
+    write_dataset(path, n=1000)
+    # Room for two 8 kB float64 arrays and their npy headers
+    cache = FeatureCache(str(tmp_path / "cache"), max_bytes=2 * 8000 + 512)
+
+    cache.get(str(path), 'rolling_high', window=5)
+    cache.get(str(path), 'rolling_low', window=5)
+    cache.get(str(path), 'rolling_high', window=5)
+    cache.get(str(path), 'atr', period=5)
+
+    names = sorted(entry['name'] for entry in cache.entries())
+    assert names == ['atr', 'rolling_high']
+    assert cache.size_bytes <= cache.max_bytes
+    assert len(list((tmp_path / "cache").glob('*.npy'))) == 2
+
+
+def test_caches_share_a_directory(tmp_path):
+    path = tmp_path / "bars.pq"
+    write_dataset(path, n=1000)
+    first = FeatureCache(str(tmp_path / "cache"))
+    second = FeatureCache(str(tmp_path / "cache"))
+
+    # Entries written by one cache are seen by the other, nothing is lost when both write
+    first.get(str(path), 'atr', period=5)
+    second.get(str(path), 'rolling_high', window=5)
+    first.get(str(path), 'rolling_low', window=5)
+    assert sorted(entry['name'] for entry in second.entries()) == ['atr', 'rolling_high', 'rolling_low']
+
+    # A hit does not rewrite any metadata, it only moves the entry to the end of the LRU order
+    before = {p.name: p.stat().st_mtime_ns for p in (tmp_path / "cache").rglob('*.json')}
+    second.get(str(path), 'atr', period=5)
+    assert {p.name: p.stat().st_mtime_ns for p in (tmp_path / "cache").rglob('*.json')} == before
+    assert second.entries()[-1]['name'] == 'atr'
+
+    first.clear()
+    assert second.entries() == [] and second.size_bytes == 0
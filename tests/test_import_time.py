@@ -0,0 +1,41 @@
+import sys
+import json
+import subprocess
+import pytest
+
+# Seconds allowed for importing a module once numpy is loaded, pandas and pyarrow alone take longer
+IMPORT_BUDGET = 0.25
+
+PROBE = """
+import sys, json, time
+import numpy
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in ('pandas', 'pyarrow') if m in sys.modules]}}))
+"""
+
+
+def import_in_subprocess(module: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module)], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('module', [
+    'backtester.order',
+    'backtester.order.order_book',
+    'backtester.order.order_batch',
+    'backtester.data.bar_store',
+    'backtester.data.range_index',
+])
+def test_hot_path_imports_without_pandas(module):
+    probe = import_in_subprocess(module)
+    assert probe['loaded'] == []
+    assert probe['seconds'] < IMPORT_BUDGET
+
+
+def test_kernels_import_without_pandas():
+    # Importing numba itself takes a few tenths of a second, only pandas and pyarrow are checked
+    assert import_in_subprocess('backtester.order.kernels')['loaded'] == []
@@ -0,0 +1,111 @@
+import json
+import pytest
+from backtester import instrumentation
+from backtester.const import OrderSide
+from backtester.data.bar_store import BarStore
+from backtester.data.data_loader import load_bar_store, load_pq_with_bar_data
+from backtester.data.synthetic import generate_bars
+from backtester.order.kernels import simulate_order, simulate_orders
+from backtester.order.order_book import LIMIT, MARKET, OrderBook
+from backtester.order.order_limit import LimitOrder
+from backtester.order.order_market import MarketOrder
+from backtester.strategy import Strategy, run_backtest
+
+
+def four_bars() -> BarStore:
+    return BarStore(
+        open=[100., 100., 100., 100.],
+        high=[101., 101., 112., 101.],
+        low=[99., 99., 99., 89.],
+        last=[100., 100., 100., 100.],
+        timestamp=[0, 1, 2, 3]
+    )
+
+
+class TwoOrders(Strategy):
+    def on_bar(self, bar) -> None:
+        if bar.index == 0:
+            self.market(OrderSide.LONG, stop_price=90., target_price=110.)
+            self.limit(OrderSide.SHORT, 100.5, stop_price=111., target_price=90.)
+
+
+def test_disabled_by_default():
+    assert not instrumentation.enabled()
+    with instrumentation.stage('anything'):
+        instrumentation.count('anything')
+
+
+def test_counts_order_lifecycle():
+    with instrumentation.record() as recorder:
+        run_backtest(four_bars(), TwoOrders())
+
+    # The limit order goes live on the low of bar 1, the long hits its target at bar 2, the short its stop
+    assert recorder.counters == {
+        'orders_created': 2, 'orders_live': 2, 'target_hits': 1, 'stop_hits': 1, 'bars_processed': 4
+    }
+    stats = recorder.stats().set_index('name')
+    assert stats.loc['engine.strategy', 'kind'] == 'stage' and stats.loc['engine.strategy', 'count'] == 1
+    assert not instrumentation.enabled()
+
+
+@pytest.mark.parametrize('use_kernel', [False, True])
+def test_scalar_and_kernel_counts_agree(use_kernel):
+    with instrumentation.record() as recorder:
+        simulate_orders(four_bars(), [1, -1], [MARKET, LIMIT], [100., 100.5], [90., 111.], [110., 90.], 1,
+                        use_kernel=use_kernel)
+
+    assert recorder.counters == {'orders_created': 2, 'orders_live': 2, 'target_hits': 1, 'stop_hits': 1}
+
+
+def test_stats_and_chrome_trace(tmp_path):
+    path = tmp_path / "bars.pq"
+    generate_bars(1000).to_parquet(path)
+    seen = []
+
+    with instrumentation.record(on_stage=lambda name, seconds: seen.append(name)) as recorder:
+        load_pq_with_bar_data(str(path))
+        load_bar_store(str(path))
+
+    assert recorder.counters['bars_loaded'] == 2000
+    assert seen == ['load.parquet', 'load.bar_data', 'load.bar_store']
+    assert (recorder.stats().query("kind == 'stage'")['seconds'] > 0).all()
+
+    recorder.to_chrome_trace(str(tmp_path / "trace.json"))
+    with open(tmp_path / "trace.json") as f:
+        events = json.load(f)['traceEvents']
+    assert [e['name'] for e in events if e['ph'] == 'X'] == seen
+    assert {e['name'] for e in events if e['ph'] == 'C'} == {'bars_loaded'}
+
+
+def test_nested_recording():
+    with instrumentation.record() as outer:
+        instrumentation.count('a')
+        with instrumentation.record() as inner:
+            instrumentation.count('a', 2)
+        instrumentation.count('a')
+
+    assert outer.counters['a'] == 2 and inner.counters['a'] == 2
+
+
+def test_orders_counted_once():
+    with instrumentation.record() as recorder:
+        book = OrderBook()
+        order_id = book.add_order(MarketOrder.create_at_bar(OrderSide.LONG, 90., 110., four_bars()[0].to_bar_data(), None))
+        book.get_order(order_id)
+        book.update_at_bar(four_bars()[2])
+        book.get_order(order_id)
+
+    assert (recorder.counters['orders_created'], recorder.counters['orders_live']) == (1, 1)
+    assert (recorder.counters['target_hits'], recorder.counters['stop_hits']) == (1, 0)
+
+
+@pytest.mark.parametrize('use_kernel', [False, True])
+def test_order_objects_counted_once(use_kernel):
+    # A limit order built directly, with no factory, goes live on bar 1 and hits its target at bar 2
+    with instrumentation.record() as recorder:
+        order = LimitOrder(side=OrderSide.LONG, stop_price=90., target_price=110., entry_price=100.5)
+        simulate_order(order, four_bars(), 0, 2, use_kernel=use_kernel)
+        simulate_order(order, four_bars(), 2, use_kernel=use_kernel)
+
+    assert order.is_closed
+    assert recorder.counters == {'orders_created': 1, 'orders_live': 1, 'target_hits': 1}
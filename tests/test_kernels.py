@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from backtester.const import OrderSide
+from backtester.data.bar_store import BarStore
+from backtester.order import kernels
+from backtester.order.kernels import simulate_order, simulate_orders
+from backtester.order.order_book import LIMIT, MARKET
+from backtester.order.order_limit import LimitOrder
+from backtester.order.order_market import MarketOrder
+
+
+def make_setups(store: BarStore, n: int = 300, seed: int = 1) -> dict:
+    rng = np.random.default_rng(seed)
+    sign = rng.choice([1, -1], size=n)
+    entry_index = np.sort(rng.integers(0, len(store), size=n))
+    entry = store.open[entry_index] + rng.integers(-4, 5, size=n) * 0.25
+    return dict(
+        side=sign,
+        order_type=rng.choice([MARKET, LIMIT], size=n),
+        entry_price=entry,
+        stop_price=entry - sign * rng.integers(1, 20, size=n) * 0.25,
+        target_price=entry + sign * rng.integers(1, 30, size=n) * 0.25,
+        entry_index=entry_index,
+        quantity=rng.integers(1, 3, size=n),
+    )
+
+
+@pytest.mark.parametrize('cls', [MarketOrder, LimitOrder])
+@pytest.mark.parametrize('side', [OrderSide.LONG, OrderSide.SHORT])
+def test_simulate_order_matches_classes(cls, side, make_store):
+    store = make_store(3000)
+    sign = 1 if side == OrderSide.LONG else -1
+    entry = store.open[10] + sign * 0.5
+    make = lambda: cls(side=side, stop_price=entry - sign * 3., target_price=entry + sign * 4., entry_price=entry,
+                       quantity=2, is_live=cls is MarketOrder)
+
+    reference, kernel = make(), make()
+    assert simulate_order(reference, store, 10, use_kernel=False) == simulate_order(kernel, store, 10, use_kernel=True)
+    assert kernel == reference
+
+
+def test_simulate_order_resumes(make_store):
+    store = make_store(3000)
+    reference = MarketOrder(side=OrderSide.LONG, stop_price=90., target_price=200., entry_price=100., is_live=True)
+    kernel = MarketOrder(side=OrderSide.LONG, stop_price=90., target_price=200., entry_price=100., is_live=True)
+
+    simulate_order(reference, store, 0, 500, use_kernel=False)
+    simulate_order(kernel, store, 0, 250, use_kernel=True)
+    simulate_order(kernel, store, 250, 500, use_kernel=True)
+    assert kernel == reference
+
+
+def test_simulate_orders_matches_classes(make_store):
+    store = make_store(3000)
+    setups = make_setups(store)
+
+    reference = simulate_orders(store, **setups, use_kernel=False)
+    np.testing.assert_array_equal(simulate_orders(store, **setups, use_kernel=True), reference)
+    assert (reference[:, 0] >= 0).any() and (reference[:, 0] < 0).any()
+
+
+@pytest.mark.skipif(not kernels.HAS_NUMBA, reason="numba is not installed")
+def test_kernel_is_compiled():
+    assert hasattr(kernels._run_orders, 'py_func')
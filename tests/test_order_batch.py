@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.data.bar_store import BarStore
+from backtester.data.range_index import RangeExtremaIndex
+from backtester.order.order_batch import evaluate_bracket_orders, side_to_sign
+from backtester.order.order_market import MarketOrder
+from backtester.const import OrderSide, LevelHit
+
+
+def run_scalar(store: BarStore, side: OrderSide, stop: float, target: float, index: int, quantity: int) -> MarketOrder:
+    order = MarketOrder.create_at_bar(side, stop, target, store[index], store[index].datetime, quantity=quantity)
+    for i in range(index, len(store)):
+        order.update_at_bar(store[i])
+        if order.is_closed:
+            break
+    return order
+
+
+def test_side_to_sign():
+    assert list(side_to_sign([OrderSide.LONG, 'short', OrderSide.SHORT])) == [1, -1, -1]
+    assert list(side_to_sign(np.array([1, -1]))) == [1, -1]
+    with pytest.raises(ValueError):
+        side_to_sign([0, 1])
+
+
+@pytest.mark.parametrize("max_cells, use_range_index", [(1 << 22, False), (64, False), (1 << 22, True)])
+def test_matches_scalar_order_path(max_cells, use_range_index, make_store):
+    store = make_store(3000)
+    range_index = RangeExtremaIndex.from_bars(store) if use_range_index else None
+    rng = np.random.default_rng(1)
+    n_orders = 400
+
+    sides = rng.choice([OrderSide.LONG, OrderSide.SHORT], size=n_orders)
+    entry_index = rng.integers(0, len(store), size=n_orders)
+    stop_distance = rng.integers(1, 40, size=n_orders) * 0.25
+    target_distance = rng.integers(1, 80, size=n_orders) * 0.25
+    quantity = rng.integers(1, 3, size=n_orders)
+    entry = store.open[entry_index]
+    sign = side_to_sign(sides)
+    stop = entry - sign * stop_distance
+    target = entry + sign * target_distance
+
+    result = evaluate_bracket_orders(store, sides, entry, stop, target, entry_index, quantity, max_cells=max_cells,
+                                     range_index=range_index)
+
+    assert len(result) == n_orders
+    for i in range(n_orders):
+        order = run_scalar(store, sides[i], stop[i], target[i], entry_index[i], quantity[i])
+        row = result.iloc[i]
+        assert LevelHit(row['level_hit']) == order.level_hit
+        assert row['max_open_pl'] == order.max_open_pl
+        assert row['min_open_pl'] == order.min_open_pl
+        if order.is_closed:
+            assert row['exit_price'] == order.exit_price
+            assert row['exit_pl'] == order.exit_pl
+        else:
+            assert np.isnan(row['exit_price']) and np.isnan(row['exit_pl'])
+            assert row['exit_index'] == -1
+
+
+def test_worst_case_rule_within_one_bar():
+    store = BarStore(
+        open=[100., 100.],
+        high=[101., 120.],
+        low=[99., 80.],
+        last=[100., 100.],
+        timestamp=[0, 1]
+    )
+
+    result = evaluate_bracket_orders(
+        store,
+        side=[OrderSide.LONG, OrderSide.SHORT],
+        entry_price=100.,
+        stop_price=[90., 110.],
+        target_price=[110., 90.],
+        entry_index=0
+    )
+
+    assert list(result['level_hit']) == [LevelHit.STOP.value, LevelHit.TARGET.value]
+    assert list(result['exit_index']) == [1, 1]
+    assert list(result['exit_pl']) == [-10., 10.]
+
+
+def test_entry_index_out_of_range(make_store):
+    store = make_store(10)
+    with pytest.raises(ValueError):
+        evaluate_bracket_orders(store, [1], [100.], [99.], [101.], [10])
+
+
+def test_range_index_matches_windowed_scan(make_store):
+    store = make_store(20_000)
+    rng = np.random.default_rng(3)
+    n_orders = 2000
+    sign = rng.choice([1, -1], size=n_orders)
+    entry_index = rng.integers(0, len(store), size=n_orders)
+    entry = store.open[entry_index]
+    # Wide brackets, some orders never close
+    stop = entry - sign * rng.integers(1, 200, size=n_orders) * 0.25
+    target = entry + sign * rng.integers(1, 200, size=n_orders) * 0.25
+
+    windowed = evaluate_bracket_orders(store, sign, entry, stop, target, entry_index)
+    jumped = evaluate_bracket_orders(store, sign, entry, stop, target, entry_index,
+                                     range_index=RangeExtremaIndex.from_bars(store))
+
+    pd.testing.assert_frame_equal(jumped, windowed)
+    assert (windowed['exit_index'] < 0).any()
+
+    with pytest.raises(ValueError):
+        evaluate_bracket_orders(store, sign, entry, stop, target, entry_index,
+                                range_index=RangeExtremaIndex.from_bars(store[:10]))
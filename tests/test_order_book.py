@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.data.bar_store import BarStore
+from backtester.order.order_base import Order
+from backtester.order.order_book import OrderBook, LIMIT
+from backtester.order.order_market import MarketOrder
+from backtester.order.order_limit import LimitOrder
+from backtester.const import OrderSide, LevelHit
+
+
+def test_orders_are_slotted():
+    order = MarketOrder(side=OrderSide.LONG, stop_price=95., target_price=110., entry_price=100.)
+    assert not hasattr(order, '__dict__')
+    assert not hasattr(LimitOrder(side=OrderSide.LONG, stop_price=95., target_price=110.), '__dict__')
+
+
+@pytest.mark.parametrize('scalar_max_orders', [0, 4, 10_000])
+def test_matches_scalar_orders(scalar_max_orders, make_store):
+    # Vectorized updates only, both paths as the number of open orders varies, scalar loop only
+    store = make_store(500)
+    rng = np.random.default_rng(2)
+    book = OrderBook(capacity=4, scalar_max_orders=scalar_max_orders)
+    scalar = {}
+
+    for i in range(len(store)):
+        bar = store[i]
+        # Open a few market and limit orders at every bar
+        for _ in range(rng.integers(0, 3)):
+            side = OrderSide.LONG if rng.random() < 0.5 else OrderSide.SHORT
+            sign = 1 if side == OrderSide.LONG else -1
+            is_limit = rng.random() < 0.5
+            entry = bar.open + sign * rng.integers(-4, 5) * 0.25 if is_limit else bar.open
+            stop = entry - sign * rng.integers(1, 20) * 0.25
+            target = entry + sign * rng.integers(1, 30) * 0.25
+            cls = LimitOrder if is_limit else MarketOrder
+            order = cls(side=side, stop_price=stop, target_price=target, entry_price=entry,
+                         quantity=int(rng.integers(1, 3)), is_live=not is_limit)
+            scalar[book.add_order(order)] = order
+
+        for order in scalar.values():
+            order.update_at_bar(bar)
+        book.update_at_bar(bar)
+
+    fills = book.fills
+    assert len(fills) + len(book) == len(scalar)
+    assert len(fills) == sum(order.is_closed for order in scalar.values())
+
+    for order_id, order in scalar.items():
+        assert book.get_order(order_id) == order
+
+
+def test_update_paths_agree_on_pending_market_orders(make_store):
+    store = make_store(300, seed=3)
+    books = [OrderBook(scalar_max_orders=0), OrderBook(scalar_max_orders=10_000)]
+
+    for i, bar in enumerate(store):
+        for book in books:
+            book.update_at_bar(bar)
+            if i % 3 == 0:
+                sign = 1 if i % 2 == 0 else -1
+                book.add(sign, bar.last - sign * 2., bar.last + sign * 3., quantity=2, slippage=0.25)
+                book.add(sign, bar.last - sign * 1., bar.last + sign * 1., bar.last - sign * 0.5, order_type=LIMIT)
+
+    pd.testing.assert_frame_equal(books[0].fills, books[1].fills)
+    pd.testing.assert_frame_equal(books[0].open_orders, books[1].open_orders)
+    assert books[0].closed_pl == books[1].closed_pl
+
+
+def test_fills_log():
+    store = BarStore(
+        open=[100., 100., 100.],
+        high=[101., 101., 120.],
+        low=[99., 99., 99.],
+        last=[100., 100., 100.],
+        timestamp=[0, 1, 2]
+    )
+    book = OrderBook()
+    market = book.add(OrderSide.LONG, stop_price=90., target_price=110., entry_price=100.)
+    limit = book.add(OrderSide.SHORT, stop_price=130., target_price=40., entry_price=50., order_type=LIMIT)
+
+    for bar in store:
+        book.update_at_bar(bar)
+
+    fills = book.fills
+    assert list(fills['order_id']) == [market]
+    assert fills['level_hit'][0] == LevelHit.TARGET.value
+    assert fills['exit_pl'][0] == 10.
+    assert fills['exit_index'][0] == 2
+    assert list(book.open_orders['order_id']) == [limit]
+    assert not book.get_order(limit).is_live
+
+
+def test_only_market_and_limit_orders():
+    class CustomOrder(Order):
+        def _set_live_status_at_bar(self, bar) -> None:
+            self.is_live = True
+
+    with pytest.raises(TypeError):
+        OrderBook().add_order(CustomOrder(side=OrderSide.LONG, stop_price=1., target_price=2., entry_price=1.5))
+
+    with pytest.raises(KeyError):
+        OrderBook().get_order(0)
@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+from backtester.strategy.portfolio import bar_close_time
+from backtester.strategy import (
+    PortfolioLimits, PortfolioStrategy, Strategy, merge_bars, run_backtest, run_portfolio
+)
+
+
+@pytest.fixture
+def stores(make_store) -> dict:
+    return {
+        'NQ': make_store(1500, seed=0, freq="2s"),
+        'ES': make_store(1000, seed=1, start="2024-01-01 00:00:01", freq="3s"),
+        'CL': make_store(800, seed=2, freq="4s"),
+    }
+
+
+class EveryNBars(PortfolioStrategy):
+    """Long market order at the close of every n-th bar of each symbol"""
+    def __init__(self, every: int, stop: float = 1., target: float = 1.):
+        self.every = every
+        self.stop = stop
+        self.target = target
+        self.placed = []
+
+    def on_bar(self, symbol, bar) -> None:
+        if bar.index % self.every == 0:
+            order_id = self.market(symbol, 1, bar.last - self.stop, bar.last + self.target)
+            self.placed.append((symbol, bar.index, order_id))
+
+
+class SingleSymbol(Strategy):
+    def __init__(self, every: int):
+        self.every = every
+
+    def on_bar(self, bar) -> None:
+        if bar.index % self.every == 0:
+            self.market(1, bar.last - 1., bar.last + 1.)
+
+
+def test_merge_bars_is_ordered_by_close_time(stores):
+    merged = [(symbol, bar.index, bar_close_time(stores[symbol], bar.index)) for symbol, bar in merge_bars(stores)]
+
+    assert len(merged) == sum(len(store) for store in stores.values())
+    close_times = [close for _, _, close in merged]
+    assert close_times == sorted(close_times)
+    for symbol, store in stores.items():
+        assert [i for s, i, _ in merged if s == symbol] == list(range(len(store)))
+
+    # Ties follow the order of the stores: NQ, ES and CL all have a bar closing at 4s
+    start = stores['NQ'].timestamp[0]
+    tied = [symbol for symbol, _, close in merged if close == start + 4_000_000_000]
+    assert tied == ['NQ', 'ES', 'CL']
+
+
+def test_slow_bars_come_after_the_fast_bars_they_contain(make_store):
+    stores = {
+        'NQ': make_store(10, seed=0, freq="60s"),
+        'ES': make_store(60, seed=1, freq="10s"),
+    }
+    merged = [(symbol, bar.index) for symbol, bar in merge_bars(stores)]
+
+    # The first 60s NQ bar closes with the 6th 10s ES bar, after the 5 ES bars that closed before
+    assert merged[:7] == [('ES', 0), ('ES', 1), ('ES', 2), ('ES', 3), ('ES', 4), ('NQ', 0), ('ES', 5)]
+    assert bar_close_time(stores['NQ'], 9) == stores['NQ'].timestamp[9] + 60_000_000_000
+
+
+def test_unconstrained_portfolio_matches_single_symbol_runs(stores):
+    result = run_portfolio(stores, EveryNBars(every=10))
+
+    for symbol, store in stores.items():
+        expected = run_backtest(store, SingleSymbol(every=10), timed=False).fills
+        fills = result.fills[result.fills['symbol'] == symbol].drop(columns='symbol').reset_index(drop=True)
+        pd.testing.assert_frame_equal(fills, expected)
+
+    assert result.rejected == {'margin': 0, 'position': 0, 'drawdown': 0}
+    assert set(result.metrics().index) == set(stores)
+
+
+def expected_pl(result, point_value: dict) -> float:
+    fills, open_orders = result.fills, result.open_orders
+    closed = fills['exit_pl'] * fills['quantity'] * fills['symbol'].map(point_value).astype(float)
+    marked = open_orders['bar_close_pl'] * open_orders['symbol'].map(point_value).astype(float)
+    return closed.sum() + marked.sum()
+
+
+def test_pl_in_currency(stores):
+    point_value = {'NQ': 20., 'ES': 50., 'CL': 1000.}
+    base = run_portfolio(stores, EveryNBars(every=10))
+    scaled = run_portfolio(stores, EveryNBars(every=10), point_value=point_value)
+
+    pd.testing.assert_frame_equal(scaled.fills, base.fills)
+    assert base.pl == pytest.approx(expected_pl(base, dict.fromkeys(stores, 1.)))
+    assert scaled.pl == pytest.approx(expected_pl(scaled, point_value))
+
+
+@pytest.mark.parametrize('limits, reason', [
+    (PortfolioLimits(max_position={'NQ': 2}), 'position'),
+    (PortfolioLimits(max_total_position=3), 'position'),
+    (PortfolioLimits(capital=10_000., margin={'NQ': 4_000., 'ES': 3_000., 'CL': 3_000.}), 'margin'),
+])
+def test_limits_reject_orders(limits, reason, stores):
+    strategy = EveryNBars(every=3, stop=3., target=3.)
+    result = run_portfolio(stores, strategy, limits)
+
+    rejected = sum(order_id is None for _, _, order_id in strategy.placed)
+    assert rejected > 0
+    assert result.rejected[reason] == rejected
+    assert len(result.fills) + len(result.open_orders) == len(strategy.placed) - rejected
+
+
+def test_drawdown_stops_new_orders(stores):
+    strategy = EveryNBars(every=3, stop=3., target=1.)
+    unconstrained = run_portfolio(stores, EveryNBars(every=3, stop=3., target=1.))
+    assert unconstrained.max_drawdown < -5
+
+    result = run_portfolio(stores, strategy, PortfolioLimits(max_drawdown=5.))
+    assert result.halted_at is not None
+    assert result.rejected['drawdown'] > 0
+    assert result.max_drawdown <= -5
+    assert len(result.fills) < len(unconstrained.fills)
@@ -0,0 +1,119 @@
+import time
+import threading
+import numpy as np
+import pytest
+from backtester import instrumentation
+from backtester.data.bar_store import BarStore
+from backtester.data.data_loader import load_bar_store
+from backtester.data.dataset import write_partitioned_dataset
+from backtester.data.prefetch import iter_partitions, iter_row_groups, prefetch, prefetch_partitions, prefetch_row_groups
+from backtester.data.synthetic import generate_bars
+
+
+def write_bars(tmp_path, n: int = 3 * 86400 // 60) -> str:
+    path = str(tmp_path / "bars.pq")
+    generate_bars(n, freq="1min").to_parquet(path, row_group_size=1000)
+    return path
+
+
+def assert_stores_equal(left: BarStore, right: BarStore) -> None:
+    for name in ('open', 'high', 'low', 'last', 'timestamp', 'day_index'):
+        np.testing.assert_array_equal(getattr(left, name), getattr(right, name))
+
+
+def test_row_groups_match_full_load(tmp_path):
+    path = write_bars(tmp_path)
+    chunks = list(prefetch_row_groups(path))
+
+    assert len(chunks) == 5
+    assert [len(chunk) for chunk in chunks] == [len(chunk) for chunk in iter_row_groups(path)]
+    assert_stores_equal(BarStore.concat(chunks), load_bar_store(path))
+
+
+def test_partitions_match_full_load(tmp_path):
+    path = write_bars(tmp_path)
+    write_partitioned_dataset(path, str(tmp_path / "dataset"), "NQZ25")
+    chunks = list(prefetch_partitions(str(tmp_path / "dataset"), "NQZ25", depth=1))
+
+    assert len(chunks) == len(list(iter_partitions(str(tmp_path / "dataset"), "NQZ25"))) == 3
+    assert all(len(np.unique(chunk.day_index)) == 1 for chunk in chunks)
+    assert_stores_equal(BarStore.concat(chunks), load_bar_store(path))
+
+
+def test_bars_loaded_counted_when_consumed(tmp_path):
+    path = write_bars(tmp_path)
+    threads = threading.active_count()
+
+    with instrumentation.record() as recorder:
+        chunks = prefetch_row_groups(path, depth=3)
+        first = next(chunks)
+        # Let the thread read ahead, the chunks it queued are not counted
+        time.sleep(0.1)
+        chunks.close()
+
+    assert recorder.counters[instrumentation.BARS_LOADED] == len(first) == 1000
+    assert threading.active_count() == threads
+
+
+def test_queue_is_bounded():
+    produced = []
+
+    def items():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    for i in prefetch(items(), depth=3):
+        time.sleep(0.005)
+        # Queued items plus the one the producer is blocked on
+        assert len(produced) - (i + 1) <= 3 + 1
+
+
+def test_errors_are_raised_in_consumer():
+    def items():
+        yield 1
+        raise OSError("unreadable row group")
+
+    iterator = prefetch(items())
+    assert next(iterator) == 1
+    with pytest.raises(OSError, match="unreadable"):
+        next(iterator)
+
+
+def test_early_close_stops_thread():
+    produced = []
+
+    def items():
+        for i in range(1000):
+            produced.append(i)
+            yield i
+
+    threads = threading.active_count()
+    for i in prefetch(items(), depth=2):
+        if i == 5:
+            break
+
+    assert threading.active_count() == threads
+    assert len(produced) < 10
+
+
+def test_io_overlaps_compute():
+    delay, n = 0.02, 10
+
+    def slow_reads():
+        for i in range(n):
+            time.sleep(delay)
+            yield i
+
+    start = time.perf_counter()
+    for _ in prefetch(slow_reads()):
+        time.sleep(delay)
+    elapsed = time.perf_counter() - start
+
+    # Sequential loading would take 2 * n * delay, overlapped about (n + 1) * delay
+    assert elapsed < 1.6 * n * delay
+
+
+def test_depth_must_be_positive():
+    with pytest.raises(ValueError):
+        list(prefetch([1], depth=0))
@@ -1,22 +1,36 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
 from tabulate import tabulate
 from backtester.data.bar_data import BarData
-from backtester.data.data_loader import load_pq_with_bar_data
-from backtester.data.generic_processor import sierra_txt_file_to_pq
+from backtester.data.data_loader import load_pq_with_bar_data, load_bar_store_range
+from backtester.data.generic_processor import (
+    sierra_txt_file_to_dataset,
+    sierra_txt_file_to_pq,
+    sierra_txt_file_to_pq_chunked,
+    sierra_txt_file_to_pq_incremental
+)
+from backtester.data.synthetic import generate_bars, write_sierra_txt
 
 
-def test_process_and_save():
-    load_path = "C:\\backtests\\openVVA\\datasets\\raw\\NQZ25_DV50.txt"
-    out_file_name = "C:\\backtests\\openVVA\\datasets\\processed\\NQZ25_DV50.pq"
+def test_process_and_save(tmp_path):
+    load_path = tmp_path / "NQZ25_DV50.txt"
+    out_file_name = tmp_path / "NQZ25_DV50.pq"
+    write_sierra_txt(generate_bars(1000), str(load_path))
 
-    df = sierra_txt_file_to_pq(load_path, out_file_name)
+    df = sierra_txt_file_to_pq(str(load_path), str(out_file_name))
+    assert len(df) == 1000
     print(f"\n✓ Processed {len(df)} rows")
     print(f"✓ Saved to {out_file_name}")
     print(f"✓ Datetime type: {type(df['datetime'].iloc[0])}")
 
 
-def test_load_with_bar_data():
-    parquet_path = "C:\\backtests\\openVVA\\datasets\\processed\\NQZ25_DV50.pq"
-    df = load_pq_with_bar_data(parquet_path)
+def test_load_with_bar_data(tmp_path):
+    parquet_path = tmp_path / "NQZ25_DV50.pq"
+    write_sierra_txt(generate_bars(1000), str(tmp_path / "NQZ25_DV50.txt"))
+    sierra_txt_file_to_pq(str(tmp_path / "NQZ25_DV50.txt"), str(parquet_path))
+    df = load_pq_with_bar_data(str(parquet_path))
     
     print("\n=== LOADED DATAFRAME ===")
     print(f"Columns: {list(df.columns)}")
@@ -36,3 +50,139 @@ def test_load_with_bar_data():
     assert isinstance(df['bar_data'].iloc[0].datetime, type(bar_data.datetime))
     
     print("\n✓ Test passed: BarData objects created successfully.")
+
+
+def write_sierra_export(path, n: int) -> None:
+    """Write a small export in the Sierra Chart text layout"""
+    start = pd.Timestamp("2025-09-15 18:00:00")
+    lines = ["Date, Time, Open, High, Low, Last, Volume, NumberOfTrades, BidVolume, AskVolume"]
+    for i in range(n):
+        ts = start + pd.Timedelta(milliseconds=1500 * i)
+        price = 24500 + 0.25 * (i % 17)
+        lines.append(
+            f"{ts.year}/{ts.month}/{ts.day}, {ts.strftime('%H:%M:%S')}.{ts.microsecond // 1000:03d}, "
+            f"{price:.2f}, {price + 1:.2f}, {price - 1:.2f}, {price + 0.25:.2f}, 50, {i % 7 + 1}, 25, 25"
+        )
+    path.write_text("\n".join(lines) + "\n")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_chunked_matches_full_processing(tmp_path, chunk_size):
+    raw = tmp_path / "export.txt"
+    write_sierra_export(raw, 50)
+
+    rows = sierra_txt_file_to_pq_chunked(str(raw), str(tmp_path / "chunked.pq"), chunk_size=chunk_size)
+    full = sierra_txt_file_to_pq(str(raw), str(tmp_path / "full.pq"))
+    chunked = pd.read_parquet(tmp_path / "chunked.pq")
+
+    assert rows == 50
+    assert chunked['datetime'].dtype == 'datetime64[ns]'
+    assert pq.ParquetFile(tmp_path / "chunked.pq").num_row_groups == -(-50 // chunk_size)
+    pd.testing.assert_frame_equal(chunked, full.astype({'datetime': 'datetime64[ns]'}))
+
+
+def test_chunked_header_only(tmp_path):
+    raw = tmp_path / "export.txt"
+    write_sierra_export(raw, 0)
+
+    assert sierra_txt_file_to_pq_chunked(str(raw), str(tmp_path / "out.pq")) == 0
+    assert len(pd.read_parquet(tmp_path / "out.pq")) == 0
+
+
+def test_incremental_matches_full_rebuild(tmp_path):
+    raw = tmp_path / "export.txt"
+    out_dir = tmp_path / "incremental"
+    write_sierra_export(raw, 120)
+    lines = raw.read_text().splitlines(keepends=True)
+
+    # Initial ingest, with a partial line still being written at the end of the file
+    raw.write_text("".join(lines[:41]) + lines[41][:10])
+    assert sierra_txt_file_to_pq_incremental(str(raw), str(out_dir), chunk_size=16) == 40
+
+    # Nothing new, nothing written
+    assert sierra_txt_file_to_pq_incremental(str(raw), str(out_dir)) == 0
+
+    raw.write_text("".join(lines[:81]))
+    assert sierra_txt_file_to_pq_incremental(str(raw), str(out_dir)) == 40
+    raw.write_text("".join(lines))
+    assert sierra_txt_file_to_pq_incremental(str(raw), str(out_dir)) == 40
+
+    sierra_txt_file_to_pq_chunked(str(raw), str(tmp_path / "full.pq"))
+    incremental = pd.read_parquet(out_dir)
+    assert len(list(out_dir.glob("part-*.parquet"))) == 3
+    pd.testing.assert_frame_equal(incremental, pd.read_parquet(tmp_path / "full.pq"))
+
+
+def test_incremental_rebuilds_rewritten_export(tmp_path):
+    raw = tmp_path / "export.txt"
+    out_dir = tmp_path / "incremental"
+    write_sierra_export(raw, 60)
+    lines = raw.read_text().splitlines(keepends=True)
+
+    raw.write_text("".join(lines[:31]))
+    sierra_txt_file_to_pq_incremental(str(raw), str(out_dir))
+
+    # The export gets regenerated with older bars appended past the recorded offset
+    raw.write_text("".join(lines[:31] + lines[1:21]))
+    assert sierra_txt_file_to_pq_incremental(str(raw), str(out_dir)) == 50
+    assert len(list(out_dir.glob("part-*.parquet"))) == 1
+    assert len(pd.read_parquet(out_dir)) == 50
+
+
+def test_export_to_partitioned_dataset(tmp_path):
+    raw = tmp_path / "export.txt"
+    write_sierra_export(raw, 50)
+
+    rows = sierra_txt_file_to_dataset(str(raw), str(tmp_path / "dataset"), "NQZ25", chunk_size=7)
+    store = load_bar_store_range(str(tmp_path / "dataset"), "NQZ25")
+
+    assert rows == len(store) == 50
+    assert (tmp_path / "dataset" / "NQZ25" / "2025-09-16.arrow").exists()
+
+
+def test_export_ingested_twice(tmp_path):
+    # Several trading days, so the second run meets day files that already exist
+    raw = tmp_path / "export.txt"
+    write_sierra_txt(generate_bars(2000, freq="3min"), str(raw))
+    root = str(tmp_path / "dataset")
+
+    assert sierra_txt_file_to_dataset(str(raw), root, "NQZ25", chunk_size=300) == 2000
+    assert sierra_txt_file_to_dataset(str(raw), root, "NQZ25", chunk_size=300) == 0
+
+    store = load_bar_store_range(root, "NQZ25")
+    assert len(store) == 2000
+    assert (np.diff(store.timestamp) > 0).all()
+
+
+def test_export_with_equal_timestamps_across_chunks(tmp_path):
+    # Groups of 4 bars sharing a timestamp, chunks of 6 rows end within the groups
+    bars = generate_bars(400, freq="1min")
+    bars['datetime'] = bars['datetime'].to_numpy()[np.arange(400) // 4 * 4]
+    raw = tmp_path / "export.txt"
+    write_sierra_txt(bars, str(raw))
+    root = str(tmp_path / "dataset")
+
+    assert sierra_txt_file_to_dataset(str(raw), root, "NQZ25", chunk_size=6) == 400
+    assert sierra_txt_file_to_dataset(str(raw), root, "NQZ25", chunk_size=6) == 0
+
+    store = load_bar_store_range(root, "NQZ25")
+    np.testing.assert_array_equal(store.open, bars['open'].to_numpy())
+
+
+def test_incremental_rebuilds_longer_rewritten_export(tmp_path):
+    raw = tmp_path / "export.txt"
+    out_dir = tmp_path / "incremental"
+    write_sierra_export(raw, 400)
+    lines = raw.read_text().splitlines(keepends=True)
+
+    # Lines one byte shorter than in the rewrite
+    raw.write_text("".join(lines[:1] + [line.replace(", 50, ", ", 5, ") for line in lines[301:]]))
+    assert sierra_txt_file_to_pq_incremental(str(raw), str(out_dir)) == 100
+
+    # Regenerated with more history, the recorded offset now falls in the middle of a line
+    raw.write_text("".join(lines[:301]))
+    assert sierra_txt_file_to_pq_incremental(str(raw), str(out_dir)) == 300
+    assert len(list(out_dir.glob("part-*.parquet"))) == 1
+
+    sierra_txt_file_to_pq_chunked(str(raw), str(tmp_path / "full.pq"))
+    pd.testing.assert_frame_equal(pd.read_parquet(out_dir), pd.read_parquet(tmp_path / "full.pq"))
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from backtester.data.range_index import RangeExtremaIndex
+
+
+def brute_force(high, low, start, upper, lower):
+    for i in range(start, len(high)):
+        if high[i] >= upper or low[i] <= lower:
+            return i, high[start:i + 1].max(), low[start:i + 1].min()
+    return -1, high[start:].max(), low[start:].min()
+
+
+@pytest.mark.parametrize("n_bars", [1, 2, 7, 64, 1000, 1023])
+def test_first_crossing_matches_brute_force(n_bars):
+    rng = np.random.default_rng(n_bars)
+    mid = 100 + np.cumsum(rng.normal(size=n_bars))
+    high, low = mid + rng.random(n_bars), mid - rng.random(n_bars)
+    index = RangeExtremaIndex(high, low)
+
+    start = rng.integers(0, n_bars, size=200)
+    upper = mid[start] + rng.random(200) * 20
+    lower = mid[start] - rng.random(200) * 20
+    crossing, high_max, low_min = index.first_crossing(start, upper, lower)
+
+    for k in range(200):
+        expected = brute_force(high, low, start[k], upper[k], lower[k])
+        assert (crossing[k], high_max[k], low_min[k]) == expected
+
+
+def test_pyramid_levels():
+    index = RangeExtremaIndex(np.array([1., 5., 2., 3., 4.]), np.array([0., 4., 1., 2., 3.]))
+
+    assert index.top == 3
+    # Level 1 has the pairs (1, 5), (2, 3), and the partial block (4)
+    assert list(index.high[index.offsets[1]:index.offsets[2]]) == [5., 3., 4.]
+    assert index.high[index.offsets[3]] == 5. and index.low[index.offsets[3]] == 0.
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.data.bar_store import BarStore
+from backtester.data.resample import (
+    load_resampled, resample_range, resample_time, resample_volume
+)
+from backtester.data.synthetic import generate_bars
+from backtester.order.order_batch import evaluate_bracket_orders
+
+
+def make_frame(n: int = 5000) -> pd.DataFrame:
+    # 10 second bars from 17:00, crossing the 18:00 session start
+    return generate_bars(n, start="2025-09-15 17:00:00", freq="10s")
+
+
+def test_time_bars_match_pandas():
+    df = make_frame()
+    bars = BarStore.from_frame(df)
+    resampled = resample_time(bars, '5min', volume=df['volume'].to_numpy())
+
+    expected = df.set_index('datetime').resample('5min').agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'last': 'last', 'volume': 'sum'}
+    )
+    pd.testing.assert_frame_equal(
+        resampled.bars.to_frame().drop(columns='day_index').set_index('datetime'),
+        expected.drop(columns='volume'),
+        check_freq=False
+    )
+    np.testing.assert_array_equal(resampled.volume, expected['volume'])
+    assert resampled.base_span(0) == (0, 30)
+
+
+def test_time_bars_never_span_sessions():
+    df = make_frame()
+    bars = BarStore.from_frame(df)
+
+    # Hourly bars aligned on 18:00: the first one is cut at the session start
+    hourly = resample_time(bars, '1h')
+    assert hourly.bars.to_frame()['datetime'].iloc[:2].tolist() == [pd.Timestamp('2025-09-15 17:00'), pd.Timestamp('2025-09-15 18:00')]
+    sessions = resample_time(bars, 'session')
+    assert len(sessions) == 2 and list(sessions.bounds) == [0, 360, 5000]
+    assert sessions.bars[1].datetime == pd.Timestamp('2025-09-15 18:00')
+
+
+def test_volume_bars():
+    bars = BarStore(open=[1.] * 6, high=[2.] * 6, low=[0.] * 6, last=[1.] * 6, timestamp=np.arange(6),
+                    day_index=[0, 0, 0, 0, 1, 1])
+    resampled = resample_volume(bars, np.array([4, 4, 4, 4, 10, 1]), bar_volume=10)
+
+    # Volume traded before each bar in its session: 0, 4, 8, 12, then 0, 10
+    assert list(resampled.bounds) == [0, 3, 4, 5, 6]
+    assert list(resampled.volume) == [12, 4, 10, 1]
+
+
+@pytest.mark.parametrize('resample_empty', [
+    lambda bars: resample_time(bars, '1min'),
+    lambda bars: resample_volume(bars, np.empty(0), bar_volume=10),
+    lambda bars: resample_range(bars, 1.),
+])
+def test_empty_store_is_rejected(resample_empty):
+    bars = BarStore(open=[], high=[], low=[], last=[], timestamp=np.empty(0, dtype=np.int64))
+    with pytest.raises(ValueError, match="empty"):
+        resample_empty(bars)
+
+
+@pytest.mark.parametrize('range_size', [0.5, 1., 3.])
+def test_range_bars(range_size):
+    df = make_frame()
+    bars = BarStore.from_frame(df)
+    resampled = resample_range(bars, range_size)
+
+    spread = resampled.bars.high - resampled.bars.low
+    single = np.diff(resampled.bounds) == 1
+    assert (spread[~single] <= range_size).all()
+    # Each range bar would have exceeded the range with the next base bar (or met a new session)
+    for i in range(len(resampled) - 1):
+        start, end = resampled.base_span(i)
+        extended = max(bars.high[start:end + 1]) - min(bars.low[start:end + 1])
+        assert extended > range_size or bars.day_index[end] != bars.day_index[end - 1]
+
+
+def test_orders_on_coarse_bars_use_base_bars():
+    df = make_frame()
+    bars = BarStore.from_frame(df)
+    resampled = resample_time(bars, '5min')
+    coarse_entry = np.array([1, 4, 9])
+    base_entry = resampled.base_index(coarse_entry)
+
+    assert list(resampled.coarse_index(base_entry)) == list(coarse_entry)
+    assert list(resampled.coarse_index(base_entry - 1)) == list(coarse_entry - 1)
+
+    entry = resampled.bars.open[coarse_entry]
+    result = evaluate_bracket_orders(bars, 1, entry, entry - 2., entry + 2., base_entry)
+    assert (result['exit_index'] >= base_entry).all()
+    assert bars.open[base_entry[0]] == entry[0]
+
+
+def test_cached_next_to_dataset(tmp_path):
+    path = tmp_path / "bars.pq"
+    make_frame().to_parquet(path)
+
+    first = load_resampled(str(path), 'time', freq='1min')
+    assert len(list((tmp_path / '_resampled').glob('*.arrow'))) == 1
+    second = load_resampled(str(path), 'time', freq='1min')
+    pd.testing.assert_frame_equal(first.bars.to_frame(), second.bars.to_frame())
+    np.testing.assert_array_equal(first.volume, second.volume)
+
+    load_resampled(str(path), 'range', range_size=1.)
+    assert len(list((tmp_path / '_resampled').glob('*.arrow'))) == 2
+
+    with pytest.raises(ValueError):
+        load_resampled(str(path), 'tick')
+
+
+def test_cache_is_bounded(tmp_path):
+    path = tmp_path / "bars.pq"
+    make_frame().to_parquet(path)
+    first = load_resampled(str(path), 'time', freq='1min')
+    entry_bytes = next((tmp_path / '_resampled').glob('*.arrow')).stat().st_size
+
+    # Rewriting the source changes its content hash, the stale entry is evicted past the byte budget
+    make_frame(4000).to_parquet(path)
+    second = load_resampled(str(path), 'time', max_bytes=entry_bytes, freq='1min')
+    assert len(second.bars) < len(first.bars)
+    assert len(list((tmp_path / '_resampled').glob('*.arrow'))) == 1
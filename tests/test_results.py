@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.const import LevelHit, OrderSide
+from backtester.data.bar_store import BarStore
+from backtester.order.order_book import OrderBook
+from backtester.order.order_market import MarketOrder
+from backtester.results import (
+    TradeLog, equity_curve, excursions, fills_from_orders, session_pl, sweep_metrics, trade_metrics
+)
+
+DAY = 86_400_000_000_000
+
+
+def make_fills(pl, config_hash=None) -> pd.DataFrame:
+    pl = np.asarray(pl, dtype=np.float64)
+    n = len(pl)
+    df = pd.DataFrame({
+        'side': np.ones(n, dtype=np.int8),
+        'exit_pl': pl,
+        'max_open_pl': np.maximum(pl, 0.) + 1,
+        'min_open_pl': np.minimum(pl, 0.) - 1,
+        'level_hit': pd.Categorical(np.where(pl > 0, 'target', 'stop'), categories=[h.value for h in LevelHit]),
+        'exit_index': np.arange(n, dtype=np.int64),
+        'exit_time': np.arange(n, dtype=np.int64) * DAY // 2,
+    })
+    if config_hash is not None:
+        df['config_hash'] = config_hash
+    return df
+
+
+def test_trade_metrics():
+    metrics = trade_metrics(make_fills([2., -1., -1., 3., -2.]))
+
+    assert metrics['trades'] == 5 and metrics['wins'] == 2 and metrics['losses'] == 3
+    assert metrics['win_rate'] == 0.4
+    assert metrics['total_pl'] == 1. and metrics['expectancy'] == 0.2
+    assert metrics['avg_win'] == 2.5 and metrics['avg_loss'] == pytest.approx(-4 / 3)
+    assert metrics['profit_factor'] == 5 / 4
+    # Equity 2, 1, 0, 3, 1: drawdown of 2 from the first peak
+    assert metrics['max_drawdown'] == -2.
+
+
+def test_open_orders_are_ignored():
+    fills = make_fills([1., -1.])
+    fills.loc[1, 'level_hit'] = LevelHit.NOHIT.value
+    assert trade_metrics(fills)['trades'] == 1
+
+
+def test_sweep_metrics_match_per_config():
+    rng = np.random.default_rng(0)
+    frames = [make_fills(rng.normal(size=rng.integers(1, 50)), config_hash=f'{k:03d}') for k in range(200)]
+    stacked = pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0)
+
+    metrics = sweep_metrics(stacked)
+    assert len(metrics) == 200
+    for k in (0, 57, 199):
+        pd.testing.assert_series_equal(metrics.loc[f'{k:03d}'], trade_metrics(frames[k]), check_names=False)
+
+    by_id = sweep_metrics(stacked.rename(columns={'config_hash': 'config_id'}))
+    assert by_id.index.name == 'config_id' and len(by_id) == 200
+
+
+def test_pl_is_weighted_by_quantity():
+    fills = make_fills([2., -1., 3.]).assign(quantity=[1., 3., 2.])
+
+    assert trade_metrics(fills)['total_pl'] == 5.
+    assert trade_metrics(fills)['avg_loss'] == -3.
+    assert list(equity_curve(fills)['equity']) == [2., -1., 5.]
+    assert session_pl(fills).sum() == 5.
+    log = TradeLog()
+    log.append(fills)
+    assert log.metrics()['total_pl'] == 5.
+
+
+def test_metrics_agree_with_order_book():
+    bars = BarStore(open=[100., 100.], high=[100.5, 103.], low=[99.5, 97.], last=[100., 100.], timestamp=[0, DAY // 24])
+    book = OrderBook()
+    book.add(OrderSide.LONG, 98., 102., 100., quantity=3)
+    book.add(OrderSide.SHORT, 101., 99., 100., quantity=2)
+    # The long order hits its stop, the short one its target (target first on SHORT)
+    for bar in bars:
+        book.update_at_bar(bar)
+
+    assert book.closed_pl == trade_metrics(book.fills)['total_pl'] == -6. + 2.
+
+
+def test_equity_curve_and_session_pl():
+    fills = make_fills([2., -1., -1., 3.])
+
+    curve = equity_curve(fills)
+    assert list(curve['equity']) == [2., 1., 0., 3.]
+    assert list(curve['drawdown']) == [0., -1., -2., 0.]
+
+    # Exits every half day, sessions start at 18:00
+    per_session = session_pl(fills)
+    assert list(per_session.index.astype(str)) == ['1970-01-01', '1970-01-02']
+    assert list(per_session) == [1., 2.]
+
+
+def test_trade_log_is_incremental():
+    pl = np.random.default_rng(1).normal(size=300)
+    log = TradeLog()
+    for chunk in np.array_split(np.arange(300), 7):
+        log.append(make_fills(pl[chunk]).assign(exit_index=chunk))
+
+    expected = trade_metrics(make_fills(pl))
+    pd.testing.assert_series_equal(log.metrics().astype(float), expected.astype(float))
+    assert len(log.to_frame()) == 300 and log.to_frame()['side'].dtype == np.int8
+
+
+def test_fills_from_orders():
+    orders = [MarketOrder(side=OrderSide.LONG, stop_price=99., target_price=102., entry_price=100., is_live=True),
+              MarketOrder(side=OrderSide.SHORT, stop_price=101., target_price=98., entry_price=100., is_live=True)]
+    orders[0].update_at_bar(type('Bar', (), {'high': 103., 'low': 99.5, 'last': 102.5})())
+
+    fills = fills_from_orders(orders)
+    assert len(fills) == 1
+    assert fills['side'].dtype == np.int8 and fills['exit_time'].dtype == np.int64
+    assert fills['level_hit'][0] == LevelHit.TARGET.value and fills['exit_pl'][0] == 2.
+
+    quantiles = excursions(fills, quantiles=[0.5])
+    assert quantiles.loc[0.5, 'mfe'] == 2.
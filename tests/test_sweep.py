@@ -0,0 +1,105 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import pyarrow.dataset as ds
+from backtester.data.bar_store import BarStore
+from backtester.order.order_batch import evaluate_bracket_orders
+from backtester.strategy.sweep import (
+    completed_configs, open_sweep_results, parameter_grid, run_sweep, run_sweep_to_shards
+)
+
+
+def bracket_strategy(bars: BarStore, params: dict) -> dict:
+    """Market entry every `every` bars with fixed stop and target distances"""
+    entry_index = np.arange(0, len(bars), params['every'])
+    sign = params['side']
+    entry = bars.open[entry_index] + sign * params['slippage']
+    result = evaluate_bracket_orders(
+        bars, sign, entry, entry - sign * params['stop'], entry + sign * params['target'], entry_index
+    )
+    return {'trades': len(result), 'total_pl': result['exit_pl'].sum()}
+
+
+def test_parameter_grid():
+    assert parameter_grid({'a': [1, 2], 'b': ['x']}) == [{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'x'}]
+    assert parameter_grid([{'a': 1}]) == [{'a': 1}]
+
+
+def test_parallel_sweep_matches_serial(make_store):
+    bars = make_store()
+    grid = {'side': [1, -1], 'stop': [1., 2.], 'target': [1., 3.], 'slippage': [0., 0.25], 'every': [10]}
+
+    parallel = run_sweep(bars, bracket_strategy, grid, n_workers=2)
+    serial = run_sweep(bars, bracket_strategy, grid, n_workers=1)
+
+    keys = ['side', 'stop', 'target', 'slippage']
+    parallel = parallel.sort_values(keys).reset_index(drop=True)
+    serial = serial.sort_values(keys).reset_index(drop=True)
+
+    assert len(parallel) == 16
+    assert list(parallel.columns) == ['side', 'stop', 'target', 'slippage', 'every', 'trades', 'total_pl']
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def test_frame_results_are_prefixed_with_params(make_store):
+    bars = make_store(100)
+    result = run_sweep(bars, frame_strategy, {'k': [1, 2]}, n_workers=1)
+
+    assert list(result.columns) == ['k', 'value']
+    assert list(result['k']) == [1, 1, 2, 2]
+
+
+def frame_strategy(bars: BarStore, params: dict) -> pd.DataFrame:
+    return pd.DataFrame({'value': [params['k'], params['k'] * 10]})
+
+
+def test_sharded_sweep_resumes(tmp_path, make_store):
+    bars = make_store()
+    grid = {'side': [1, -1], 'stop': [1., 2.], 'target': [1., 3.], 'slippage': [0.], 'every': [10, 20]}
+    out_dir = str(tmp_path / "sweep")
+
+    # A first run interrupted after some configurations
+    first_half = parameter_grid(grid)[:5]
+    assert run_sweep_to_shards(bars, bracket_strategy, first_half, out_dir, n_workers=1, shard_configs=2) == 5
+    assert len(completed_configs(out_dir)) == 5
+    assert sorted(os.listdir(out_dir)) == ['shard-00000.json', 'shard-00000.parquet', 'shard-00001.json',
+                                           'shard-00001.parquet', 'shard-00002.json', 'shard-00002.parquet']
+
+    # A shard written without its manifest is ignored and overwritten
+    pd.DataFrame({'x': [1]}).to_parquet(os.path.join(out_dir, 'shard-00003.parquet'))
+    assert run_sweep_to_shards(bars, bracket_strategy, grid, out_dir, n_workers=2, shard_configs=2) == 11
+    assert run_sweep_to_shards(bars, bracket_strategy, grid, out_dir, n_workers=1) == 0
+
+    dataset = open_sweep_results(out_dir)
+    assert dataset.count_rows() == 16
+    sharded = dataset.to_table().to_pandas().drop(columns='config_hash')
+    expected = run_sweep(bars, bracket_strategy, grid, n_workers=1)
+    sort_by = list(grid)
+    pd.testing.assert_frame_equal(
+        sharded.sort_values(sort_by).reset_index(drop=True),
+        expected.sort_values(sort_by).reset_index(drop=True)
+    )
+
+    winners = dataset.to_table(columns=['config_hash', 'total_pl'], filter=ds.field('total_pl') > 0)
+    assert winners.num_rows == (expected['total_pl'] > 0).sum()
+
+
+def failing_strategy(bars: BarStore, params: dict) -> dict:
+    if params['every'] == 7:
+        raise RuntimeError("strategy failed")
+    return bracket_strategy(bars, params)
+
+
+def test_sharded_sweep_keeps_results_on_error(tmp_path, make_store):
+    bars = make_store()
+    grid = [{'side': 1, 'stop': 1., 'target': 1., 'slippage': 0., 'every': every} for every in (10, 20, 30, 7, 40)]
+    out_dir = str(tmp_path / "sweep")
+
+    with pytest.raises(RuntimeError, match="strategy failed"):
+        run_sweep_to_shards(bars, failing_strategy, grid, out_dir, n_workers=1, shard_configs=100)
+
+    # The configurations run before the error were flushed, only the rest is run again
+    assert len(completed_configs(out_dir)) == 3
+    assert run_sweep_to_shards(bars, bracket_strategy, grid, out_dir, n_workers=1) == 2
+    assert open_sweep_results(out_dir).count_rows() == 5
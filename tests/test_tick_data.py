@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.const import LevelHit, OrderSide
+from backtester.data.bar_store import BarStore
+from backtester.data.tick_data import IntrabarTickIndex, TickStore, write_tick_store
+from backtester.order.order_batch import evaluate_bracket_orders
+
+SECOND = 1_000_000_000
+
+
+def make_bars() -> BarStore:
+    return BarStore(
+        open=[100., 100., 100., 100.],
+        high=[101., 111., 101., 112.],
+        low=[99., 94., 99., 93.],
+        last=[100., 100., 100., 100.],
+        timestamp=np.arange(4) * 10 * SECOND
+    )
+
+
+def make_ticks(directory) -> TickStore:
+    # Bar 1 hits 111 before 94, bar 3 hits 93 before 112
+    ticks = pd.DataFrame({
+        'last': [100., 99., 101., 100., 105., 111., 94., 100., 99., 101., 100., 93., 112.],
+        'datetime': pd.to_datetime(np.array([0, 1, 2, 10, 11, 12, 13, 20, 21, 22, 30, 31, 32]) * SECOND),
+    })
+    path = directory / "ticks.pq"
+    ticks.to_parquet(path)
+    return write_tick_store(str(path), str(directory / "ticks"))
+
+
+def test_write_tick_store_round_trip(tmp_path):
+    ticks = make_ticks(tmp_path)
+    reopened = TickStore.open(str(tmp_path / "ticks"))
+
+    assert isinstance(reopened.price, np.memmap)
+    assert len(reopened) == 13
+    np.testing.assert_array_equal(reopened.timestamp, ticks.timestamp)
+    assert reopened.timestamp[5] == 12 * SECOND
+
+
+def test_offsets_are_lazy(tmp_path):
+    index = IntrabarTickIndex(make_ticks(tmp_path), make_bars().timestamp)
+
+    start, end = index.offsets(np.array([1, 3]))
+
+    assert list(start) == [3, 10] and list(end) == [7, 13]
+    assert list(index.prices(1)) == [100., 105., 111., 94.]
+    # Bars never asked for are not searched
+    assert (index._start[[0, 2]] == -1).all()
+
+
+def test_bars_sharing_a_timestamp_split_ticks_by_volume(tmp_path):
+    # Three 10-contract volume bars, the last two completed in the same second
+    ticks = pd.DataFrame({
+        'last': [100., 101., 102., 103., 104., 105., 106.],
+        'volume': [6., 4., 3., 5., 2., 7., 3.],
+        'datetime': pd.to_datetime(np.array([0, 0, 1, 1, 1, 1, 1]) * SECOND),
+    })
+    store = write_tick_store(ticks, str(tmp_path / "ticks"))
+    bar_timestamp = np.array([0, 1, 1]) * SECOND
+
+    index = IntrabarTickIndex(store, bar_timestamp, bar_volume=[10., 10., 10.])
+    start, end = index.offsets(np.array([2, 1, 0]))
+
+    assert list(start) == [5, 2, 0] and list(end) == [7, 5, 2]
+    assert list(index.prices(1)) == [102., 103., 104.]
+    assert list(index.prices(2)) == [105., 106.]
+
+    with pytest.raises(ValueError, match="share a timestamp"):
+        IntrabarTickIndex(store, bar_timestamp).offsets(np.array([1]))
+
+
+def test_ambiguous_bars_resolved_with_ticks(tmp_path):
+    bars = make_bars()
+    index = IntrabarTickIndex(make_ticks(tmp_path), bars.timestamp)
+    orders = dict(
+        side=[OrderSide.LONG, OrderSide.LONG, OrderSide.SHORT],
+        entry_price=100.,
+        stop_price=[95., 95., 105.],
+        target_price=[110., 110., 95.],
+        entry_index=[0, 2, 2]
+    )
+
+    worst_case = evaluate_bracket_orders(bars, **orders)
+    resolved = evaluate_bracket_orders(bars, **orders, intrabar=index)
+
+    assert list(worst_case['level_hit']) == [LevelHit.STOP.value, LevelHit.STOP.value, LevelHit.TARGET.value]
+    assert list(resolved['level_hit']) == [LevelHit.TARGET.value, LevelHit.STOP.value, LevelHit.TARGET.value]
+    assert resolved['exit_pl'][0] == 10.
+    # Only the ticks up to the target count towards the adverse excursion
+    assert resolved['min_open_pl'][0] == -1.
+    assert resolved['max_open_pl'][0] == 10.
+    # Ticks agree with the worst case on the other bars, only the excursions get tighter
+    assert resolved['exit_pl'][1] == worst_case['exit_pl'][1] == -5.
+    assert resolved['max_open_pl'][1] == 1. and worst_case['max_open_pl'][1] == 10.
+    assert resolved['min_open_pl'][2] == -1. and worst_case['min_open_pl'][2] == -5.
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.data.bar_store import BarStore
+from backtester.order.order_batch import evaluate_bracket_orders
+from backtester.strategy.walk_forward import run_walk_forward, walk_forward_folds
+
+CALLS = []
+
+
+@pytest.fixture
+def make_sessions(make_store):
+    """Factory of stores with one session per day, `bars_per_session` one-minute bars from 18:00"""
+    def make(n_sessions: int = 12, bars_per_session: int = 200, seed: int = 0) -> BarStore:
+        return BarStore.concat([
+            make_store(bars_per_session, seed=seed + day, start=f"2024-01-{day + 1:02d} 18:00", freq="1min")
+            for day in range(n_sessions)
+        ])
+
+    return make
+
+
+def session_strategy(bars: BarStore, params: dict) -> dict:
+    """Long market entries every 20 bars of the session"""
+    CALLS.append(params['stop'])
+    entry_index = np.arange(0, len(bars), 20)
+    entry = bars.open[entry_index]
+    result = evaluate_bracket_orders(bars, 1, entry, entry - params['stop'], entry + params['target'], entry_index)
+    return {'total_pl': result['exit_pl'].sum(), 'trades': len(result)}
+
+
+def test_folds():
+    folds = walk_forward_folds(10, train_sessions=4, test_sessions=2)
+    assert [(f.train_start, f.train_end, f.test_start, f.test_end) for f in folds] == [(0, 4, 4, 6), (2, 6, 6, 8), (4, 8, 8, 10)]
+    anchored = walk_forward_folds(10, train_sessions=4, test_sessions=3, anchored=True)
+    assert [(f.train_start, f.test_end) for f in anchored] == [(0, 7), (0, 10)]
+
+
+def test_matches_direct_evaluation(make_sessions):
+    bars = make_sessions()
+    grid = {'stop': [0.5, 1., 2.], 'target': [0.5, 2.]}
+    CALLS.clear()
+    cache = {}
+    result = run_walk_forward(bars, session_strategy, grid, train_sessions=5, test_sessions=2, step_sessions=1,
+                              n_workers=1, cache=cache)
+
+    assert len(result) == 6
+    # One call per session and configuration, however many folds overlap
+    assert len(CALLS) == 12 * 6
+
+    bounds = bars.session_bounds()
+    for _, row in result.iterrows():
+        fold = int(row['fold'])
+        train = bars[bounds[fold]:bounds[fold + 5]]
+        test_sessions = [bars[bounds[s]:bounds[s + 1]] for s in range(fold + 5, fold + 7)]
+        params = {'stop': row['stop'], 'target': row['target']}
+        # The train window is scored session by session
+        assert row['train_score'] == pytest.approx(sum(
+            session_strategy(bars[bounds[s]:bounds[s + 1]], params)['total_pl'] for s in range(fold, fold + 5)
+        ))
+        assert row['test_score'] == pytest.approx(sum(session_strategy(s, params)['total_pl'] for s in test_sessions))
+        assert len(train) == 5 * 200
+    assert result['train_start'].iloc[1] == np.datetime64('2024-01-03')
+
+    # A new configuration only evaluates its own sessions
+    CALLS.clear()
+    run_walk_forward(bars, session_strategy, {'stop': [0.5, 1., 2., 3.], 'target': [0.5, 2.]}, 5, 2, step_sessions=1,
+                     n_workers=1, cache=cache)
+    assert CALLS == [3.] * 24
+
+
+def test_parallel_matches_serial(make_sessions):
+    bars = make_sessions()
+    grid = {'stop': [0.5, 1.], 'target': [1., 2.]}
+    serial = run_walk_forward(bars, session_strategy, grid, 4, 2, n_workers=1)
+    parallel = run_walk_forward(bars, session_strategy, grid, 4, 2, n_workers=2)
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def other_strategy(bars: BarStore, params: dict) -> dict:
+    return {'total_pl': 0., 'trades': 0}
+
+
+def test_cache_is_keyed_by_session_data_and_strategy(make_sessions):
+    bars = make_sessions()
+    grid = {'stop': [1.], 'target': [1.]}
+    cache = {}
+    run_walk_forward(bars, session_strategy, grid, 4, 2, n_workers=1, cache=cache)
+
+    # Another strategy on the same sessions is run, not read from the cache
+    other = run_walk_forward(bars, other_strategy, grid, 4, 2, n_workers=1, cache=cache)
+    assert (other['test_score'] == 0).all()
+
+    # Bars appended to the last session after an incremental ingest invalidate that session only
+    extended = make_sessions(n_sessions=12, bars_per_session=200, seed=0)
+    extended = BarStore.concat([extended, BarStore(
+        open=[100.], high=[101.], low=[99.], last=[100.5], timestamp=[extended.timestamp[-1] + 60_000_000_000]
+    )])
+    CALLS.clear()
+    run_walk_forward(extended, session_strategy, grid, 4, 2, n_workers=1, cache=cache)
+    assert len(CALLS) == 1
+
+
+def test_non_additive_objective_is_rejected(make_sessions):
+    with pytest.raises(ValueError, match="win_rate"):
+        run_walk_forward(make_sessions(), session_strategy, {'stop': [1.], 'target': [1.]}, 4, 2,
+                         objective='win_rate', n_workers=1)
+
+
+def scaled_strategy(scale: float):
+    def strategy(bars: BarStore, params: dict) -> dict:
+        return {'total_pl': scale * session_strategy(bars, params)['total_pl'], 'trades': 0}
+    return strategy
+
+
+def test_closures_and_lambdas_do_not_share_cache_entries(make_sessions):
+    bars = make_sessions()
+    grid = {'stop': [1.], 'target': [1.]}
+    cache = {}
+    base = run_walk_forward(bars, scaled_strategy(1.), grid, 4, 2, n_workers=1, cache=cache)
+
+    # Same factory, another captured value
+    doubled = run_walk_forward(bars, scaled_strategy(2.), grid, 4, 2, n_workers=1, cache=cache)
+    np.testing.assert_allclose(doubled['test_score'], 2 * base['test_score'])
+
+    flat = lambda bars, params: {'total_pl': 0., 'trades': 0}
+    negated = lambda bars, params: {'total_pl': -session_strategy(bars, params)['total_pl'], 'trades': 0}
+    assert (run_walk_forward(bars, flat, grid, 4, 2, n_workers=1, cache=cache)['test_score'] == 0).all()
+    negated_result = run_walk_forward(bars, negated, grid, 4, 2, n_workers=1, cache=cache)
+    np.testing.assert_allclose(negated_result['test_score'], -base['test_score'])
+
+    # The same closure is still read from the cache
+    CALLS.clear()
+    run_walk_forward(bars, scaled_strategy(1.), grid, 4, 2, n_workers=1, cache=cache)
+    assert CALLS == []